@@ -86,15 +86,13 @@ def build_clav_system(locator_inputs, prefix='L', orient_symmetry=False,
     fk_origin = cmds.duplicate(clav_bone_list[0], renameChildren=True)
     fk_joints = name.search_replace_name(search_input='BONE1',
                                          replace_output='FK_JNT',
-                                         scope='selection',
-                                         input_object=fk_origin)
+                                         input_objects=fk_origin)
 
     # IK system
     ik_origin = cmds.duplicate(clav_bone_list[0], renameChildren=True)
     ik_joints = name.search_replace_name(search_input='BONE1',
                                          replace_output='IK_JNT',
-                                         scope='selection',
-                                         input_object=ik_origin)
+                                         input_objects=ik_origin)
 
     ik_handle = cmds.ikHandle(startJoint=ik_joints[0],
                               endEffector=ik_joints[-1],
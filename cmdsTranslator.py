@@ -54,10 +54,13 @@ def get_short_name(longname):
     return short_name
 
 
-def get_long_name(name):
+def get_long_name(name, name_index=None):
     """
-    Returns the longname of an object.
+    Returns the longname of an object.  Resolved through name_index without
+    querying the scene when one is given.
     """
+    if name_index is not None:
+        return name_index.long_name(name)
     long_name = cmds.ls(name, long=True)[0]
     return long_name
 
@@ -1,7 +1,10 @@
+import math
+import weakref
 import maya.cmds as cmds
 # import maya.mel as mel
 import pymel.core as pm
-# from functools import partial
+from maya.api import OpenMaya as om
+from functools import partial
 from PySide2 import QtWidgets, QtCore, QtGui
 from maya_tools import mayaFrameWidget
 # import re
@@ -11,52 +14,206 @@ from master_rigger.data import node_data
 # from master_rigger import cmdsTranslator as nUtils
 reload(node_data)
 
-plugin_node_name_dictionary = {}
+try:
+    _PLUGIN_CALLBACKS
+except NameError:
+    # Ids of the plugin load/unload callbacks and the catalogs they refresh.
+    # Kept through reload(), so the callbacks registered by the module before
+    # the reload are removed rather than left running.
+    _PLUGIN_CALLBACKS = []
+    _CATALOGS = weakref.WeakSet()
+
+# Set once this load of the module registered its callbacks
+_callbacks_added = False
+
+
+def _plugin_changed(plugin_strings, *args):
+    plugins = [data['plugin'] for data in node_data.PLUGIN_LIBRARIES.values()]
+    for plugin_string in plugin_strings:
+        if plugin_string.rsplit('/', 1)[-1].split('.')[0] in plugins:
+            for catalog in list(_CATALOGS):
+                catalog.refresh()
+            return
+
+
+def add_plugin_callbacks():
+    """
+    Registers the plugin load/unload callbacks refreshing every catalog, once
+    per load of the module.  Callbacks left by an earlier load are removed
+    first.
+    """
+    global _callbacks_added
+    if _callbacks_added:
+        return
+    remove_plugin_callbacks()
+    for message in (om.MSceneMessage.kAfterPluginLoad,
+                    om.MSceneMessage.kAfterPluginUnload):
+        _PLUGIN_CALLBACKS.append(om.MSceneMessage.addStringArrayCallback(
+            message, _plugin_changed))
+    _callbacks_added = True
+
+
+def remove_plugin_callbacks():
+    global _callbacks_added
+    if _PLUGIN_CALLBACKS:
+        om.MMessage.removeCallbacks(_PLUGIN_CALLBACKS)
+        del _PLUGIN_CALLBACKS[:]
+    _callbacks_added = False
+
+
+class PluginNodeCatalog(object):
+    """
+    Prefix, namespace and suffix of every node of the loaded node plugins
+    (see node_data.PLUGIN_LIBRARIES).  Nothing is queried until the catalog
+    is first used, then it is kept until a plugin is loaded or unloaded.
+    Every catalog is refreshed by the same module callbacks.
+    """
+
+    def __init__(self):
+        self._entries = None
+        # Counts refreshes, so caches built from the catalog know it changed
+        self.version = 0
+        _CATALOGS.add(self)
+
+    def __contains__(self, node_key):
+        return node_key in self._catalog()
+
+    def __len__(self):
+        return len(self._catalog())
+
+    def _catalog(self):
+        if self._entries is not None:
+            return self._entries
+
+        add_plugin_callbacks()
+
+        self._entries = {}
+        for data in node_data.PLUGIN_LIBRARIES.values():
+            if not cmds.pluginInfo(data['plugin'], query=True, loaded=True):
+                continue
+            for node_key, suffix in data['library'].items():
+                self._entries[node_key] = (data['prefix'],
+                                           data['namespace'],
+                                           suffix or node_key.upper())
+        return self._entries
+
+    def refresh(self):
+        """
+        Empties the catalog, it is read again the next time it is used.
+        """
+        self._entries = None
+        self.version += 1
+
+    def names(self):
+        return sorted(self._catalog())
+
+    def _entry(self, node_key):
+        try:
+            return self._catalog()[node_key]
+        except KeyError:
+            raise KeyError('Plugin node ({}) is not loaded!'.format(node_key))
+
+    def prefix(self, node_key):
+        return self._entry(node_key)[0]
+
+    def namespace(self, node_key):
+        return self._entry(node_key)[1]
 
+    def suffix(self, node_key):
+        return self._entry(node_key)[2]
 
-# Use math nodes if loaded
-if cmds.pluginInfo('mayaMathNodes', query=True, loaded=True):
-    plugin_node_name_dictionary.update(node_data.MATH_NODE_DICTIONARY)
+    def node_type(self, node_key):
+        return self.prefix(node_key) + node_key
 
-if cmds.pluginInfo('arkMayaNodes', query=True, loaded=True):
-    plugin_node_name_dictionary.update(node_data.ARK_NODE_DICTIONARY)
+
+PLUGIN_CATALOG = PluginNodeCatalog()
+
+
+def _node_builders(node_keys):
+    """
+    Resolves node keys to what creates them, once per key.
+
+    Returns:
+        (dict): Each key with its suffix and either the maya node type (str)
+            or, for custom nodes, the function building the node.
+
+    """
+    builders = {}
+    for node_key in node_keys:
+        if node_key in builders:
+            continue
+        try:
+            suffix = node_data.NODE_NAME_DICTIONARY[node_key]
+            builder = node_data.NODE_DICTIONARY[suffix]
+        except KeyError:
+            raise KeyError('Node type ({}) not yet implemented!'.format(
+                node_key))
+        # Plain nodes are created straight through cmds, custom ones (ex. FTT)
+        # still need their build function
+        if isinstance(builder, partial) and builder.func is pm.createNode:
+            builder = builder.args[0]
+        builders[node_key] = (suffix, builder)
+    return builders
+
+
+def create_nodes(specs):
+    """
+    Creates and names many utility nodes at once.  Node types are resolved
+    once per key, nodes are created with cmds and the selection is left as
+    it is.
+
+    Args:
+        specs (list[tuple]): (node_key, name) of each node.  node_key is any key
+            of NODE_NAME_DICTIONARY, the node type suffix is added to the name.
+            If name is None, the node type is used.
+
+    Returns:
+        (list[str]): Names of the nodes, in the order of specs.
+
+    """
+    builders = _node_builders([node_key for node_key, _ in specs])
+
+    nodes = []
+    for node_key, name in specs:
+        suffix, builder = builders[node_key]
+        if not isinstance(builder, str):
+            node = str(builder())
+            nodes.append(cmds.rename(node, '{}_{}'.format(
+                name or cmds.nodeType(node), suffix)))
+            continue
+        nodes.append(cmds.createNode(
+            builder, name='{}_{}'.format(name or builder, suffix),
+            skipSelect=True))
+    return nodes
 
 
 def create_node(node_key, name=None):
     """
     All useful rigging nodes compacted into one function.  Works the same as
+    create_nodes() for a single node.
 
     Args:
         node_key (str): Identity key for node creation.
         name (str): Name for the node.  Node type is automatically added as a
-            suffix.
+            suffix.  Defaults to the name of the selected object.
 
     Returns:
         node_name (str): Name of node for further use.
 
     """
-    selection = pm.ls(selection=True)
-
-    try:
-        node = node_data.NODE_DICTIONARY[node_data.NODE_NAME_DICTIONARY[node_key]]()
-    except:  # check exception type
-        raise Exception('Node type ({}) not yet implemented!'.format(node_key))
-
     if not name:
+        selection = cmds.ls(selection=True)
         if selection:
-            name = selection[0].name()
-        else:
-            name = node.type()
+            name = selection[0]
 
-    node.rename('%s_%s' % (name, node_data.NODE_NAME_DICTIONARY[node_key]))
-    return node.name()
+    return create_nodes([(node_key, name)])[0]
 
 
 # Long-term future goal:
 # convert to create_custom_node when more than one plug-in added to personal library
 def create_plugin_node(plugin_node_key, name=None):
-    plug_prefix = NodeWidget.get_plugin_node_prefix(plugin_node_key)
-    plug_namespace = NodeWidget.get_plugin_node_namespace(plugin_node_key)
+    plug_prefix = PLUGIN_CATALOG.prefix(plugin_node_key)
+    plug_namespace = PLUGIN_CATALOG.namespace(plugin_node_key)
 
     try:
         node = cmds.createNode(plug_prefix + plugin_node_key)
@@ -70,69 +227,206 @@ def create_plugin_node(plugin_node_key, name=None):
         if cmds.ls(selection=True):
             name = cmds.ls(selection=True)[0]
         else:
-            name = cmds.objectType(node).strip(plug_prefix)
-
-    plugin_node_suffix = plugin_node_name_dictionary[plugin_node_key] or plugin_node_key.upper()
+            name = plugin_node_key
 
     node_name = cmds.rename(node,
                             '{plugin}:{name}_{suffix}'.format(
                                 plugin=plug_namespace,
                                 name=name,
-                                suffix=plugin_node_suffix))
+                                suffix=PLUGIN_CATALOG.suffix(plugin_node_key)))
     return node_name
 
 
+# Centimeters in each linear unit and radians in each angle unit, to work out
+# the conversionFactor of the unitConversion nodes Maya makes itself
+LINEAR_UNITS = {'mm': 0.1, 'cm': 1.0, 'm': 100.0, 'km': 100000.0, 'in': 2.54,
+                'ft': 30.48, 'yd': 91.44, 'mi': 160934.4}
+ANGLE_UNITS = {'rad': 1.0, 'deg': math.pi / 180, 'min': math.pi / 10800,
+               'sec': math.pi / 648000}
+
+
+def _maya_conversion_factors():
+    """
+    Returns the conversionFactors Maya gives the unitConversion nodes it makes
+    on connection, for the current linear and angle units.
+    """
+    units = (LINEAR_UNITS[cmds.currentUnit(query=True, linear=True)],
+             ANGLE_UNITS[cmds.currentUnit(query=True, angle=True)])
+    return set((1.0,) + units + tuple(1.0 / unit for unit in units))
+
+
+def get_custom_conversions(conversion_nodes):
+    """
+    Returns the unitConversion nodes with a conversionFactor Maya would not
+    make on connection (ex. one edited to scale a value).  Every factor is
+    read from its plug through the API in one pass.
+    """
+    if not conversion_nodes:
+        return []
+
+    selection = om.MSelectionList()
+    for conversion_node in conversion_nodes:
+        selection.add(conversion_node)
+
+    maya_factors = _maya_conversion_factors()
+    custom = []
+    for index, conversion_node in enumerate(conversion_nodes):
+        factor = om.MFnDependencyNode(selection.getDependNode(index)).findPlug(
+            'conversionFactor', False).asDouble()
+        if not any(abs(factor - maya_factor) < 1e-6
+                   for maya_factor in maya_factors):
+            custom.append(conversion_node)
+    return custom
+
+
+def get_network_edges(nodes):
+    """
+    Reads every connection to and from a set of nodes in one pass.
+    unitConversion nodes in between are collapsed, so edges run between the
+    nodes they convert for and Maya makes them again on connection.
+    Conversions with a custom conversionFactor (see get_custom_conversions())
+    are kept as nodes of the network, with their own edges, so the factor is
+    not lost.  Message connections are left out.
+
+    Args:
+        nodes (list[str]): Nodes of the network.
+
+    Returns:
+        (list[tuple]): (source plug, destination plug) of each connection.
+
+    """
+    connections = []
+    inputs = cmds.listConnections(nodes, connections=True, plugs=True,
+                                  source=True, destination=False) or []
+    for destination, source in zip(inputs[::2], inputs[1::2]):
+        connections.append((source, destination))
+
+    outputs = cmds.listConnections(nodes, connections=True, plugs=True,
+                                   source=False, destination=True) or []
+    for source, destination in zip(outputs[::2], outputs[1::2]):
+        connections.append((source, destination))
+
+    other_nodes = set(plug.split('.', 1)[0] for connection in connections
+                      for plug in connection) - set(nodes)
+    conversions = cmds.ls(list(other_nodes), type='unitConversion') or [] \
+        if other_nodes else []
+
+    # The far side of every conversion, read in one query each way
+    conversion_inputs = {}
+    conversion_outputs = {}
+    if conversions:
+        upstream = cmds.listConnections(
+            conversions, connections=True, plugs=True, source=True,
+            destination=False) or []
+        for destination, source in zip(upstream[::2], upstream[1::2]):
+            conversion_inputs[destination.split('.', 1)[0]] = source
+        downstream = cmds.listConnections(
+            conversions, connections=True, plugs=True, source=False,
+            destination=True) or []
+        for source, destination in zip(downstream[::2], downstream[1::2]):
+            conversion_outputs.setdefault(source.split('.', 1)[0],
+                                          []).append(destination)
+    custom = set(get_custom_conversions(conversions))
+
+    edges = set()
+    for source, destination in connections:
+        source_node = source.split('.', 1)[0]
+        destination_node = destination.split('.', 1)[0]
+        if source_node in conversion_inputs:
+            if source_node in custom:
+                edges.add((conversion_inputs[source_node],
+                           source_node + '.input'))
+                edges.add((source, destination))
+            else:
+                edges.add((conversion_inputs[source_node], destination))
+        elif destination_node in conversion_outputs:
+            if destination_node in custom:
+                edges.add((source, destination))
+                edges.update((destination_node + '.output', plug)
+                             for plug in conversion_outputs[destination_node])
+            else:
+                edges.update((source, plug)
+                             for plug in conversion_outputs[destination_node])
+        elif source_node not in conversions and \
+                destination_node not in conversions:
+            edges.add((source, destination))
+
+    return sorted(edge for edge in edges
+                  if not edge[0].endswith('.message') and
+                  not edge[1].endswith('.message'))
+
+
 def duplicate_node_connections(find, replace, nodes=[]):
+    """
+    Duplicates a node network, renaming the copies with find/replace, and
+    rebuilds its connections.  Connections to nodes outside the network are
+    made to the node the find/replace names (ex. L_foot_CTRL -> R_foot_CTRL),
+    or to the same node if the name does not change.
+
+    The network is read once into an edge table, duplicated in one call and
+    rewired from the table.  unitConversion nodes are not copied, Maya makes
+    new ones where the copies need them, except the ones with a custom
+    conversionFactor, which are copied with the network.
+
+    Args:
+        find (str): Text to replace in the names (ex. 'L_').
+        replace (str): Text replacing it (ex. 'R_').
+        nodes (list[str]): Nodes of the network.  Selection if not given.
+
+    Returns:
+        (list[str]): Names of the duplicated nodes.
+
+    """
     if not nodes:
         nodes = cmds.ls(selection=True)
     cmds.select(clear=True)
-    newNodes = []
-
-    for node in nodes:
-        new_node_name = node.replace(find, replace)
-        newNode = cmds.duplicate(node, name=new_node_name)
-        newNodes.append(newNode)
-
-    for node in nodes:
-        # Input Connections
-        nodeInConnections = [
-            con for con in cmds.listConnections(
-                node, connections=True, source=True, destination=False, skipConversionNodes=True)
-            if '.' in con and not con.endswith('.message')
-        ]
-
-        for connection in nodeInConnections:
-            sourceAttr = cmds.connectionInfo(connection, sourceFromDestination=True)
-            if cmds.objectType(sourceAttr.split('.')[0]) == 'unitConversion':
-                unitConversionInOut = sourceAttr.replace('output', 'input')
-                sourceAttr = cmds.connectionInfo(
-                    unitConversionInOut,
-                    sourceFromDestination=True)
-            sourceAttr = sourceAttr.replace(find, replace)
-            targetAttr = connection.replace(find, replace)
-            cmds.connectAttr(sourceAttr, targetAttr, force=True)
-
-        # Output Connections
-        nodeOutConnections = [
-            con for con in cmds.listConnections(
-                node, connections=True, source=False, destination=True, skipConversionNodes=True)
-            if '.' in con and not con.endswith('.message')
-        ]
-        for connection in nodeOutConnections:
-            targetAttrs = cmds.connectionInfo(connection, destinationFromSource=True)
-            sourceAttr = connection.replace(find, replace)
-            for targetAttr in targetAttrs:
-                if cmds.objectType(targetAttr.split('.')[0]) == 'unitConversion':
-                    unitConversionInOut = targetAttr.replace('input', 'output')
-                    targetAttr = cmds.connectionInfo(
-                        unitConversionInOut,
-                        destinationFromSource=True)
-                    for con in targetAttr:
-                        con = con.replace(find, replace)
-                        cmds.connectAttr(sourceAttr, con, force=True)
-                else:
-                    targetAttr = targetAttr.replace(find, replace)
-                    cmds.connectAttr(sourceAttr, targetAttr, force=True)
+    if not nodes:
+        return []
+
+    edges = get_network_edges(nodes)
+    edge_nodes = set(plug.split('.', 1)[0] for edge in edges
+                     for plug in edge) - set(nodes)
+    conversions = cmds.ls(list(edge_nodes), type='unitConversion') or [] \
+        if edge_nodes else []
+
+    # returnRootsOnly gives one copy per node, in order, without the children
+    # and shapes of DAG nodes
+    network = list(nodes) + conversions
+    duplicates = cmds.duplicate(network, returnRootsOnly=True)
+    new_names = {}
+    for node, duplicate in zip(network, duplicates):
+        new_names[node] = cmds.rename(duplicate, node.replace(find, replace))
+
+    outside_nodes = {}
+
+    def remap(plug):
+        node_name, attribute = plug.split('.', 1)
+        if node_name in new_names:
+            return '{}.{}'.format(new_names[node_name], attribute)
+        new_node = node_name.replace(find, replace)
+        if new_node not in outside_nodes:
+            outside_nodes[new_node] = cmds.objExists(new_node)
+        if not outside_nodes[new_node]:
+            return None
+        return '{}.{}'.format(new_node, attribute)
+
+    missing = set()
+    for source, destination in edges:
+        new_source = remap(source)
+        new_destination = remap(destination)
+        if new_source is None or new_destination is None:
+            missing.add(source if new_source is None else destination)
+            continue
+        # Outside plugs that keep their name stay driven by the original
+        if new_destination == destination:
+            continue
+        cmds.connectAttr(new_source, new_destination, force=True)
+
+    if missing:
+        cmds.warning('No counterpart found for: {}'.format(
+            ', '.join(sorted(missing))))
+
+    return [new_names[node] for node in nodes]
 
 
 class NodeWidget(mayaFrameWidget.MayaFrameWidget):
@@ -235,7 +529,7 @@ class NodeWidget(mayaFrameWidget.MayaFrameWidget):
         plugin_node_type_label = QtWidgets.QLabel('Plugin Node Type:')
         self.plugin_node_type_combo = QtWidgets.QComboBox()
         # Adding combo box items for node options
-        for node in sorted(plugin_node_name_dictionary.keys()):
+        for node in PLUGIN_CATALOG.names():
             self.plugin_node_type_combo.addItem(node)
         plugin_type_layout.addWidget(plugin_node_type_label)
         plugin_type_layout.addWidget(self.plugin_node_type_combo)
@@ -274,21 +568,11 @@ class NodeWidget(mayaFrameWidget.MayaFrameWidget):
 
     @classmethod
     def get_plugin_node_prefix(cls, plugin_node_key):
-        plug_prefix = None
-        for data in node_data.PLUGIN_LIBRARIES.values():
-            if plugin_node_key in data['library'].keys():
-                plug_prefix = data['prefix']
-                break
-        return plug_prefix
+        return PLUGIN_CATALOG.prefix(plugin_node_key)
 
     @classmethod
     def get_plugin_node_namespace(cls, plugin_node_key):
-        plug_namespace = None
-        for data in node_data.PLUGIN_LIBRARIES.values():
-            if plugin_node_key in data['library'].keys():
-                plug_namespace = data['namespace']
-                break
-        return plug_namespace
+        return PLUGIN_CATALOG.namespace(plugin_node_key)
 
     def _get_node_settings(self):
         node_key = node_data.NODE_NAME_DICTIONARY[self.node_type_combo.currentText()]
@@ -323,14 +607,13 @@ class NodeWidget(mayaFrameWidget.MayaFrameWidget):
         input_text = str(self.input_plugin_node_name.text()).strip()
 
         plugin_node_key = self.plugin_node_type_combo.currentText()
-        plugin_node_text = plugin_node_name_dictionary[plugin_node_key]
-
-        plugin_namespace = NodeWidget.get_plugin_node_namespace(plugin_node_key)
-
-        if not input_text:
+        if not input_text or plugin_node_key not in PLUGIN_CATALOG:
             self.plugin_node_display_example.setText('<font color=#646464>e.g.</font>')
             return
 
+        plugin_node_text = PLUGIN_CATALOG.suffix(plugin_node_key)
+        plugin_namespace = PLUGIN_CATALOG.namespace(plugin_node_key)
+
         self.plugin_node_display_example.setText(
             '<font color=#646464>e.g. {plugin}:{name}_{nodeType}</font>'.format(
                 plugin=plugin_namespace,  # change to plugin at later date
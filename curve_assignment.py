@@ -1,13 +1,25 @@
+import os
+import math
+import struct
 import maya.cmds as cmds
 # from pprint import pprint
 from functools import partial
+from maya.api import OpenMaya as om
 from PySide2 import QtWidgets, QtCore, QtGui
 from maya_tools import mayaFrameWidget
 from master_rigger import Splitter
 from master_rigger import basicTools as tool  # If possible, remove this
+from master_rigger import curve_transforms as pnt
+from master_rigger import shape_thumbnails
+from master_rigger.nameIndex import (NameIndex, SIDE_TOKENS, get_short_name,
+                                     mirror_name, parse_name)
 from master_rigger.data import curve_data
+from master_rigger.data import shape_library
 reload(tool)
+reload(pnt)
+reload(shape_thumbnails)
 reload(curve_data)
+reload(shape_library)
 
 
 curve_library = {
@@ -88,6 +100,15 @@ curve_library_bool = {
     'master_move': True,
 }
 
+# Curve data of each library shape, filled the first time a shape is used
+SHAPE_CACHE = {}
+
+# Shapes saved from the scene, the file is only read once a shape is needed
+SHAPE_LIBRARY = shape_library.ShapeLibrary()
+
+# Palette icons of the shapes, saved on disk by shape hash
+THUMBNAIL_CACHE = shape_thumbnails.ThumbnailCache()
+
 rgb_dictionary = {
     'red': [1, 0, 0],
     'pink': [1, .5, .5],
@@ -103,8 +124,147 @@ rgb_dictionary = {
 }
 
 
+def get_rgb_value(rgb_input):
+    """
+    Returns the [r, g, b] value of a color input.
+
+    Args:
+        rgb_input (str) or (list[float, float, float]): A key of
+            curve_data.RGB_ACTUALS or 3 float values in range 0 to 1.  Any
+            other value falls back to the color editor's current color.
+
+    """
+    if isinstance(rgb_input, (list, tuple)):
+        if len(rgb_input) != 3:
+            raise IndexError('Color value input list is not the proper size!  '
+                             'Input 3 floats between 0 and 1 to assign a '
+                             'color.')
+        return [float(value) for value in rgb_input]
+    elif rgb_input in curve_data.RGB_ACTUALS:
+        return list(curve_data.RGB_ACTUALS[rgb_input])
+    # This condition will only work when called directly, never when called
+    # from the add_curve_shape function
+    return cmds.colorEditor(query=True, rgb=True)
+
+
+def get_color_shapes(input_objects):
+    """
+    Returns the shapes colored for a list of nodes.  Shapes are kept as they
+    are, transforms give all of their shapes, accounting for multi-shape
+    controls.
+
+    Args:
+        input_objects (list[str]): Transform and/or shape nodes.
+
+    Returns:
+        (dict): Long name of each input node with the long names of its shapes.
+
+    """
+    long_names = cmds.ls(input_objects, long=True) if input_objects else []
+    shapes = set(cmds.ls(long_names, shapes=True, long=True) or []) \
+        if long_names else set()
+    transforms = [node for node in long_names if node not in shapes]
+
+    node_shapes = dict((node, [node]) for node in long_names if node in shapes)
+    for node in transforms:
+        node_shapes[node] = []
+    if transforms:
+        for shape in cmds.listRelatives(transforms, shapes=True,
+                                        fullPath=True) or []:
+            node_shapes[shape.rpartition('|')[0]].append(shape)
+    return node_shapes
+
+
+def _read_shape_colors(shapes):
+    """
+    Returns the overrideEnabled, overrideRGBColors and overrideColorRGB values
+    of shapes, read from their plugs through the API in one pass.
+    """
+    colors = {}
+    for shape in shapes:
+        if shape in colors:
+            continue
+        node_fn = om.MFnDependencyNode(
+            om.MSelectionList().add(shape).getDependNode(0))
+        rgb_plug = node_fn.findPlug('overrideColorRGB', False)
+        colors[shape] = (
+            node_fn.findPlug('overrideEnabled', False).asBool(),
+            node_fn.findPlug('overrideRGBColors', False).asBool(),
+            [rgb_plug.child(index).asDouble() for index in range(3)])
+    return colors
+
+
+def _color_matches(color, rgb, tolerance=1e-4):
+    enabled, rgb_colors, current = color
+    return enabled and rgb_colors and \
+        all(abs(a - b) < tolerance for a, b in zip(current, rgb))
+
+
+def set_control_colors(node_colors, name_index=None):
+    """
+    Sets the override color of many controls in one pass.  Shapes are resolved
+    once, their current colors are read once through the API, each color is
+    resolved once, and shapes that already show the right color are left
+    untouched.  The rest are set in one undo chunk.
+
+    Args:
+        node_colors (dict) or (list[tuple]): Node name with the color to give
+            it, as accepted by get_rgb_value().  Nodes can be transforms or
+            shapes.
+        name_index (NameIndex): Scene name index used to resolve the node names
+            to unambiguous long names.
+
+    Returns:
+        (list[str]): Long names of the shapes that were recolored.
+
+    """
+    if isinstance(node_colors, dict):
+        node_colors = list(node_colors.items())
+    if not node_colors:
+        return []
+
+    nodes = [node for node, _ in node_colors]
+    if name_index is not None:
+        nodes = name_index.long_names(nodes)
+    else:
+        nodes = [node if node.startswith('|') else cmds.ls(node, long=True)[0]
+                 for node in nodes]
+    node_shapes = get_color_shapes(nodes)
+
+    current_colors = _read_shape_colors(
+        [shape for shapes in node_shapes.values() for shape in shapes])
+
+    rgb_values = {}
+    shape_colors = []
+    for node, (_, rgb_input) in zip(nodes, node_colors):
+        color_key = tuple(rgb_input) if isinstance(rgb_input, (list, tuple)) \
+            else rgb_input
+        if color_key not in rgb_values:
+            rgb_values[color_key] = get_rgb_value(rgb_input)
+        rgb = rgb_values[color_key]
+
+        for shape in node_shapes.get(node, []):
+            if not _color_matches(current_colors[shape], rgb):
+                shape_colors.append((shape, rgb))
+
+    # Only the plugs that differ are set, in one undo chunk
+    cmds.undoInfo(openChunk=True)
+    try:
+        for shape, rgb in shape_colors:
+            enabled, rgb_colors, _ = current_colors[shape]
+            if not enabled:
+                cmds.setAttr(shape + '.overrideEnabled', 1)
+            if not rgb_colors:
+                cmds.setAttr(shape + '.overrideRGBColors', 1)
+            cmds.setAttr(shape + '.overrideColorRGB', *rgb)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    return [shape for shape, _ in shape_colors]
+
+
 # kwargs: input_object
-def set_control_color(rgb_input, input_object=None):
+def set_control_color(rgb_input, input_object=None, name_index=None):
     """
     Sets an override color value to an object or shape node for the purpose of
     distinctions of controls in a rig.
@@ -114,84 +274,323 @@ def set_control_color(rgb_input, input_object=None):
             set for a shape node.  If string, it must be compatible with the
             keys in rgb_dictionary.  If list, it must have 3 float values that
             correspond with the desired color values in range 0 to 1.
-        input_object (str): Object/Shape name that is being affected.  Shape
-            nodes will perform best.
+        input_object (str) or (list[str]): Objects/Shapes being affected.  If
+            nothing is given, every selected object is used.
+        name_index (NameIndex): Scene name index used to resolve input_object
+            to unambiguous long names without querying the scene.
+
+    Returns:
+        (list[str]): Long names of the shapes that were recolored.
 
     """
     if not input_object:
-        try:
-            obj = cmds.ls(selection=True)
-            if cmds.objectType(obj[0]) == 'nurbsCurve':
-                input_object = obj
-            else:
-                input_object = cmds.listRelatives(
-                    cmds.ls(selection=True, long=True)[0], shapes=True)
-        except TypeError:
+        input_object = cmds.ls(selection=True, long=True)
+        if not input_object:
             raise TypeError('Bad Selection!')
+    if not isinstance(input_object, (list, tuple)):
+        input_object = [input_object]
 
-    # setting the color value based on the passed argument
-    if isinstance(rgb_input, list):
-        if len(rgb_input) != 3:
-            cmds.IndexError('Color value input list is not the proper size!  '
-                            'Input 3 floats between 0 and 1 to assign a color.')
-            return
-        rgb = rgb_input
-    elif rgb_input in curve_data.RGB_ACTUALS:
-        rgb = curve_data.RGB_ACTUALS[rgb_input]
-    else:
-        # This condition will only work when called directly, never when called
-        # from the add_curve_shape function
-        rgb = cmds.colorEditor(query=True, rgb=True)
+    rgb = get_rgb_value(rgb_input)
+    return set_control_colors([(node, rgb) for node in input_object],
+                              name_index=name_index)
 
-    if isinstance(input_object, list):
-        for shape in input_object:
-            if cmds.objectType(shape) == 'nurbsCurve':
-                cmds.setAttr(shape + '.overrideEnabled', 1)
-                cmds.setAttr(shape + '.overrideRGBColors', 1)
-                cmds.setAttr(shape + '.overrideColorR', rgb[0])
-                cmds.setAttr(shape + '.overrideColorG', rgb[1])
-                cmds.setAttr(shape + '.overrideColorB', rgb[2])
-            else:
-                # Only work on shape nodes, and account for multi-shape controls
-                shapeNodes = cmds.listRelatives(cmds.ls(selection=True)[0], shapes=True, fullPath=True)
-                if shapeNodes is None:
-                    return
-                for shape in shapeNodes:
-                    cmds.setAttr(shape + '.overrideEnabled', 1)
-                    cmds.setAttr(shape + '.overrideRGBColors', 1)
-                    cmds.setAttr(shape + '.overrideColorR', rgb[0])
-                    cmds.setAttr(shape + '.overrideColorG', rgb[1])
-                    cmds.setAttr(shape + '.overrideColorB', rgb[2])
 
-    else:
-        if cmds.objectType(input_object) == 'nurbsCurve':
-                cmds.setAttr(input_object + '.overrideEnabled', 1)
-                cmds.setAttr(input_object + '.overrideRGBColors', 1)
-                cmds.setAttr(input_object + '.overrideColorR', rgb[0])
-                cmds.setAttr(input_object + '.overrideColorG', rgb[1])
-                cmds.setAttr(input_object + '.overrideColorB', rgb[2])
-        else:
-            # Only work on shape nodes, and account for multi-shape controls
-            shapeNodes = cmds.listRelatives(input_object, shapes=True, fullPath=True)
-            if shapeNodes is None:
-                return
-            for shape in shapeNodes:
-                cmds.setAttr(shape + '.overrideEnabled', 1)
-                cmds.setAttr(shape + '.overrideRGBColors', 1)
-                cmds.setAttr(shape + '.overrideColorR', rgb[0])
-                cmds.setAttr(shape + '.overrideColorG', rgb[1])
-                cmds.setAttr(shape + '.overrideColorB', rgb[2])
+def read_curve_data(curve_shape):
+    """
+    Reads the data needed to rebuild a nurbsCurve shape.
+
+    Args:
+        curve_shape (str): The nurbsCurve shape node to read.
+
+    Returns:
+        (dict): degree, form (as used by the nurbsCurve .cc attribute), knots
+            and object space points of the curve.
+
+    """
+    dag_path = om.MSelectionList().add(curve_shape).getDagPath(0)
+    curve_fn = om.MFnNurbsCurve(dag_path)
+    return {
+        'degree': curve_fn.degree,
+        # API forms start at 1 (kOpen), the curve attribute starts at 0
+        'form': curve_fn.form - 1,
+        'knots': list(curve_fn.knots()),
+        'points': [(point.x, point.y, point.z)
+                   for point in curve_fn.cvPositions()]
+    }
+
+
+def set_curve_points(curve_shape, points, world_space=False):
+    """
+    Writes every point of a curve shape in one setAttr.  Unlike
+    MFnNurbsCurve.setCVPositions(), the edit goes through the undo queue.
+
+    Args:
+        curve_shape (str): The nurbsCurve shape node.
+        points (list[list[float, float, float]]): One position per CV, in
+            the order of the curve's controlPoints.
+        world_space (bool): The points are world space positions, converted
+            to object space before being set.
+
+    """
+    if world_space:
+        inverse_matrix = om.MMatrix(
+            cmds.getAttr(curve_shape + '.worldInverseMatrix[0]'))
+        points = [om.MPoint(*point[:3]) * inverse_matrix for point in points]
+        points = [(point.x, point.y, point.z) for point in points]
+
+    values = [value for point in points for value in point[:3]]
+    cmds.setAttr('{}.controlPoints[0:{}]'.format(curve_shape, len(points) - 1),
+                 *values)
+
+
+def get_shape_data(shape_choice):
+    """
+    Returns the curve data of a library shape, built and read back from the
+    scene only the first time the shape is asked for.  Shapes that are not in
+    curve_library are read from SHAPE_LIBRARY, with their default offset
+    baked in.
+
+    Args:
+        shape_choice (str): A shape in curve_library or SHAPE_LIBRARY.
+
+    Returns:
+        (list[dict]): The read_curve_data() of every curve making the shape.
+
+    """
+    if shape_choice in SHAPE_CACHE:
+        return SHAPE_CACHE[shape_choice]
+
+    if shape_choice not in curve_library:
+        if shape_choice not in SHAPE_LIBRARY:
+            raise KeyError('"{}" is not a shape in the curve library.'.format(
+                shape_choice))
+        library_shape = SHAPE_LIBRARY.get(shape_choice)
+        SHAPE_CACHE[shape_choice] = [
+            dict(curve, points=pnt.to_point_list(pnt.transform_points(
+                curve['points'], rotation=library_shape['offset'])))
+            for curve in library_shape['curves']]
+        return SHAPE_CACHE[shape_choice]
+
+    curve_transform = curve_library[shape_choice]()
+    curve_shapes = cmds.listRelatives(curve_transform, shapes=True,
+                                      fullPath=True)
+    if curve_library_bool[shape_choice]:
+        cmds.closeCurve(curve_shapes, ch=0, replaceOriginal=1)
+        curve_shapes = cmds.listRelatives(curve_transform, shapes=True,
+                                          fullPath=True)
+
+    SHAPE_CACHE[shape_choice] = [read_curve_data(shape)
+                                 for shape in curve_shapes]
+    cmds.delete(curve_transform)
+    return SHAPE_CACHE[shape_choice]
+
+
+def get_shape_names():
+    """
+    Returns every shape add_curve_shape() can build, built in shapes first.
+    """
+    return sorted(curve_library) + [name for name in SHAPE_LIBRARY.names()
+                                    if name not in curve_library]
+
+
+def get_shape_hash(shape_choice):
+    """
+    Returns a hash of the curves a shape's thumbnail is drawn from (see
+    get_thumbnail_curves()), that changes whenever the drawing does.  Built
+    in shapes hash their points or outlines, library shapes hash their record
+    in SHAPE_LIBRARY.  Neither builds anything in the scene.
+    """
+    if shape_choice in curve_library:
+        curves = [(curve['form'], [tuple(point) for point in curve['points']])
+                  for curve in get_thumbnail_curves(shape_choice)]
+        return shape_thumbnails.shape_hash(repr(curves).encode('utf-8'))
+    return shape_thumbnails.shape_hash(SHAPE_LIBRARY.record(shape_choice))
+
+
+def _ring_points(sections, normal='y', radius=1.0):
+    """
+    Returns the points around a circle, in the plane normal to an axis.
+    """
+    points = []
+    for section in range(sections):
+        angle = 2 * math.pi * section / sections
+        a, b = radius * math.cos(angle), radius * math.sin(angle)
+        points.append({'x': (0, a, b), 'y': (a, 0, b), 'z': (a, b, 0)}[normal])
+    return points
+
+
+def _rounded_square_points(corner=0.5, corner_sections=4):
+    """
+    Returns the outline of a square with rounded corners in the XZ plane.
+    """
+    points = []
+    for corner_index, (x, z) in enumerate(((1, 1), (-1, 1), (-1, -1),
+                                           (1, -1))):
+        for section in range(corner_sections + 1):
+            angle = math.pi / 2 * (corner_index + float(section) /
+                                   corner_sections)
+            points.append((x * (1 - corner) + corner * math.cos(angle), 0,
+                           z * (1 - corner) + corner * math.sin(angle)))
+    return points
+
+
+# Outlines of the built in shapes that are made by commands rather than from
+# CURVE_POINTS, only used to draw their thumbnails
+THUMBNAIL_OUTLINES = {
+    'circle': lambda: [_ring_points(16)],
+    'octagon': lambda: [_ring_points(8)],
+    'sphere': lambda: [_ring_points(16, normal) for normal in 'yxz'],
+    'rounded_square': lambda: [_rounded_square_points()]
+}
+
+
+def get_thumbnail_curves(shape_choice):
+    """
+    Returns curve data to draw a shape's thumbnail with, without building
+    anything in the scene.  Built in shapes are drawn from their points in
+    curve_data (or an outline of the shape for circle based shapes), library
+    shapes from SHAPE_LIBRARY.
+
+    Returns:
+        (list[dict]): form and points of every curve of the shape.
+
+    """
+    if shape_choice not in curve_library:
+        return get_shape_data(shape_choice)
+
+    if shape_choice in THUMBNAIL_OUTLINES:
+        return [{'form': 2, 'points': points}
+                for points in THUMBNAIL_OUTLINES[shape_choice]()]
+
+    return [{'form': int(curve_library_bool[shape_choice]),
+             'points': curve_data.CURVE_POINTS[shape_choice]}]
+
+
+def get_shape_thumbnail(shape_choice):
+    """
+    Returns the palette icon of a shape from THUMBNAIL_CACHE.  The curves are
+    only read when the icon has to be rendered, and never from the scene.
+
+    Returns:
+        (QtGui.QPixmap): The thumbnail.
+
+    """
+    return THUMBNAIL_CACHE.get(get_shape_hash(shape_choice),
+                               partial(get_thumbnail_curves, shape_choice))
+
+
+def save_library_shape(name, transform_node=None, offset=(0, 0, 0)):
+    """
+    Saves the curve shapes of a control into SHAPE_LIBRARY so it can be built
+    with add_curve_shape() like any other shape.
+
+    Args:
+        name (str): Name to save the shape as.  Built in shape names cannot be
+            used.
+        transform_node (str): The control to read.  Selection if not given.
+        offset (list[float, float, float]): Default rotation offset applied
+            when the shape is built.
+
+    """
+    if name in curve_library:
+        raise NameError('"{}" is a built in shape name.'.format(name))
+
+    if not transform_node:
+        selection = cmds.ls(selection=True, long=True)
+        if not selection:
+            raise TypeError('Bad Selection!')
+        transform_node = selection[0]
+
+    curve_shapes = cmds.listRelatives(transform_node, shapes=True,
+                                      fullPath=True, type='nurbsCurve')
+    if not curve_shapes:
+        raise TypeError('{} has no curve shapes to save.'.format(
+            transform_node))
+
+    SHAPE_LIBRARY.save(name, [read_curve_data(shape) for shape in curve_shapes],
+                       offset=offset)
+    SHAPE_CACHE.pop(name, None)
+
+
+def create_curve_shape(shape_data, transform_node, shape_offset=None,
+                       scale=None):
+    """
+    Creates a nurbsCurve shape directly under a transform from curve data.
+
+    Args:
+        shape_data (dict): Curve data as returned by read_curve_data().
+        transform_node (str): Transform receiving the shape.
+        shape_offset (list[float, float, float]): Rotation baked into the
+            points.
+        scale (list[float, float, float]): Scale baked into the points after
+            the rotation.
+
+    Returns:
+        (str): Long name of the new shape.
+
+    """
+    transform_node = cmds.ls(transform_node, long=True)[0]
+    points = pnt.to_point_list(pnt.transform_points(
+        shape_data['points'], rotation=shape_offset, scale=scale))
+
+    shape = cmds.createNode('nurbsCurve',
+                            name=transform_node.rsplit('|', 1)[-1] + 'Shape',
+                            parent=transform_node)
+    shape = '{}|{}'.format(transform_node, shape)
+
+    cmds.setAttr(shape + '.cc',
+                 shape_data['degree'],
+                 len(points) - shape_data['degree'],
+                 shape_data['form'],
+                 False,
+                 3,
+                 tuple(shape_data['knots']),
+                 len(points),
+                 *points,
+                 type='nurbsCurve')
+    return shape
+
+
+def instance_curve_shape(source_node, transform_node):
+    """
+    Parents an instance of the curve shapes of a control under another
+    transform.  The instances share their points with the source shapes.
+
+    Args:
+        source_node (str): A control, or one of its curve shapes.
+        transform_node (str): Transform receiving the instanced shapes.
+
+    Returns:
+        (list[str]): Long names of the instanced shapes under transform_node.
+
+    """
+    source_shapes = cmds.ls(source_node, shapes=True, long=True) or \
+        cmds.listRelatives(source_node, shapes=True, type='nurbsCurve',
+                           fullPath=True, noIntermediate=True)
+    if not source_shapes:
+        raise TypeError('{} has no curve shapes to instance.'.format(
+            source_node))
+
+    transform_node = cmds.ls(transform_node, long=True)[0]
+    cmds.parent(source_shapes, transform_node, addObject=True, shape=True)
+    return ['{}|{}'.format(transform_node, shape.rsplit('|', 1)[-1])
+            for shape in source_shapes]
 
 
 # TODO: Kwargs: transform_node?, color, off_color, shape_offset
 def add_curve_shape(shape_choice, transform_node=None, color=None,
-                    off_color=False, shape_offset=(0, 0, 0), **kwargs):
+                    off_color=False, shape_offset=(0, 0, 0), scale=None,
+                    instance_of=None, **kwargs):
     """
     Creates a shape node that is input into a transform node.  This will turn a
     transform node into a control shape, allowing for more flexibility in
     building rigging systems that want interchangeable control shape types.
     Shapes may also be assigned a color, to add more distinct appearance.
 
+    Library shapes are read once into SHAPE_CACHE, after which each control is
+    made by creating its shape directly under the transform with the offset
+    and scale already baked into the points.
+
     Args:
         shape_choice (str): Assigns the shape type for the control.  Availble
             shapes are in the dictionaries listed in the function file.
@@ -209,6 +608,18 @@ def add_curve_shape(shape_choice, transform_node=None, color=None,
         shape_offset (list[float, float, float]): Assign rotation values for the
             shape to offset its visual direction.  Will have no effect on the
             transform values, only visual feedback of the shape.
+        scale (list[float, float, float]): Scale of the shape, applied after the
+            shape_offset.  Will have no effect on the transform values.
+        instance_of (str): A control, or curve shape, made earlier.  Instead
+            of building new curves, its shapes are instanced under
+            transform_node, so repeated controls share one set of points and
+            restyling one restyles all of them.  shape_choice, color,
+            shape_offset and scale are then ignored, the instances show the
+            shape and color of the original.
+
+    Returns:
+        (str): Long name of the new shape node.  Shapes made of several curves
+            return their first shape.
 
     """
     # curve library calling
@@ -221,12 +632,12 @@ def add_curve_shape(shape_choice, transform_node=None, color=None,
         name = kwargs.get('name') or shape_choice
         transform_node = cmds.createNode('transform', name=name)
 
-    curve_transform = curve_library[shape_choice]()
-    curve_shape = cmds.listRelatives(curve_transform, shapes=True)
-    if curve_library_bool[shape_choice]:
-        cmds.closeCurve(curve_shape, ch=0, replaceOriginal=1)
-    cmds.parent(curve_shape, transform_node, shape=True, r=True)
-    cmds.delete(curve_transform)
+    if instance_of:
+        return instance_curve_shape(instance_of, transform_node)[0]
+
+    curve_shape = [create_curve_shape(shape_data, transform_node,
+                                      shape_offset=shape_offset, scale=scale)
+                   for shape_data in get_shape_data(shape_choice)]
 
     # Curve color operations
     if color:
@@ -248,13 +659,8 @@ def add_curve_shape(shape_choice, transform_node=None, color=None,
                          'value.  Please input one of the appropriate strings '
                          'mentioned in the "help" function, or input a color '
                          'value list like so: [float, float, float].')
-            return
 
-    if shape_offset != [0, 0, 0]:
-        cmds.xform(transform_node + '.cv[0:]', rotation=shape_offset)
-
-    shape_name = cmds.rename(curve_shape, transform_node + 'Shape')
-    return shape_name
+    return curve_shape[0]
 
 
 def normalize_ctrl_scale(input_object=None):
@@ -274,18 +680,352 @@ def normalize_ctrl_scale(input_object=None):
     """
     if not input_object:
         input_object = cmds.ls(selection=True)
-    if input_object is list and len(input_object) > 1:
+    if not isinstance(input_object, list):
+        input_object = [input_object]
+
+    # One undo step puts back both the transform scale and the points
+    cmds.undoInfo(openChunk=True)
+    try:
         for ctrl in input_object:
-            ctrl_scale = cmds.xform(ctrl, query=True, scale=True, relative=True)
+            ctrl_scale = cmds.xform(ctrl, query=True, scale=True,
+                                    relative=True)
             cmds.xform(ctrl, scale=[1, 1, 1])
-            cmds.xform(ctrl + '.cv[0:]', scale=ctrl_scale)
+            for shape in cmds.listRelatives(ctrl, shapes=True, fullPath=True,
+                                            type='nurbsCurve') or []:
+                scale_curve_points(shape, ctrl_scale)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+
+def scale_curve_points(curve_shape, scale):
+    """
+    Scales the points of a curve shape in object space, written back in one
+    undoable set.
+
+    Args:
+        curve_shape (str): The nurbsCurve shape node.
+        scale (list[float, float, float]) or (float): The scale to apply.
+
+    """
+    dag_path = om.MSelectionList().add(curve_shape).getDagPath(0)
+    curve_fn = om.MFnNurbsCurve(dag_path)
+    points = pnt.transform_points(
+        [(point.x, point.y, point.z) for point in curve_fn.cvPositions()],
+        scale=scale)
+    set_curve_points(curve_shape, pnt.to_point_list(points))
+
+
+def mirror_control_shapes(root=None, axis='x', source_side='L',
+                          name_index=None):
+    """
+    Mirrors control shapes from one side of a rig to the other.  Controls are
+    paired through their side token (see nameIndex.mirror_name()), namespaces
+    of referenced rigs being ignored when the side is read, the world
+    space points of each source shape are reflected across the plane normal
+    to axis in one matrix multiply and written to its counterpart in one
+    undoable set.
+
+    Args:
+        root (str): Top node of the rig, every control under it is mirrored.
+            The selected controls are mirrored if not given.
+        axis (str): Axis normal to the mirror plane.  ('x' mirrors across YZ)
+        source_side (str): Side copied from, any spelling in SIDE_TOKENS.
+        name_index (NameIndex): Scene name index used to find the counterpart
+            shapes.  Built from the rig (or the scene) if not given.
+
+    Returns:
+        (list[str]): Long names of the shapes that were mirrored onto.
+
+    """
+    if root:
+        curve_shapes = cmds.listRelatives(root, allDescendents=True,
+                                          type='nurbsCurve', fullPath=True,
+                                          noIntermediate=True) or []
     else:
-        ctrl_scale = cmds.xform(input_object,
-                                query=True,
-                                scale=True,
-                                relative=True)
-        cmds.xform(input_object, scale=[1, 1, 1])
-        cmds.xform(input_object + '.cv[0:]', scale=ctrl_scale)
+        selection = cmds.ls(selection=True, long=True)
+        if not selection:
+            raise TypeError('Bad Selection!')
+        curve_shapes = cmds.listRelatives(selection, shapes=True,
+                                          type='nurbsCurve', fullPath=True,
+                                          noIntermediate=True) or []
+    if name_index is None:
+        name_index = NameIndex(curve_shapes if root else None)
+
+    source_side = SIDE_TOKENS.get(source_side, source_side)
+    matrix = pnt.mirror_matrix(axis)
+
+    # Every shape is read before any is written, then written in one undo
+    # chunk so undo never leaves a rig half mirrored
+    mirrored = []
+    mirrored_points = []
+    for shape in curve_shapes:
+        control = shape.rpartition('|')[0]
+        if parse_name(control).side != source_side:
+            continue
+
+        target = mirror_name(shape)
+        if target is None or not name_index.exists(target):
+            # Counterpart is under a differently named hierarchy
+            target = mirror_name(get_short_name(shape))
+            if target is None or not name_index.is_unique(target):
+                cmds.warning('No counterpart found for {}.'.format(shape))
+                continue
+            target = name_index.long_name(target)
+
+        source_fn = om.MFnNurbsCurve(
+            om.MSelectionList().add(shape).getDagPath(0))
+        target_fn = om.MFnNurbsCurve(
+            om.MSelectionList().add(target).getDagPath(0))
+        if source_fn.numCVs != target_fn.numCVs:
+            cmds.warning('{} and {} do not have the same number of points.'
+                         .format(shape, target))
+            continue
+
+        points = pnt.as_points(
+            [(point.x, point.y, point.z)
+             for point in source_fn.cvPositions(om.MSpace.kWorld)]).dot(matrix)
+        mirrored.append(target)
+        mirrored_points.append(points.tolist())
+
+    cmds.undoInfo(openChunk=True)
+    try:
+        for target, points in zip(mirrored, mirrored_points):
+            set_curve_points(target, points, world_space=True)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    return mirrored
+
+
+# Control shape snapshots --------------------------------------------------- #
+# A snapshot file is a header followed by one record per curve shape:
+#     shape:       a shape_library record named by the shape path under the
+#                  rig root, holding its one curve
+#     color:       overrideEnabled, overrideRGBColors, overrideColor (uint8),
+#                  overrideColorRGB (3 float32)
+#     visibility:  name length (uint16), source plug of the shape's visibility
+#                  (utf-8, empty if not connected)
+SNAPSHOT_MAGIC = b'MRCS'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_COLOR = struct.Struct('<BBB3f')
+
+
+def _strip_namespaces(path):
+    return '|'.join(token.rsplit(':', 1)[-1] for token in path.split('|'))
+
+
+def _snapshot_key(node, root):
+    """
+    Returns the path of a node under root without namespaces, so snapshots
+    taken from a referenced rig apply to the rig file and back.  Nodes outside
+    of root keep their own name.
+    """
+    if node.startswith(root + '|'):
+        return _strip_namespaces(node[len(root) + 1:])
+    return _strip_namespaces(node).lstrip('|')
+
+
+def _rig_nodes(root):
+    """
+    Reads the hierarchy of a rig in one traversal.
+
+    Returns:
+        (str): Long name of the root.
+        (dict): Snapshot key of every node under the root, to its long name.
+        (list[str]): Long names of the curve shapes under the root.
+
+    """
+    root = cmds.ls(root, long=True)[0]
+    nodes = cmds.listRelatives(root, allDescendents=True, fullPath=True) or []
+    curve_shapes = cmds.ls(nodes, type='nurbsCurve', noIntermediate=True,
+                           long=True) or []
+    return root, dict((_snapshot_key(node, root), node) for node in nodes), \
+        curve_shapes
+
+
+def export_control_shapes(root, file_path):
+    """
+    Saves the curve points, override colors and visibility connections of
+    every control shape of a rig to a binary snapshot file, so shapes edited
+    on one version of a rig can be restored on a rebuilt one.
+
+    Args:
+        root (str): Top node of the rig.
+        file_path (str): Path of the snapshot file to write.
+
+    Returns:
+        (int): Number of shapes saved.
+
+    """
+    root, _, curve_shapes = _rig_nodes(root)
+
+    records = []
+    for shape in curve_shapes:
+        color = SNAPSHOT_COLOR.pack(
+            cmds.getAttr(shape + '.overrideEnabled'),
+            cmds.getAttr(shape + '.overrideRGBColors'),
+            cmds.getAttr(shape + '.overrideColor'),
+            *cmds.getAttr(shape + '.overrideColorRGB')[0])
+
+        visibility_source = ''
+        sources = cmds.listConnections(shape + '.visibility', source=True,
+                                       destination=False, plugs=True,
+                                       skipConversionNodes=True)
+        if sources:
+            source_node, source_attr = sources[0].split('.', 1)
+            source_node = (cmds.ls(source_node, long=True) or [source_node])[0]
+            visibility_source = '{}.{}'.format(
+                _snapshot_key(source_node, root), source_attr)
+        visibility_source = visibility_source.encode('utf-8')
+
+        records.append(b''.join([
+            shape_library.pack_shape(_snapshot_key(shape, root),
+                                     [read_curve_data(shape)]),
+            color,
+            shape_library.NAME_LENGTH.pack(len(visibility_source)),
+            visibility_source]))
+
+    directory = os.path.dirname(file_path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(file_path, 'wb') as snapshot_file:
+        snapshot_file.write(shape_library.FILE_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(records)))
+        for record in records:
+            snapshot_file.write(record)
+
+    return len(records)
+
+
+def read_control_shapes(file_path):
+    """
+    Reads a snapshot file written by export_control_shapes().
+
+    Returns:
+        (list[dict]): 'key', 'curve', 'color' and 'visibility' of each shape.
+
+    """
+    with open(file_path, 'rb') as snapshot_file:
+        buffer = snapshot_file.read()
+
+    magic, version, shape_count = shape_library.FILE_HEADER.unpack_from(
+        buffer, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise IOError('{} is not a control shape snapshot.'.format(file_path))
+    if version > SNAPSHOT_VERSION:
+        raise IOError('{} was saved with a newer snapshot version ({}).'.format(
+            file_path, version))
+
+    snapshot = []
+    position = shape_library.FILE_HEADER.size
+    for _ in range(shape_count):
+        key, shape, position = shape_library.unpack_shape(buffer, position)
+        color = SNAPSHOT_COLOR.unpack_from(buffer, position)
+        position += SNAPSHOT_COLOR.size
+        source_length = shape_library.NAME_LENGTH.unpack_from(buffer,
+                                                              position)[0]
+        position += shape_library.NAME_LENGTH.size
+        visibility_source = buffer[position:position + source_length]
+        position += source_length
+
+        snapshot.append({
+            'key': key,
+            'curve': shape['curves'][0],
+            'color': color,
+            'visibility': visibility_source.decode('utf-8')
+        })
+    return snapshot
+
+
+def _set_curve(curve_shape, curve):
+    """
+    Writes snapshot curve data onto a shape.  Matching curves get all their
+    points in one set, curves that were rebuilt with a different point count
+    get their whole curve data replaced.  Both can be undone.
+    """
+    dag_path = om.MSelectionList().add(curve_shape).getDagPath(0)
+    curve_fn = om.MFnNurbsCurve(dag_path)
+    points = curve['points']
+
+    if curve_fn.numCVs == len(points) and curve_fn.degree == curve['degree']:
+        set_curve_points(curve_shape, points)
+        return
+
+    cmds.setAttr(curve_shape + '.cc',
+                 curve['degree'],
+                 len(points) - curve['degree'],
+                 curve['form'],
+                 False,
+                 3,
+                 tuple(curve['knots']),
+                 len(points),
+                 *points,
+                 type='nurbsCurve')
+
+
+def import_control_shapes(root, file_path):
+    """
+    Restores a snapshot saved by export_control_shapes() onto a rig.  Shapes
+    are matched by their path under the root, ignoring namespaces, so the
+    rig is read once and every shape is written without further lookups.
+
+    Args:
+        root (str): Top node of the rig.
+        file_path (str): Path of the snapshot file.
+
+    Returns:
+        (list[str]): Snapshot keys of the shapes that were not found in the
+            rig.
+
+    """
+    snapshot = read_control_shapes(file_path)
+    root, rig_nodes, _ = _rig_nodes(root)
+    namespace = root.rsplit('|', 1)[-1].rpartition(':')[0]
+
+    missing = []
+    rgb_colors = []
+    cmds.undoInfo(openChunk=True)
+    try:
+        for record in snapshot:
+            shape = rig_nodes.get(record['key'])
+            if shape is None:
+                missing.append(record['key'])
+                continue
+
+            _set_curve(shape, record['curve'])
+
+            enabled, rgb_mode, color_index = record['color'][:3]
+            if enabled and rgb_mode:
+                rgb_colors.append((shape, record['color'][3:]))
+            else:
+                cmds.setAttr(shape + '.overrideEnabled', enabled)
+                cmds.setAttr(shape + '.overrideRGBColors', rgb_mode)
+                cmds.setAttr(shape + '.overrideColor', color_index)
+
+            if not record['visibility']:
+                continue
+            source_key, source_attr = record['visibility'].split('.', 1)
+            source_node = rig_nodes.get(source_key)
+            if source_node is None:
+                source_node = ':'.join([namespace, source_key]) if namespace \
+                    else source_key
+                if not cmds.objExists(source_node):
+                    cmds.warning('Visibility source {} of {} was not found.'
+                                 .format(record['visibility'], shape))
+                    continue
+            source_plug = '{}.{}'.format(source_node, source_attr)
+            if not cmds.isConnected(source_plug, shape + '.visibility'):
+                cmds.connectAttr(source_plug, shape + '.visibility',
+                                 force=True)
+
+        set_control_colors(rgb_colors)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    if missing:
+        cmds.warning('{} control shapes of the snapshot were not found under '
+                     '{}.'.format(len(missing), root))
+    return missing
 
 
 class ControlCurveWidget(mayaFrameWidget.MayaFrameWidget):
@@ -367,11 +1107,18 @@ class ControlCurveWidget(mayaFrameWidget.MayaFrameWidget):
         # Shape type selection
         shape_type_label = QtWidgets.QLabel('Shape Type:')
         self.shape_type_combo = QtWidgets.QComboBox()
-        for shape in sorted(curve_library.keys()):
-            self.shape_type_combo.addItem(shape)
+        self.shape_type_combo.setIconSize(QtCore.QSize(
+            THUMBNAIL_CACHE.size, THUMBNAIL_CACHE.size))
+        for shape in get_shape_names():
+            self.shape_type_combo.addItem(
+                QtGui.QIcon(get_shape_thumbnail(shape)), shape)
+        self.save_shape_button = QtWidgets.QPushButton('Save Shape')
+        self.mirror_shape_button = QtWidgets.QPushButton('Mirror L > R')
 
         shape_selection_layout.addWidget(shape_type_label)
         shape_selection_layout.addWidget(self.shape_type_combo)
+        shape_selection_layout.addWidget(self.save_shape_button)
+        shape_selection_layout.addWidget(self.mirror_shape_button)
 
         # Offset Hierarchy options
         self.offset_frame = mayaFrameWidget.MayaFrameWidget()
@@ -462,6 +1209,8 @@ class ControlCurveWidget(mayaFrameWidget.MayaFrameWidget):
         self.color_preset_combo.currentIndexChanged.connect(
             self.set_preset_color)
         self.set_color_button.clicked.connect(self.set_control_color)
+        self.save_shape_button.clicked.connect(self.save_shape)
+        self.mirror_shape_button.clicked.connect(self.mirror_shapes)
 
         self.create_control_button.clicked.connect(
             partial(self.create_control, False))
@@ -494,9 +1243,41 @@ class ControlCurveWidget(mayaFrameWidget.MayaFrameWidget):
             self.current_assign_color = curve_data.RGB_ACTUALS[preset_color]
 
     def set_control_color(self):
-        nodes = cmds.ls(selection=True)
-        for node in nodes:
-            set_control_color(rgb_input=self.current_assign_color, input_object=node)
+        nodes = cmds.ls(selection=True, long=True)
+        if nodes:
+            set_control_color(rgb_input=self.current_assign_color, input_object=nodes)
+
+    def save_shape(self):
+        selected = cmds.ls(selection=True, long=True)
+        if not selected:
+            cmds.warning('Select a control to save its shape.')
+            return
+
+        name, accepted = QtWidgets.QInputDialog.getText(
+            self, 'Save Shape', 'Shape Name:')
+        name = str(name).strip()
+        if not accepted or not name:
+            return
+
+        save_library_shape(name, transform_node=selected[0])
+        icon = QtGui.QIcon(get_shape_thumbnail(name))
+        if self.shape_type_combo.findText(name) == -1:
+            self.shape_type_combo.addItem(icon, name)
+        else:
+            self.shape_type_combo.setItemIcon(
+                self.shape_type_combo.findText(name), icon)
+        self.shape_type_combo.setCurrentIndex(
+            self.shape_type_combo.findText(name))
+
+    def mirror_shapes(self):
+        if not cmds.ls(selection=True):
+            cmds.warning('Select the left side controls to mirror.')
+            return
+        cmds.undoInfo(openChunk=True)
+        try:
+            mirror_control_shapes()
+        finally:
+            cmds.undoInfo(closeChunk=True)
 
     def _force_button_update(self, color):
         self.color_option_button.setStyleSheet(
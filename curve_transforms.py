@@ -0,0 +1,97 @@
+"""
+Point transforms for control shapes.  Curve points are handled as (N, 3)
+arrays and rotated, scaled or mirrored with a single matrix multiply, so a
+control's final points can be written in one go instead of being adjusted
+with xform afterwards.
+
+Points are row vectors, matrices are applied as points.dot(matrix) the same
+way Maya multiplies points by matrices.
+"""
+import numpy as np
+
+AXIS_INDEX = {'x': 0, 'y': 1, 'z': 2}
+
+
+def as_points(points):
+    """
+    Returns the points as an (N, 3) float array.
+    """
+    return np.asarray(points, dtype=float).reshape(-1, 3)
+
+
+def rotation_matrix(rotation):
+    """
+    Returns the 3x3 matrix of an xyz rotation order rotation.
+
+    Args:
+        rotation (list[float, float, float]): Rotation in degrees.
+
+    """
+    rx, ry, rz = np.radians(rotation)
+    cx, sx = np.cos(rx), np.sin(rx)
+    cy, sy = np.cos(ry), np.sin(ry)
+    cz, sz = np.cos(rz), np.sin(rz)
+
+    x_matrix = np.array([[1, 0, 0], [0, cx, sx], [0, -sx, cx]])
+    y_matrix = np.array([[cy, 0, -sy], [0, 1, 0], [sy, 0, cy]])
+    z_matrix = np.array([[cz, sz, 0], [-sz, cz, 0], [0, 0, 1]])
+    return x_matrix.dot(y_matrix).dot(z_matrix)
+
+
+def scale_matrix(scale):
+    """
+    Returns the 3x3 matrix of a scale.  A single number scales uniformly.
+    """
+    if np.isscalar(scale):
+        scale = (scale, scale, scale)
+    return np.diag(np.asarray(scale, dtype=float))
+
+
+def mirror_matrix(axis='x'):
+    """
+    Returns the 3x3 matrix reflecting points across the plane normal to axis.
+    (ex. 'x' mirrors across the YZ plane)
+    """
+    matrix = np.identity(3)
+    matrix[AXIS_INDEX[axis.lower()], AXIS_INDEX[axis.lower()]] = -1
+    return matrix
+
+
+def points_matrix(rotation=None, scale=None, mirror=None):
+    """
+    Returns the single 3x3 matrix applying a rotation, then a scale, then a
+    mirror.  Arguments match transform_points().
+    """
+    matrix = np.identity(3)
+    if rotation is not None and any(rotation):
+        matrix = matrix.dot(rotation_matrix(rotation))
+    if scale is not None:
+        matrix = matrix.dot(scale_matrix(scale))
+    if mirror:
+        matrix = matrix.dot(mirror_matrix(mirror))
+    return matrix
+
+
+def transform_points(points, rotation=None, scale=None, mirror=None):
+    """
+    Rotates, scales and mirrors points in one matrix multiply.
+
+    Args:
+        points (list[list[float, float, float]]) or (np.ndarray): The points.
+        rotation (list[float, float, float]): Rotation in degrees, xyz order.
+        scale (list[float, float, float]) or (float): Scale applied after the
+            rotation.
+        mirror (str): Axis to mirror across after rotating and scaling.
+
+    Returns:
+        (np.ndarray): The (N, 3) transformed points.
+
+    """
+    return as_points(points).dot(points_matrix(rotation, scale, mirror))
+
+
+def to_point_list(points):
+    """
+    Returns the points as a list of (x, y, z) tuples for maya commands.
+    """
+    return [tuple(point) for point in as_points(points).tolist()]
@@ -9,6 +9,7 @@ NODE_DICTIONARY = {
     'BLC': partial(pm.createNode, 'blendColors'),
     'BTA': partial(pm.createNode, 'blendTwoAttr'),
     'CFME': partial(pm.createNode, 'curveFromMeshEdge'),
+    'CHC': partial(pm.createNode, 'choice'),
     'CLMP': partial(pm.createNode, 'clamp'),
     'CMPM': partial(pm.createNode, 'composeMatrix'),
     'CND': partial(pm.createNode, 'condition'),
@@ -44,7 +45,7 @@ MATH_NODE_DICTIONARY = {
     "AddInt": "intADD",
     "AddVector": "vecADD",
     "AndBool": "AND",
-    "AndInt": "None",
+    "AndInt": None,
     "AngleBetweenVectors": "angBTWN",
     "Asin": "ASIN",
     "Atan": "ATAN",
@@ -56,26 +57,26 @@ MATH_NODE_DICTIONARY = {
     "AverageQuaternion": "quatAVG",
     "AverageRotation": "rotAVG",
     "AverageVector": "vecAVG",
-    "AxisFromMatrix": "None",
+    "AxisFromMatrix": None,
     "Ceil": "CEIL",
     "CeilAngle": "angCEIL",
     "Clamp": "CLMP",
     "ClampAngle": "angCLMP",
     "ClampInt": "intCLMP",
-    "Compare": "None",
-    "CompareAngle": "None",
-    "CompareInt": "None",
+    "Compare": None,
+    "CompareAngle": None,
+    "CompareInt": None,
     "CosAngle": "COS",
     "CrossProduct": "CROSS",
-    "DebugLog": "None",
-    "DebugLogAngle": "None",
-    "DebugLogInt": "None",
-    "DebugLogMatrix": "None",
-    "DebugLogQuaternion": "None",
-    "DebugLogRotation": "None",
-    "DebugLogVector": "None",
-    "DistancePoints": "None",
-    "DistanceTransforms": "None",
+    "DebugLog": None,
+    "DebugLogAngle": None,
+    "DebugLogInt": None,
+    "DebugLogMatrix": None,
+    "DebugLogQuaternion": None,
+    "DebugLogRotation": None,
+    "DebugLogVector": None,
+    "DistancePoints": None,
+    "DistanceTransforms": None,
     "Divide": "DIV",
     "DivideAngle": "angDIV",
     "DivideAngleByInt": "angXintDIV",
@@ -86,10 +87,10 @@ MATH_NODE_DICTIONARY = {
     "InverseMatrix": "mtxINV",
     "InverseQuaternion": "quatINV",
     "InverseRotation": "rotINV",
-    "Lerp": "None",
-    "LerpAngle": "None",
-    "LerpMatrix": "None",
-    "LerpVector": "None",
+    "Lerp": None,
+    "LerpAngle": None,
+    "LerpMatrix": None,
+    "LerpVector": None,
     "MatrixFromDirection": "DIR2MTX",
     "MatrixFromQuaternion": "QUAT2MTX",
     "MatrixFromRotation": "ROT2MTX",
@@ -121,12 +122,12 @@ MATH_NODE_DICTIONARY = {
     "NegateAngle": "angNEG",
     "NegateInt": "intNEG",
     "NegateVector": "vecNEG",
-    "NormalizeArray": "None",
-    "NormalizeVector": "None",
-    "NormalizeWeightsArray": "None",
+    "NormalizeArray": None,
+    "NormalizeVector": None,
+    "NormalizeWeightsArray": None,
     "NotBool": "NOT",
     "OrBool": "OR",
-    "OrInt": "None",
+    "OrInt": None,
     "Power": "POW",
     "QuaternionFromMatrix": "MTX2QUAT",
     "QuaternionFromRotation": "ROT2QUAT",
@@ -154,8 +155,8 @@ MATH_NODE_DICTIONARY = {
     "SelectVector": "vecSWITCH",
     "SelectVectorArray": "vecArraySWITCH",
     "SinAngle": "SIN",
-    "SlerpQuaternion": "None",
-    "Smoothstep": "None",
+    "SlerpQuaternion": None,
+    "Smoothstep": None,
     "SquareRoot": "SQRT",
     "Subtract": "SUBTRACT",
     "SubtractAngle": "angSUBTRACT",
@@ -178,8 +179,8 @@ MATH_NODE_DICTIONARY = {
     "WeightedAverageQuaternion": "wtQUAT",
     "WeightedAverageRotation": "wtROT",
     "WeightedAverageVector": "wtVEC",
-    "XorBool": "None",
-    "XorInt": "None",
+    "XorBool": None,
+    "XorInt": None,
 }
 
 ARK_NODE_DICTIONARY = {
@@ -202,6 +203,8 @@ NODE_NAME_DICTIONARY = {
     'BLC': 'BLC',
     'blendTwoAttr': 'BTA',
     'BTA': 'BTA',
+    'choice': 'CHC',
+    'CHC': 'CHC',
     'clamp': 'CLMP',
     'CLMP': 'CLMP',
     'closestPointOnSurface': 'CPOS',
@@ -256,14 +259,18 @@ NODE_NAME_DICTIONARY = {
 }
 
 
+# Plugin node libraries.  Node types are the prefix followed by the library
+# key, suffixes set to None use the upper cased key.
 PLUGIN_LIBRARIES = {
     0: {
         'library': MATH_NODE_DICTIONARY,
+        'plugin': 'mayaMathNodes',
         'prefix': 'math_',
         'namespace': 'MMM'
     },
     1: {
         'library': ARK_NODE_DICTIONARY,
+        'plugin': 'arkMayaNodes',
         'prefix': '',
         'namespace': 'ARK'
     }
@@ -287,3 +294,8 @@ def float_to_three():
 
 
 NODE_DICTIONARY['FTT'] = float_to_three
+
+# Maya node type made by each custom node
+CUSTOM_NODE_TYPES = {
+    'FTT': 'unitConversion'
+}
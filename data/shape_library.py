@@ -0,0 +1,264 @@
+"""
+Binary control shape library.  Shapes saved from the scene are stored in a
+single file instead of in curve_data, so custom shapes can be added without
+editing code.
+
+File layout (little-endian):
+    header:  magic 'MRSL', version (uint16), shape count (uint32)
+    shape:   name length (uint16), name (utf-8), curve count (uint16),
+             default offset (3 float32)
+    curve:   degree (uint8), form (uint8), knot count (uint32),
+             point count (uint32), knots (float32), points (3 float32 each)
+
+Nothing is read when a ShapeLibrary is made.  The file is memory-mapped the
+first time a shape is asked for, only the record headers are walked to find
+each shape, and the points of a shape are unpacked when it is first used.
+"""
+import os
+import mmap
+import struct
+
+MAGIC = b'MRSL'
+VERSION = 1
+
+FILE_HEADER = struct.Struct('<4sHI')
+NAME_LENGTH = struct.Struct('<H')
+SHAPE_HEADER = struct.Struct('<H3f')
+CURVE_HEADER = struct.Struct('<BBII')
+
+# Environment variable pointing to a studio library, used over the default
+LIBRARY_ENV = 'MASTER_RIGGER_SHAPE_LIBRARY'
+
+
+def default_path():
+    """
+    Returns the path of the shape library used by the control tools.
+    """
+    return os.environ.get(LIBRARY_ENV) or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'control_shapes.mrsl')
+
+
+def pack_shape(name, curves, offset=(0, 0, 0)):
+    """
+    Returns the bytes of one shape record.
+
+    Args:
+        name (str): Name of the shape.
+        curves (list[dict]): degree, form, knots and points of each curve of
+            the shape, as read by curve_assignment.read_curve_data().
+        offset (list[float, float, float]): Default rotation offset of the
+            shape.
+
+    """
+    name = name.encode('utf-8')
+    data = [NAME_LENGTH.pack(len(name)), name,
+            SHAPE_HEADER.pack(len(curves), *offset)]
+    for curve in curves:
+        knots = list(curve['knots'])
+        points = [value for point in curve['points'] for value in point[:3]]
+        data.append(CURVE_HEADER.pack(curve['degree'], curve['form'],
+                                      len(knots), len(curve['points'])))
+        data.append(struct.pack('<{}f'.format(len(knots)), *knots))
+        data.append(struct.pack('<{}f'.format(len(points)), *points))
+    return b''.join(data)
+
+
+def _skip_shape(buffer, position):
+    """
+    Returns the name of the shape record at position and the position of the
+    record after it, without unpacking any points.
+    """
+    name_length = NAME_LENGTH.unpack_from(buffer, position)[0]
+    position += NAME_LENGTH.size
+    name = buffer[position:position + name_length].decode('utf-8')
+    position += name_length
+
+    curve_count = SHAPE_HEADER.unpack_from(buffer, position)[0]
+    position += SHAPE_HEADER.size
+    for _ in range(curve_count):
+        _, _, knot_count, point_count = CURVE_HEADER.unpack_from(buffer,
+                                                                 position)
+        position += CURVE_HEADER.size + 4 * (knot_count + point_count * 3)
+    return name, position
+
+
+def unpack_shape(buffer, position):
+    """
+    Unpacks the shape record at position of a buffer.
+
+    Returns:
+        (str): Name of the shape.
+        (dict): 'offset', the default rotation offset, and 'curves', the
+            degree, form, knots and points of each curve.
+        (int): Position of the record after it.
+
+    """
+    name_length = NAME_LENGTH.unpack_from(buffer, position)[0]
+    position += NAME_LENGTH.size
+    name = buffer[position:position + name_length].decode('utf-8')
+    position += name_length
+
+    shape_header = SHAPE_HEADER.unpack_from(buffer, position)
+    position += SHAPE_HEADER.size
+
+    curves = []
+    for _ in range(shape_header[0]):
+        degree, form, knot_count, point_count = CURVE_HEADER.unpack_from(
+            buffer, position)
+        position += CURVE_HEADER.size
+        knots = struct.unpack_from('<{}f'.format(knot_count), buffer, position)
+        position += 4 * knot_count
+        values = struct.unpack_from('<{}f'.format(point_count * 3), buffer,
+                                    position)
+        position += 4 * point_count * 3
+        curves.append({
+            'degree': degree,
+            'form': form,
+            'knots': list(knots),
+            'points': [values[index:index + 3]
+                       for index in range(0, len(values), 3)]
+        })
+
+    return name, {'offset': tuple(shape_header[1:]), 'curves': curves}, position
+
+
+class ShapeLibrary(object):
+    """
+    Lazily loaded control shape library file.
+
+    Args:
+        path (str): Path of the library file.  default_path() if not given.
+            The file does not need to exist until a shape is saved.
+
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        self._file = None
+        self._buffer = None
+        self._positions = None
+        self._shapes = {}
+
+    def __contains__(self, name):
+        return name in self._index()
+
+    def __len__(self):
+        return len(self._index())
+
+    def __repr__(self):
+        return 'ShapeLibrary({!r})'.format(self.path)
+
+    def _index(self):
+        """
+        Maps the file on first use and returns the position of each shape.
+        """
+        if self._positions is not None:
+            return self._positions
+
+        self._positions = {}
+        if not os.path.isfile(self.path) or not os.path.getsize(self.path):
+            return self._positions
+
+        self._file = open(self.path, 'rb')
+        self._buffer = mmap.mmap(self._file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+
+        magic, version, shape_count = FILE_HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            self.close()
+            raise IOError('{} is not a shape library file.'.format(self.path))
+        if version > VERSION:
+            self.close()
+            raise IOError('{} was saved with a newer shape library version '
+                          '({}).'.format(self.path, version))
+
+        position = FILE_HEADER.size
+        for _ in range(shape_count):
+            name, next_position = _skip_shape(self._buffer, position)
+            self._positions[name] = position
+            position = next_position
+
+        return self._positions
+
+    def close(self):
+        """
+        Releases the mapped file.  It is mapped again when next used.
+        """
+        if self._buffer is not None:
+            self._buffer.close()
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._buffer = None
+        self._positions = None
+
+    def names(self):
+        return sorted(self._index())
+
+    def record(self, name):
+        """
+        Returns the packed bytes of a shape as stored in the file, without
+        unpacking its points.
+        """
+        positions = self._index()
+        if name not in positions:
+            raise KeyError('"{}" is not a shape in the library {}.'.format(
+                name, self.path))
+        end = _skip_shape(self._buffer, positions[name])[1]
+        return bytes(self._buffer[positions[name]:end])
+
+    def get(self, name):
+        """
+        Returns a shape of the library.
+
+        Returns:
+            (dict): 'offset', the default rotation offset, and 'curves', the
+                degree, form, knots and points of each curve.
+
+        """
+        if name not in self._shapes:
+            positions = self._index()
+            if name not in positions:
+                raise KeyError('"{}" is not a shape in the library {}.'.format(
+                    name, self.path))
+            self._shapes[name] = unpack_shape(self._buffer,
+                                              positions[name])[1]
+        return self._shapes[name]
+
+    def save(self, name, curves, offset=(0, 0, 0)):
+        """
+        Adds a shape to the library file, replacing any shape with the same
+        name.  Other shapes are copied over as bytes without being unpacked.
+        The new file is written next to the old one and swapped in.
+
+        Args:
+            name (str): Name of the shape.
+            curves (list[dict]): degree, form, knots and points of each curve.
+            offset (list[float, float, float]): Default rotation offset.
+
+        """
+        positions = self._index()
+        records = []
+        for shape_name, position in sorted(positions.items(),
+                                           key=lambda item: item[1]):
+            if shape_name == name:
+                continue
+            end = _skip_shape(self._buffer, position)[1]
+            records.append(self._buffer[position:end])
+        records.append(pack_shape(name, curves, offset))
+        self.close()
+
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as library_file:
+            library_file.write(FILE_HEADER.pack(MAGIC, VERSION, len(records)))
+            for record in records:
+                library_file.write(record)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.rename(temp_path, self.path)
+
+        self._shapes.pop(name, None)
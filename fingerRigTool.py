@@ -1,10 +1,10 @@
 import maya.cmds as cmds
 import pprint
-from string import ascii_uppercase
 from master_rigger import curve_assignment as crv
 from master_rigger import attributeManipulation as attr
 from master_rigger import createNodeLibrary as node
 from master_rigger import basicTools as tool
+from master_rigger.nameIndex import alpha_index
 reload(crv)
 reload(attr)
 reload(node)
@@ -13,9 +13,6 @@ reload(tool)
 
 class HandModule(object):
 
-    # Letters for finger enumeration
-    LETTERS_INDEX = {index: letter for index, letter in
-                     enumerate(ascii_uppercase, start=1)}
     # Dictionary variable, used for all callbacks and built with first function
     fingers_dict = {}
 
@@ -30,6 +27,7 @@ class HandModule(object):
         self.shape_type = kwargs.get('shape_type', 'box')
         self.limit_attrs = kwargs.get('limit_attrs', True)
         self.hand_shape = kwargs.get('hand_shape', 'triangle')
+        self.instance_shapes = kwargs.get('instance_shapes', False)
         self.metacarpus = kwargs.get('metacarpus', False)
         self.inverse = -1 if kwargs.get('inverse', False) else 1
 
@@ -71,9 +69,7 @@ class HandModule(object):
         """
         metacarpus = 1 if self.metacarpus else 0
 
-        for finger in range(self.finger_count):
-            finger = finger + 1
-            finger_letter = self.LETTERS_INDEX[finger]
+        for finger_letter in alpha_index(amount=self.finger_count):
             finger_key = 'Hand_{side}_finger{index}'.format(side=self.side, index=finger_letter)
             finger_segment_list = []
             for segment in range(self.segment_count + 1 + metacarpus):
@@ -209,6 +205,8 @@ class HandModule(object):
 
         """
         attr_names = []
+        # First finger control, its shapes instanced by the others if requested
+        master_shape = None
 
         for key, segments in sorted(self.fingers_dict.iteritems()):
             # Declaring the parent variable before it gets continually reassigned
@@ -235,7 +233,12 @@ class HandModule(object):
                     # Convert to basicTools.create_offset() or .create_hierarchy()
                     finger_ctrl = cmds.group(empty=True, n=segment + '_CTL')
                     crv.add_curve_shape(shape_choice=self.shape_type,
-                                        transform_node=finger_ctrl)
+                                        transform_node=finger_ctrl,
+                                        instance_of=master_shape)
+                    # The control is kept rather than its shape path, which
+                    # the groups made below would make stale
+                    if self.instance_shapes and not master_shape:
+                        master_shape = finger_ctrl
                     finger_srt = cmds.group(finger_ctrl, n=segment + '_SRT')
                     # if offset:
                     #     finger_ofs = cmds.group(finger_srt, n=segment + '_OFS')
@@ -1,9 +1,9 @@
 import maya.cmds as cmds
-from string import ascii_uppercase
 from MasterRigger import basicTools as tool
 from MasterRigger import attributeManipulation as attr
 from MasterRigger import curve_assignment as crv
 from MasterRigger import createNodeLibrary as node
+from MasterRigger.nameIndex import alpha_index
 
 reverse_foot_parts = ['bank_out', 'bank_in', 'heel', 'toe', 'ball', 'ankle']
 toe_library = []
@@ -12,9 +12,6 @@ default_vals = [
     [2, 0, 0], [-2, 0, 0], [0, 0, -4], [0, 0, 5], [0, 1, 2], [0, 5, -3]
 ]
 
-LETTERS_INDEX = {index: letter for index, letter in
-                 enumerate(ascii_uppercase, start=1)}
-
 ROTATE_ORDER = {
     'xyz': 0,
     'yzx': 1,
@@ -56,8 +53,7 @@ toes_dict = {}
 
 
 def build_toe_library(toe_count=5, segment_count=1, prefix='C'):
-    for toe in range(toe_count):
-        toe_letter = LETTERS_INDEX[toe + 1]
+    for toe_letter in alpha_index(amount=toe_count):
         toe_key = '%s_toe%s' % (prefix, toe_letter)
         toe_segment_list = []
         for segment in range(segment_count + 1):
@@ -238,7 +234,8 @@ def create_driver_foot_joints(prefix='C', toes=False, toe_count=5,
 
 
 def build_foot_system(foot_control=None, prefix='C', toes=False,
-                      toe_shape_type='box', toe_offset=False, limit_attrs=True):
+                      toe_shape_type='box', toe_offset=False, limit_attrs=True,
+                      instance_shapes=False):
     # Deleting temp items; might move between different commands or write its
     # own deleting procedure later
     for item in temp_item_list:
@@ -332,6 +329,8 @@ def build_foot_system(foot_control=None, prefix='C', toes=False,
     if toes:
         attr_name = []
         toe_ctrl_grp = cmds.group(empty=True, name=prefix + '_toe_CTRL_GRP')
+        # First toe control, its shapes instanced by the others if requested
+        master_shape = None
         cmds.parentConstraint(prefix + '_ball_BONE', toe_ctrl_grp, mo=False)
         for toe in sorted(toes_dict):
             # Declaring the parent variable before it gets continually 
@@ -342,7 +341,12 @@ def build_foot_system(foot_control=None, prefix='C', toes=False,
                     continue
                 toe_ctrl = cmds.group(empty=True, n=segment + '_CTRL')
                 crv.add_curve_shape(shape_choice=toe_shape_type,
-                                    transform_node=toe_ctrl)
+                                    transform_node=toe_ctrl,
+                                    instance_of=master_shape)
+                # The control is kept rather than its shape path, which the
+                # groups made below would make stale
+                if instance_shapes and not master_shape:
+                    master_shape = toe_ctrl
                 toe_srt = cmds.group(toe_ctrl, n=segment + '_SRT')
                 if toe_offset:
                     toe_ofs = cmds.group(toe_srt, n=segment + '_OFS')
@@ -1,16 +1,14 @@
 import maya.cmds as cmds
 import pprint  # only for testing purposes, remove when completed
-from string import ascii_uppercase
 from master_rigger import curve_assignment as crv
 from master_rigger import basicTools as tool
 from master_rigger import renamerLibrary as name
 from master_rigger import attributeManipulation as attr
 from master_rigger import createNodeLibrary as node
+from master_rigger.nameIndex import alpha_index
+from master_rigger import riggingTools as rigging
 
 
-LETTERS_INDEX = {index: letter for index, letter in
-                 enumerate(ascii_uppercase, start=1)}
-
 arm_parts = ['shoulder', 'elbow', 'wrist']
 leg_parts = ['femur', 'knee', 'ankle']
 limb_starting_position = {
@@ -80,8 +78,6 @@ def build_limb_library(prefix='L', limb_type='arm', extra_joints=2):
 
     limb_dict = {}
     for part in limb_parts:
-        # finger = finger + 1
-        # finger_letter = LETTERS_INDEX[finger]
         limb_key = '%s_%s' % (prefix, part)
         limb_section_list = []
         if part == limb_parts[2]:
@@ -89,18 +85,11 @@ def build_limb_library(prefix='L', limb_type='arm', extra_joints=2):
             limb_section_list.append(limb_key)
             limb_dict[part] = limb_section_list
             continue
-        if extra_joints > 0:
-            for section in range(extra_joints + 1):
-                if section == 0:
-                    # Setting the base point (key) in the key's list
-                    limb_section_list.append(limb_key)
-                    continue
-                segment = LETTERS_INDEX[section]
-
-                limb_section_list.append('%s_%s_%s'
-                                         % (prefix, part, segment))
-        else:
-            limb_section_list.append(limb_key)
+        # Setting the base point (key) in the key's list
+        limb_section_list.append(limb_key)
+        for segment in alpha_index(amount=max(0, extra_joints)):
+            limb_section_list.append('%s_%s_%s'
+                                     % (prefix, part, segment))
         limb_dict[part] = limb_section_list
     pprint.pprint(limb_dict)
     return limb_dict
@@ -268,8 +257,8 @@ def create_limb_locators(limb_dict, prefix='L', limb_type='arm'):
                         name='%s_%s_pv_LOC' % (prefix, limb_parts[1]))
     pv_loc_pivot = tool.create_offset(suffix='OFS', input_object=pv_loc)
     crv.add_curve_shape(shape_choice='arrow', transform_node=pv_loc,
-                        color=side_to_color[prefix], shape_offset=[0, 180, 0])
-    cmds.xform(pv_loc + '.cv[0:]', scale=[0.5, 0.5, 0.5])
+                        color=side_to_color[prefix], shape_offset=[0, 180, 0],
+                        scale=[0.5, 0.5, 0.5])
     attr.lock_hide(1, 1, 0, 1, 1, 1, 1, 1, 1, 1, objects=[pv_loc], hide=True)
     cmds.group(pv_loc_pivot, pv_setup_aim, name='%s_%s_pv_GRP'
                                                 % (prefix, limb_parts[1]))
@@ -302,7 +291,7 @@ def create_limb_locators(limb_dict, prefix='L', limb_type='arm'):
 
 def create_limb_system(limb_dict, locator_inputs, prefix='L', limb_type='arm',
                        auto_twist=True, orient_symmetry=False, fk_shape='ring',
-                       ik_shape='box', pv_shape='diamond'):
+                       ik_shape='box', pv_shape='diamond', ik_spaces=None):
     """
     Builds a joint and control rig system based on the placements of the
     locators from the previous function.  Relies heavily on correct variable
@@ -326,6 +315,10 @@ def create_limb_system(limb_dict, locator_inputs, prefix='L', limb_type='arm',
         fk_shape (str): Assign a shape type for the FK controls.
         ik_shape (str): Assign a shape type for the IK controls.
         pv_shape (str): Assign a shape type for the PV control.
+        ik_spaces (list[tuple]): Name and node of each space the IK and PV
+            controls can follow, switched by a 'space' enum on each control.
+            (ex. [('world', 'Global_CTRL'), ('chest', 'C_chest_CTRL')])  The
+            SPACE offsets are left without a switch if not given.
 
     """
 
@@ -426,11 +419,10 @@ def create_limb_system(limb_dict, locator_inputs, prefix='L', limb_type='arm',
     ik_origin = cmds.duplicate(fk_origin, renameChildren=True)
     ik_joints = name.search_replace_name(search_input='FK',
                                          replace_output='IK',
-                                         scope='selection',
-                                         input_object=ik_origin)
+                                         input_objects=ik_origin)
     ik_joints_list = []
     for jnt in ik_joints:
-        ik_joint_name = name.clear_end_digits(input_object=[jnt])[0]
+        ik_joint_name = name.clear_end_digits(input_objects=[jnt])[0]
         ik_joints_list.append(ik_joint_name)
     # Deleteing all of the orient joints now that they have been oriented
     cmds.delete(ik_joints_list[-1], limb_bone_list[-1], fk_orient_jnt)
@@ -453,16 +445,16 @@ def create_limb_system(limb_dict, locator_inputs, prefix='L', limb_type='arm',
                                                 transform_node=fk_scnd_control,
                                                 color=side_to_color[prefix],
                                                 off_color=True,
-                                                shape_offset=[0, 0, 90])
+                                                shape_offset=[0, 0, 90],
+                                                scale=[1.5, 1.5, 1.5])
             fk_control = cmds.group(fk_scnd_control,
                                     name=ctrl.replace('JNT', 'CTRL'))
             crv.add_curve_shape(shape_choice='ring',
                                 transform_node=fk_control,
                                 color=side_to_color[prefix],
-                                shape_offset=[0, 0, 90])
+                                shape_offset=[0, 0, 90],
+                                scale=[1.3, 1.3, 1.3])
 
-            cmds.xform(fk_scnd_control + '.cv[0:]', scale=[1.5, 1.5, 1.5])
-            cmds.xform(fk_control + '.cv[0:]', scale=[1.3, 1.3, 1.3])
             attr.lock_hide(0, 0, 0, 0, 0, 0, 1, 1, 1, 1,
                            objects=[fk_control, fk_scnd_control])
             attr.create_attr('secondaryVisibility',
@@ -480,9 +472,9 @@ def create_limb_system(limb_dict, locator_inputs, prefix='L', limb_type='arm',
             crv.add_curve_shape(shape_choice='ring',
                                 transform_node=fk_control,
                                 color=side_to_color[prefix],
-                                shape_offset=[0, 0, 90])
+                                shape_offset=[0, 0, 90],
+                                scale=[1.3, 1.3, 1.3])
 
-            cmds.xform(fk_control + '.cv[0:]', scale=[1.3, 1.3, 1.3])
             fk_ctrl_list.append(fk_control)
 
         fk_offset = tool.create_offset(input_object=fk_control,
@@ -504,12 +496,14 @@ def create_limb_system(limb_dict, locator_inputs, prefix='L', limb_type='arm',
     ik_scnd_shape = crv.add_curve_shape(shape_choice=ik_shape,
                                         transform_node=ik_scnd_control,
                                         color=side_to_color[prefix],
-                                        off_color=True)
+                                        off_color=True,
+                                        scale=[2.1, 2.1, 2.1])
     ik_control = cmds.group(ik_scnd_control,
                             name=ik_joints_list[-1].replace('JNT', 'CTRL'))
     crv.add_curve_shape(shape_choice=ik_shape,
                         transform_node=ik_control,
-                        color=side_to_color[prefix])
+                        color=side_to_color[prefix],
+                        scale=[1.85, 1.85, 1.85])
     ik_control_offset = tool.create_offset(input_object=ik_control,
                                            invert_scale=inverse)
     ik_space = tool.create_offset(suffix='SPACE', input_object=ik_control)
@@ -521,10 +515,7 @@ def create_limb_system(limb_dict, locator_inputs, prefix='L', limb_type='arm',
                         transform_node=ik_pv_control,
                         color=side_to_color[prefix])
     ik_pv_control_offset = tool.create_offset(input_object=ik_pv_control)
-    tool.create_offset(suffix='SPACE', input_object=ik_pv_control)
-
-    cmds.xform(ik_scnd_control + '.cv[0:]', scale=[2.1, 2.1, 2.1])
-    cmds.xform(ik_control + '.cv[0:]', scale=[1.85, 1.85, 1.85])
+    ik_pv_space = tool.create_offset(suffix='SPACE', input_object=ik_pv_control)
 
     tool.match_transformations(source=ik_joints_list[-1],
                                target=ik_control_offset)
@@ -534,6 +525,13 @@ def create_limb_system(limb_dict, locator_inputs, prefix='L', limb_type='arm',
     ik_ctrl_grp = cmds.group(ik_control_offset, ik_pv_control_offset,
                              name='%s_%s_IK_CTRL_GRP' % (prefix, limb_type))
 
+    # Space switches drive the SPACE offsets, after the controls are placed so
+    # the offsets baked into the switch keep them where they are
+    if ik_spaces:
+        rigging.matrix_space_switch(ik_control, ik_spaces, driven=ik_space)
+        rigging.matrix_space_switch(ik_pv_control, ik_spaces,
+                                    driven=ik_pv_space)
+
     # Deleting the placement pv arrow
     cmds.delete('%s_%s_pv_LOC' % (prefix, limb_parts[1]))
 
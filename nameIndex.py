@@ -0,0 +1,448 @@
+import maya.cmds as cmds
+from collections import namedtuple
+from string import ascii_uppercase, ascii_lowercase
+
+# Side tokens used in names, mapped to the side they stand for
+SIDE_TOKENS = {
+    'L': 'L',
+    'left': 'L',
+    'lt': 'L',
+    'R': 'R',
+    'right': 'R',
+    'rt': 'R',
+    'C': 'C',
+    'center': 'C',
+    'ctr': 'C',
+    'M': 'C'
+}
+
+# Side tokens mapped to the same spelling of the opposite side
+MIRROR_SIDE_TOKENS = {
+    'L': 'R',
+    'left': 'right',
+    'lt': 'rt',
+    'R': 'L',
+    'right': 'left',
+    'rt': 'lt'
+}
+
+NameTokens = namedtuple('NameTokens',
+                        ['component', 'side', 'name', 'index', 'suffix'])
+
+
+def get_short_name(longname):
+    """
+    Returns the shortname of an input object.
+    """
+    return longname.rsplit('|', 1)[-1]
+
+
+def strip_namespace(name):
+    """
+    Returns the shortname of an input object without its namespace.
+    """
+    return get_short_name(name).rpartition(':')[2]
+
+
+def get_parent_path(longname):
+    """
+    Returns the longname of the parent of an input object, or '' at the root.
+    """
+    return longname.rpartition('|')[0]
+
+
+class NameIndex(object):
+    """
+    Maps the short (leaf) names of the scene to their full DAG paths, built
+    from a single ls(long=True) sweep.  Short names that are duplicated in the
+    scene keep every path that shares them, so "is this name unique" and "which
+    paths share this leaf" are dictionary lookups instead of scene queries.
+
+    Renames made through renamerLibrary keep the index up to date when it is
+    passed in as the name_index argument.
+    """
+
+    def __init__(self, nodes=None):
+        self._paths = {}     # short name -> list of long names
+        self._children = {}  # parent long name -> set of child long names
+        self.rebuild(nodes)
+
+    def __contains__(self, name):
+        return self.exists(name)
+
+    def __len__(self):
+        return sum(len(paths) for paths in self._paths.values())
+
+    def __repr__(self):
+        return 'NameIndex({} nodes, {} duplicated names)'.format(
+            len(self), len(self.duplicates()))
+
+    def rebuild(self, nodes=None):
+        """
+        Re-reads the index from the scene in one query.
+
+        Args:
+            nodes (list[str]): Limit the index to these nodes.  The whole scene
+                is read if not given.
+
+        """
+        self._paths = {}
+        self._children = {}
+
+        if nodes:
+            long_names = cmds.ls(nodes, long=True) or []
+        else:
+            long_names = cmds.ls(long=True) or []
+
+        for long_name in long_names:
+            self.add(long_name)
+
+    def add(self, long_name):
+        paths = self._paths.setdefault(get_short_name(long_name), [])
+        if long_name not in paths:
+            paths.append(long_name)
+        if '|' in long_name:
+            self._children.setdefault(
+                get_parent_path(long_name), set()).add(long_name)
+
+    def remove(self, long_name):
+        short_name = get_short_name(long_name)
+        paths = self._paths.get(short_name, [])
+        if long_name in paths:
+            paths.remove(long_name)
+        if not paths:
+            self._paths.pop(short_name, None)
+        self._children.get(get_parent_path(long_name), set()).discard(long_name)
+
+    def rename(self, old_long_name, new_long_name):
+        """
+        Updates the index after a node was renamed.  Descendants of a renamed
+        DAG node have their long names re-pathed as well.
+        """
+        if old_long_name == new_long_name:
+            return
+
+        self.remove(old_long_name)
+        self.add(new_long_name)
+
+        children = self._children.pop(old_long_name, set())
+        for child in children:
+            self.rename(child,
+                        new_long_name + child[len(old_long_name):])
+
+    def paths(self, short_name):
+        """
+        Returns every long name that shares the given short name.
+        """
+        return list(self._paths.get(get_short_name(short_name), []))
+
+    def exists(self, name):
+        if '|' in name:
+            return name in self._paths.get(get_short_name(name), [])
+        return name in self._paths
+
+    def is_unique(self, name):
+        return len(self._paths.get(get_short_name(name), [])) == 1
+
+    def duplicates(self):
+        """
+        Returns a dictionary of every short name that is used by more than one
+        node, with the long names sharing it.
+        """
+        return {short_name: list(paths)
+                for short_name, paths in self._paths.items()
+                if len(paths) > 1}
+
+    def long_name(self, name):
+        """
+        Returns the long name of a node.  If the short name is shared, the
+        first path found is returned, matching cmds.ls(name, long=True)[0].
+        """
+        if name.startswith('|'):
+            return name
+        paths = self._paths.get(get_short_name(name))
+        if not paths:
+            raise NameError('No object matches name: {}'.format(name))
+        if '|' in name:
+            for path in paths:
+                if path.endswith('|' + name):
+                    return path
+            raise NameError('No object matches name: {}'.format(name))
+        return paths[0]
+
+    def long_names(self, names):
+        if isinstance(names, (list, tuple)):
+            return [self.long_name(name) for name in names]
+        return self.long_name(names)
+
+
+def parse_name(name):
+    """
+    Splits a name following the Component_Side_name_##_SUFFIX convention into
+    its tokens.  The side may also lead the name (ex. L_arm_shoulder_JNT), and
+    any token that is missing is returned as None.
+
+    Args:
+        name (str): Short or long name of a node.  Namespaces are ignored.
+
+    Returns:
+        (NameTokens): component, side, name, index and suffix of the name.
+            The side is the one letter side SIDE_TOKENS maps to.
+
+    """
+    tokens = [token for token in strip_namespace(name).split('_') if token]
+
+    suffix = None
+    if len(tokens) > 1 and not _is_index_token(tokens[-1]):
+        suffix = tokens.pop()
+
+    index = None
+    if len(tokens) > 1 and _is_index_token(tokens[-1]):
+        index = tokens.pop()
+
+    side = None
+    component = None
+    if tokens and tokens[0] in SIDE_TOKENS:
+        side = SIDE_TOKENS[tokens.pop(0)]
+        if len(tokens) > 1:
+            component = tokens.pop(0)
+    elif len(tokens) > 1 and tokens[1] in SIDE_TOKENS:
+        component = tokens.pop(0)
+        side = SIDE_TOKENS[tokens.pop(0)]
+    elif len(tokens) > 1:
+        component = tokens.pop(0)
+
+    return NameTokens(component, side, '_'.join(tokens) or None, index, suffix)
+
+
+def mirror_name(name):
+    """
+    Returns a name with its side token swapped for the opposite side, using
+    the same spelling (ex. Arm_L_wrist_CTRL -> Arm_R_wrist_CTRL, lt_foot_CTL
+    -> rt_foot_CTL).  Long names have every node of the path mirrored.
+
+    Args:
+        name (str): Short or long name of a node.
+
+    Returns:
+        (str): The mirrored name, or None if the name has no left or right
+            side token.
+
+    """
+    if '|' in name:
+        nodes = [mirror_name(node) if node else None
+                 for node in name.split('|')]
+        if not any(nodes):
+            return None
+        return '|'.join(mirrored or node for mirrored, node in
+                        zip(nodes, name.split('|')))
+
+    namespace, _, short_name = name.rpartition(':')
+    tokens = short_name.split('_')
+    for position in (0, 1):
+        if len(tokens) > position and tokens[position] in SIDE_TOKENS:
+            if tokens[position] not in MIRROR_SIDE_TOKENS:
+                return None
+            tokens[position] = MIRROR_SIDE_TOKENS[tokens[position]]
+            short_name = '_'.join(tokens)
+            return ':'.join([namespace, short_name]) if namespace \
+                else short_name
+    return None
+
+
+def alpha_index(start=1, upper_case=True, amount=None):
+    """
+    Generator of spreadsheet style letter labels (A..Z, AA..ZZ, AAA..) with no
+    upper limit.  Labels are made one at a time as they are asked for, so long
+    name lists never build the full set of labels up front.
+
+    Args:
+        start (int): 1-based index of the first label.  (ex. 1 = 'A',
+            27 = 'AA')  Letters have no 0 position, anything lower starts at
+            'A'.
+        upper_case (bool): Yield uppercase or lowercase letters.
+        amount (int): Number of labels to yield.  Unbounded if not given.
+
+    Yields:
+        (str): The next letter label.
+
+    """
+    letters = ascii_uppercase if upper_case else ascii_lowercase
+
+    # Base 26 digits of the label, most significant first
+    digits = []
+    index = max(1, start)
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        digits.insert(0, remainder)
+
+    produced = 0
+    while amount is None or produced < amount:
+        yield ''.join(letters[digit] for digit in digits)
+        produced += 1
+
+        position = len(digits) - 1
+        while position >= 0 and digits[position] == 25:
+            digits[position] = 0
+            position -= 1
+        if position < 0:
+            digits.insert(0, 0)
+        else:
+            digits[position] += 1
+
+
+def alpha_label(index, upper_case=True):
+    """
+    Returns the spreadsheet style letter label for a 1-based index.
+    (ex. 1 = 'A', 27 = 'AA')
+    """
+    return next(alpha_index(index, upper_case))
+
+
+def _is_index_token(token):
+    return token.isdigit() or token == 'END'
+
+
+def _last_token(name):
+    return strip_namespace(name).rsplit('_', 1)[-1]
+
+
+class TokenIndex(NameIndex):
+    """
+    NameIndex that also buckets every node by the tokens of its name (see
+    parse_name()), so convention based queries such as "every L arm CTL" or
+    "every OFS/ZERO group" are set lookups.  Renames applied through the
+    index (ex. by passing it as renamerLibrary's name_index) re-bucket the
+    node and its descendants.
+    """
+
+    FIELDS = NameTokens._fields
+
+    def rebuild(self, nodes=None):
+        self._tokens = {}
+        self._buckets = dict((field, {}) for field in self.FIELDS)
+        self._last_tokens = {}  # last '_' token -> set of long names
+        super(TokenIndex, self).rebuild(nodes)
+
+    def add(self, long_name):
+        super(TokenIndex, self).add(long_name)
+        tokens = parse_name(long_name)
+        self._tokens[long_name] = tokens
+        for field, value in zip(self.FIELDS, tokens):
+            if value is not None:
+                self._buckets[field].setdefault(value, set()).add(long_name)
+        self._last_tokens.setdefault(_last_token(long_name),
+                                     set()).add(long_name)
+
+    def remove(self, long_name):
+        super(TokenIndex, self).remove(long_name)
+        tokens = self._tokens.pop(long_name, None)
+        if tokens is None:
+            return
+        last_token = _last_token(long_name)
+        nodes = self._last_tokens.get(last_token)
+        if nodes is not None:
+            nodes.discard(long_name)
+            if not nodes:
+                del self._last_tokens[last_token]
+        for field, value in zip(self.FIELDS, tokens):
+            bucket = self._buckets[field].get(value)
+            if bucket is None:
+                continue
+            bucket.discard(long_name)
+            if not bucket:
+                del self._buckets[field][value]
+
+    def tokens(self, name):
+        """
+        Returns the parsed NameTokens of a node in the index.
+        """
+        return self._tokens[self.long_name(name)]
+
+    def values(self, field):
+        """
+        Returns every value found in the scene for a token field.
+        (ex. values('suffix') = ['CTL', 'JNT', 'OFS', ...])
+        """
+        return sorted(self._buckets[field])
+
+    def find(self, component=None, side=None, name=None, index=None,
+             suffix=None, under=None):
+        """
+        Returns the long names of every node whose tokens match all the given
+        fields.  Each field can be a single value or a list/tuple of accepted
+        values.
+
+        Args:
+            component (str) or (list[str]): Component token (ex. 'Hand').
+            side (str) or (list[str]): Side token, any spelling found in
+                SIDE_TOKENS.
+            name (str) or (list[str]): Name token(s) left between the side and
+                the index.
+            index (str) or (list[str]): Index token (ex. '01', 'END').
+            suffix (str) or (list[str]): Suffix token (ex. ('OFS', 'ZERO')).
+            under (str): Only return nodes in the hierarchy of this node.
+
+        Returns:
+            (list[str]): Sorted long names of the matching nodes.
+
+        """
+        query = {'component': component, 'side': side, 'name': name,
+                 'index': index, 'suffix': suffix}
+
+        matches = None
+        for field in self.FIELDS:
+            values = query[field]
+            if values is None:
+                continue
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+            if field == 'side':
+                values = [SIDE_TOKENS.get(value, value) for value in values]
+
+            found = set()
+            for value in values:
+                found.update(self._buckets[field].get(value, ()))
+
+            matches = found if matches is None else matches & found
+            if not matches:
+                return []
+
+        if matches is None:
+            matches = set(self._tokens)
+
+        if under is not None:
+            root = self.long_name(under) + '|'
+            matches = [node for node in matches if node.startswith(root)]
+
+        return sorted(matches)
+
+    def find_ending(self, endings, under=None):
+        """
+        Returns the long names of every node whose name ends with one of the
+        endings, with or without a '_' before it (ex. 'OFS' finds
+        L_arm_shoulder_OFS as well as L_arm_shoulderOFS and pelvisOFS).  Only
+        the distinct last tokens of the scene are compared, not every node.
+
+        Args:
+            endings (str) or (list[str]): Accepted endings.
+            under (str): Only return nodes in the hierarchy of this node.
+
+        Returns:
+            (list[str]): Sorted long names of the matching nodes.
+
+        """
+        if not isinstance(endings, (list, tuple, set)):
+            endings = [endings]
+        endings = tuple(endings)
+
+        matches = set()
+        for last_token, nodes in self._last_tokens.items():
+            if last_token.endswith(endings):
+                matches.update(nodes)
+
+        if under is not None:
+            root = self.long_name(under) + '|'
+            matches = [node for node in matches if node.startswith(root)]
+
+        return sorted(matches)
@@ -0,0 +1,234 @@
+"""
+Node networks described as data.  A network lists the utility nodes to make,
+the static values to give them and the connections between them and the
+scene:
+
+    network = {
+        'nodes': [
+            # (alias, node_data key, name)
+            ('sum', 'PMA', 'L_foot_reverseRotate'),
+            ('roll', 'CND', 'L_footRoll'),
+        ],
+        'values': [
+            ('sum.operation', 2),
+            ('roll.operation', 3),
+        ],
+        'connections': [
+            # Plugs start with an alias, or with the name of a scene node
+            ('L_foot_IK_CTRL.roll', 'sum.input1D[0]'),
+            ('sum.output1D', 'roll.firstTerm'),
+        ]
+    }
+
+build_network() checks the whole network before anything is made, creates
+every node in one create_nodes() call, sets every value, then connects the
+nodes in topological order.
+"""
+import re
+import maya.cmds as cmds
+from master_rigger import createNodeLibrary as node
+from master_rigger.data import node_data
+
+# Attribute types that can be connected to each other, by size.  Types that
+# are not listed (typed, compound, ...) are not checked.
+ATTRIBUTE_SIZES = {
+    'bool': 1,
+    'byte': 1,
+    'char': 1,
+    'short': 1,
+    'long': 1,
+    'enum': 1,
+    'float': 1,
+    'double': 1,
+    'doubleLinear': 1,
+    'doubleAngle': 1,
+    'floatLinear': 1,
+    'floatAngle': 1,
+    'time': 1,
+    'short2': 2,
+    'long2': 2,
+    'float2': 2,
+    'double2': 2,
+    'short3': 3,
+    'long3': 3,
+    'float3': 3,
+    'double3': 3,
+    'matrix': 'matrix',
+    'fltMatrix': 'matrix',
+    'message': 'message'
+}
+
+
+def _items(values):
+    if isinstance(values, dict):
+        return sorted(values.items())
+    return list(values or [])
+
+
+def _attribute_name(attribute):
+    """
+    Returns the name of the attribute a plug path ends on.
+    (ex. 'outColor.outColorR' -> 'outColorR', 'matrixIn[0]' -> 'matrixIn')
+    """
+    return re.sub(r'\[\d*\]', '', attribute.rsplit('.', 1)[-1])
+
+
+def _split_plug(plug, node_types):
+    """
+    Returns the node, attribute and query flags of a plug.  Plugs on network
+    nodes are queried by node type, since the nodes do not exist yet.
+    """
+    if '.' not in plug:
+        raise NameError('{} is not a plug (node.attribute).'.format(plug))
+    node_name, attribute = plug.split('.', 1)
+    if node_name in node_types:
+        return node_name, attribute, {'type': node_types[node_name]}
+    if not cmds.objExists(node_name):
+        raise NameError('No object matches name: {}'.format(node_name))
+    return node_name, attribute, {'node': node_name}
+
+
+def _plug_size(plug, node_types):
+    """
+    Returns the size of a plug's attribute as found in ATTRIBUTE_SIZES, or
+    None if it is not checked.  Raises a NameError for unknown attributes.
+    """
+    _, attribute, query = _split_plug(plug, node_types)
+    attribute = _attribute_name(attribute)
+    if query.get('type') is None and 'node' not in query:
+        # Custom nodes (ex. FTT) have no node type to query
+        return None
+    if not cmds.attributeQuery(attribute, exists=True, **query):
+        raise NameError('{} has no attribute "{}".'.format(
+            plug.split('.', 1)[0], attribute))
+    return ATTRIBUTE_SIZES.get(
+        cmds.attributeQuery(attribute, attributeType=True, **query))
+
+
+def _node_type(node_key):
+    """
+    Returns the maya node type made for a node_data key, or None for custom
+    nodes.
+    """
+    try:
+        builder = node_data.NODE_DICTIONARY[
+            node_data.NODE_NAME_DICTIONARY[node_key]]
+    except KeyError:
+        raise KeyError('Node type ({}) not yet implemented!'.format(node_key))
+    return getattr(builder, 'args', [None])[0]
+
+
+def sort_network(network):
+    """
+    Validates a network and orders it for building.  Every plug must exist,
+    connected attributes must be of the same size, and network nodes may not
+    form a cycle.
+
+    Args:
+        network (dict): 'nodes', 'values' and 'connections' of the network,
+            as described in the module docstring.
+
+    Returns:
+        (list[tuple]): The nodes, sorted so each node comes after the nodes
+            feeding it.
+        (list[tuple]): The connections, sorted by the order of their nodes.
+
+    """
+    nodes = list(network.get('nodes', []))
+    node_types = {}
+    for alias, node_key, _ in nodes:
+        if alias in node_types:
+            raise NameError('Node alias "{}" is used more than once.'.format(
+                alias))
+        node_types[alias] = _node_type(node_key)
+
+    for plug, _ in _items(network.get('values')):
+        _plug_size(plug, node_types)
+
+    connections = _items(network.get('connections'))
+    inputs = dict((alias, set()) for alias in node_types)
+    destinations = set()
+    for source, destination in connections:
+        if destination in destinations:
+            raise NameError('{} is connected more than once.'.format(
+                destination))
+        destinations.add(destination)
+
+        source_size = _plug_size(source, node_types)
+        destination_size = _plug_size(destination, node_types)
+        if source_size is not None and destination_size is not None and \
+                source_size != destination_size:
+            raise TypeError('Cannot connect {} ({}) to {} ({}).'.format(
+                source, source_size, destination, destination_size))
+
+        source_node = source.split('.', 1)[0]
+        destination_node = destination.split('.', 1)[0]
+        if source_node in node_types and destination_node in node_types:
+            inputs[destination_node].add(source_node)
+
+    # Kahn's algorithm, keeping the listed order of nodes where it can
+    order = []
+    remaining = [alias for alias, _, _ in nodes]
+    while remaining:
+        ready = [alias for alias in remaining if not inputs[alias]]
+        if not ready:
+            raise ValueError('Network nodes form a cycle: {}'.format(
+                ', '.join(remaining)))
+        for alias in ready:
+            order.append(alias)
+            remaining.remove(alias)
+            for alias_inputs in inputs.values():
+                alias_inputs.discard(alias)
+
+    rank = dict((alias, position) for position, alias in enumerate(order))
+    sorted_nodes = sorted(nodes, key=lambda spec: rank[spec[0]])
+    sorted_connections = sorted(
+        connections,
+        key=lambda connection: (rank.get(connection[0].split('.', 1)[0], -1),
+                                rank.get(connection[1].split('.', 1)[0], -1)))
+    return sorted_nodes, sorted_connections
+
+
+def _set_value(plug, value):
+    if isinstance(value, str):
+        cmds.setAttr(plug, value, type='string')
+    elif isinstance(value, (list, tuple)) and len(value) == 16:
+        cmds.setAttr(plug, value, type='matrix')
+    elif isinstance(value, (list, tuple)):
+        cmds.setAttr(plug, *value)
+    else:
+        cmds.setAttr(plug, value)
+
+
+def _resolve_plug(plug, names):
+    node_name, attribute = plug.split('.', 1)
+    return '{}.{}'.format(names.get(node_name, node_name), attribute)
+
+
+def build_network(network):
+    """
+    Builds a node network described as data.  The network is validated
+    before any node is made (see sort_network()).
+
+    Args:
+        network (dict): 'nodes', 'values' and 'connections' of the network,
+            as described in the module docstring.
+
+    Returns:
+        (dict): The alias of each network node with the name it was given.
+
+    """
+    nodes, connections = sort_network(network)
+
+    names = dict(zip([alias for alias, _, _ in nodes],
+                     node.create_nodes([(node_key, name)
+                                        for _, node_key, name in nodes])))
+
+    for plug, value in _items(network.get('values')):
+        _set_value(_resolve_plug(plug, names), value)
+
+    for source, destination in connections:
+        cmds.connectAttr(_resolve_plug(source, names),
+                         _resolve_plug(destination, names), force=True)
+
+    return names
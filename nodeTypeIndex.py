@@ -0,0 +1,150 @@
+"""
+Two way index between utility node types and the suffixes they are named
+with, built once from node_data and the loaded plugin nodes.  Used to find
+misnamed utility nodes in one pass, and to find every node of a type in a
+module through a TokenIndex instead of an ls(type=...) per type.
+"""
+import re
+import maya.cmds as cmds
+from collections import namedtuple
+from master_rigger import createNodeLibrary as node
+from master_rigger.data import node_data
+from master_rigger.nameIndex import parse_name
+
+Misnamed = namedtuple('Misnamed', ['node', 'node_type', 'suffix', 'expected'])
+
+# Node types Maya creates on its own, never named by the rigger
+UNNAMED_NODE_TYPES = ('unitConversion',)
+
+
+def is_default_name(node_name, node_type):
+    """
+    Returns if a node still has the name Maya gave it (ex. multiplyDivide3).
+    """
+    short_name = node_name.rsplit('|', 1)[-1].rsplit(':', 1)[-1]
+    return re.match(r'{}\d*$'.format(re.escape(node_type)), short_name) \
+        is not None
+
+
+class NodeTypeIndex(object):
+    """
+    Maps node types to their suffix and suffixes to the node types named
+    with them.  Plugin nodes are read from a PluginNodeCatalog, and the index
+    is rebuilt when the catalog changes (ex. a plugin was loaded).
+
+    Args:
+        plugin_catalog (PluginNodeCatalog): Plugin nodes to include.
+            createNodeLibrary.PLUGIN_CATALOG if not given.
+
+    """
+
+    def __init__(self, plugin_catalog=None):
+        self.plugin_catalog = plugin_catalog or node.PLUGIN_CATALOG
+        self._suffixes = None  # node type -> suffix
+        self._types = None     # suffix -> set of node types
+        self._version = None
+
+    def __repr__(self):
+        return 'NodeTypeIndex({} node types)'.format(len(self._index()[0]))
+
+    def _index(self):
+        if self._suffixes is not None and \
+                self._version == self.plugin_catalog.version:
+            return self._suffixes, self._types
+
+        self._suffixes = {}
+        self._types = {}
+        for suffix, builder in node_data.NODE_DICTIONARY.items():
+            node_type = node_data.CUSTOM_NODE_TYPES.get(suffix) or \
+                getattr(builder, 'args', [None])[0]
+            self._add(node_type, suffix)
+
+        for node_key in self.plugin_catalog.names():
+            self._add(self.plugin_catalog.node_type(node_key),
+                      self.plugin_catalog.suffix(node_key))
+
+        self._version = self.plugin_catalog.version
+        return self._suffixes, self._types
+
+    def _add(self, node_type, suffix):
+        if node_type is None:
+            return
+        # Custom nodes share their type with a plain node, which keeps it
+        if suffix not in node_data.CUSTOM_NODE_TYPES:
+            self._suffixes[node_type] = suffix
+        self._types.setdefault(suffix, set()).add(node_type)
+
+    def suffix(self, node_type):
+        """
+        Returns the suffix nodes of a type are named with, or None if the type
+        is not a known utility node.
+        """
+        return self._index()[0].get(node_type)
+
+    def node_types(self, suffix):
+        """
+        Returns the node types named with a suffix.
+        """
+        return sorted(self._index()[1].get(suffix, ()))
+
+    def suffixes(self):
+        return sorted(self._index()[1])
+
+    def find_misnamed(self, nodes=None):
+        """
+        Finds utility nodes whose suffix does not match their type, from a
+        single ls(showType=True) query.  Nodes of types that are not in the
+        index are ignored, as are nodes Maya named (unitConversion nodes and
+        default names such as multiplyDivide3).
+
+        Args:
+            nodes (list[str]): Nodes to check.  Every node in the scene if not
+                given.
+
+        Returns:
+            (list[Misnamed]): node, node_type, suffix and expected suffix of
+                each misnamed node.
+
+        """
+        if nodes is None:
+            listing = cmds.ls(showType=True) or []
+        elif nodes:
+            listing = cmds.ls(nodes, showType=True) or []
+        else:
+            return []
+
+        suffixes, types = self._index()
+        misnamed = []
+        for node_name, node_type in zip(listing[::2], listing[1::2]):
+            expected = suffixes.get(node_type)
+            if expected is None or node_type in UNNAMED_NODE_TYPES or \
+                    is_default_name(node_name, node_type):
+                continue
+            suffix = parse_name(node_name).suffix
+            if suffix == expected or node_type in types.get(suffix, ()):
+                continue
+            misnamed.append(Misnamed(node_name, node_type, suffix, expected))
+        return misnamed
+
+    def find(self, token_index, node_type, **tokens):
+        """
+        Returns the nodes of a type in a TokenIndex, found by their suffix.
+        (ex. find(index, 'multDoubleLinear', component='Arm', side='L'))
+
+        Args:
+            token_index (TokenIndex): Index of the nodes to search.
+            node_type (str): Node type to find.
+            **tokens: Other TokenIndex.find() fields to match (component,
+                side, name, index, under).
+
+        Returns:
+            (list[str]): Sorted long names of the matching nodes.
+
+        """
+        suffix = self.suffix(node_type)
+        if suffix is None:
+            raise KeyError('{} is not an indexed node type.'.format(node_type))
+        return token_index.find(suffix=suffix, **tokens)
+
+
+NODE_TYPE_INDEX = NodeTypeIndex()
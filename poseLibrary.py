@@ -0,0 +1,579 @@
+"""
+Rig pose library.  Many named poses are kept in one binary file, each pose
+being the control names (without namespaces) and one packed array of their
+translate, rotate and scale values.
+
+File layout (little-endian):
+    header:  magic 'MRPL', version (uint16), pose count (uint32)
+    pose:    name length (uint16), name (utf-8), control count (uint32),
+             control names (name length (uint16) + utf-8 each),
+             values (9 float64 per control, in CHANNELS order)
+
+Poses are applied through a name index built once, and only the channels
+that differ from the scene and can be set are written.
+
+Control values over a frame range are baked to a separate, append-only file
+(see BakeWriter and BakeReader).
+"""
+import os
+import mmap
+import struct
+from collections import OrderedDict
+import maya.cmds as cmds
+from maya_tools import fileDataIO as fio
+
+MAGIC = b'MRPL'
+VERSION = 1
+
+FILE_HEADER = struct.Struct('<4sHI')
+NAME_LENGTH = struct.Struct('<H')
+CONTROL_COUNT = struct.Struct('<I')
+
+CHANNELS = ('tx', 'ty', 'tz', 'rx', 'ry', 'rz', 'sx', 'sy', 'sz')
+# Differences smaller than this are not written
+TOLERANCE = 1e-5
+
+
+def strip_namespace(name):
+    return name.rsplit('|', 1)[-1].rsplit(':', 1)[-1]
+
+
+def _pack_name(name):
+    name = name.encode('utf-8')
+    return NAME_LENGTH.pack(len(name)) + name
+
+
+def _unpack_name(buffer, position):
+    length = NAME_LENGTH.unpack_from(buffer, position)[0]
+    position += NAME_LENGTH.size
+    return buffer[position:position + length].decode('utf-8'), \
+        position + length
+
+
+def pack_pose(name, pose):
+    """
+    Returns the bytes of one pose record.
+
+    Args:
+        name (str): Name of the pose.
+        pose (dict): Control names with their CHANNELS values.
+
+    """
+    controls = list(pose)
+    values = [value for control in controls for value in pose[control]]
+    data = [_pack_name(name), CONTROL_COUNT.pack(len(controls))]
+    data.extend(_pack_name(control) for control in controls)
+    data.append(struct.pack('<{}d'.format(len(values)), *values))
+    return b''.join(data)
+
+
+def unpack_pose(buffer, position):
+    """
+    Unpacks the pose record at position of a buffer.
+
+    Returns:
+        (str): Name of the pose.
+        (OrderedDict): Control names with their CHANNELS values.
+        (int): Position of the record after it.
+
+    """
+    name, position = _unpack_name(buffer, position)
+    control_count = CONTROL_COUNT.unpack_from(buffer, position)[0]
+    position += CONTROL_COUNT.size
+
+    controls = []
+    for _ in range(control_count):
+        control, position = _unpack_name(buffer, position)
+        controls.append(control)
+
+    value_count = control_count * len(CHANNELS)
+    values = struct.unpack_from('<{}d'.format(value_count), buffer, position)
+    position += 8 * value_count
+
+    channel_count = len(CHANNELS)
+    pose = OrderedDict(
+        (control, values[index * channel_count:(index + 1) * channel_count])
+        for index, control in enumerate(controls))
+    return name, pose, position
+
+
+def _json_pose(data):
+    """
+    Converts a pose saved as json by the older export_rig_pose().
+    """
+    return OrderedDict(
+        (control, tuple(values['translate']) + tuple(values['rotate']) +
+         tuple(values['scale']))
+        for control, values in sorted(data.items()))
+
+
+class PoseLibrary(object):
+    """
+    Named poses saved in one file.  The file is read the first time a pose
+    is asked for.  Pose files saved as json by the older export_rig_pose()
+    are read as a single pose named 'default'.
+
+    Args:
+        path (str): Path of the pose file.  It does not need to exist until a
+            pose is saved.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._poses = None
+
+    def __contains__(self, name):
+        return name in self._read()
+
+    def __len__(self):
+        return len(self._read())
+
+    def __repr__(self):
+        return 'PoseLibrary({!r})'.format(self.path)
+
+    def _read(self):
+        if self._poses is not None:
+            return self._poses
+
+        self._poses = OrderedDict()
+        if not os.path.isfile(self.path) or not os.path.getsize(self.path):
+            return self._poses
+
+        with open(self.path, 'rb') as pose_file:
+            buffer = pose_file.read()
+
+        if buffer[:len(MAGIC)] != MAGIC:
+            self._poses['default'] = _json_pose(fio.loadFromJson(self.path))
+            return self._poses
+
+        magic, version, pose_count = FILE_HEADER.unpack_from(buffer, 0)
+        if version > VERSION:
+            raise IOError('{} was saved with a newer pose library version '
+                          '({}).'.format(self.path, version))
+
+        position = FILE_HEADER.size
+        for _ in range(pose_count):
+            name, pose, position = unpack_pose(buffer, position)
+            self._poses[name] = pose
+        return self._poses
+
+    def names(self):
+        return list(self._read())
+
+    def get(self, name):
+        """
+        Returns a pose of the library.
+
+        Returns:
+            (OrderedDict): Control names with their CHANNELS values.
+
+        """
+        poses = self._read()
+        if name not in poses:
+            raise KeyError('"{}" is not a pose in {}.'.format(name, self.path))
+        return poses[name]
+
+    def add(self, name, pose):
+        """
+        Adds a pose to the library, replacing any pose with the same name, and
+        saves the file.
+        """
+        self._read()[name] = OrderedDict(
+            (control, tuple(values)) for control, values in pose.items())
+        self.save()
+
+    def remove(self, name):
+        self._read().pop(name, None)
+        self.save()
+
+    def save(self):
+        """
+        Writes every pose to a temporary file, then swaps it with the library.
+        """
+        poses = self._read()
+
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        # Written next to the library first so a failed save keeps every pose
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as pose_file:
+            pose_file.write(FILE_HEADER.pack(MAGIC, VERSION, len(poses)))
+            for name, pose in poses.items():
+                pose_file.write(pack_pose(name, pose))
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.rename(temp_path, self.path)
+
+
+def capture_pose(controls):
+    """
+    Reads the pose of controls.
+
+    Args:
+        controls (list[str]): The controls.
+
+    Returns:
+        (OrderedDict): Namespace stripped control names with their CHANNELS
+            values.
+
+    """
+    pose = OrderedDict()
+    for control in controls:
+        pose[strip_namespace(control)] = \
+            cmds.getAttr(control + '.translate')[0] + \
+            cmds.getAttr(control + '.rotate')[0] + \
+            cmds.getAttr(control + '.scale')[0]
+    return pose
+
+
+def control_index(controls=None, namespace=None):
+    """
+    Maps namespace stripped control names to the scene nodes, in one query.
+    Names shared by several nodes (ex. the same rig referenced twice) are
+    left out with a warning, pass the namespace of the rig to choose one.
+
+    Args:
+        controls (list[str]): Nodes to index.  Every transform in the scene
+            (or the namespace) if not given.
+        namespace (str): Only index nodes in this namespace.
+
+    Returns:
+        (dict): Stripped name of each node with its name in the scene.
+
+    """
+    if controls:
+        nodes = cmds.ls(controls, long=True) or []
+    elif namespace:
+        nodes = cmds.ls(namespace.rstrip(':') + ':*', type='transform',
+                        long=True) or []
+    else:
+        nodes = cmds.ls(type='transform', long=True) or []
+
+    index = {}
+    ambiguous = set()
+    for node in nodes:
+        name = strip_namespace(node)
+        if name in index:
+            ambiguous.add(name)
+        index[name] = node
+
+    if ambiguous:
+        for name in ambiguous:
+            del index[name]
+        cmds.warning('{} control names are used by more than one node (ex. '
+                     '{}), give a namespace to choose the rig.'.format(
+                         len(ambiguous), sorted(ambiguous)[0]))
+    return index
+
+
+def apply_pose(pose, controls=None, namespace=None):
+    """
+    Applies a pose.  Controls are found through one name index, and only the
+    channels that differ from the pose and can be set (not locked or
+    connected) are written.  Controls of the pose that are not found, and
+    given controls the pose does not have, are skipped and reported.  When
+    controls are given, only those are posed and the rest of the pose is not
+    reported as missing.
+
+    Args:
+        pose (dict): Control names with their CHANNELS values.
+        controls (list[str]): Controls to pose.  Every control of the pose
+            found in the scene (or the namespace) if not given.
+        namespace (str): Namespace of the rig to pose.
+
+    Returns:
+        (dict): 'set', the plugs that were changed, 'locked', the plugs that
+            differ but could not be set, 'missing', the pose controls that
+            were not found, and 'unposed', the given controls the pose does
+            not have.
+
+    """
+    index = control_index(controls, namespace)
+    report = {'set': [], 'locked': [], 'missing': [], 'unposed': []}
+
+    if controls:
+        report['unposed'] = sorted(node for name, node in index.items()
+                                   if name not in pose)
+        pose = dict((control, values) for control, values in pose.items()
+                    if control in index)
+
+    cmds.undoInfo(openChunk=True)
+    try:
+        for control, values in pose.items():
+            node = index.get(control)
+            if node is None:
+                report['missing'].append(control)
+                continue
+
+            current = cmds.getAttr(node + '.translate')[0] + \
+                cmds.getAttr(node + '.rotate')[0] + \
+                cmds.getAttr(node + '.scale')[0]
+            for channel, value, current_value in zip(CHANNELS, values,
+                                                     current):
+                if abs(value - current_value) < TOLERANCE:
+                    continue
+                plug = '{}.{}'.format(node, channel)
+                if not cmds.getAttr(plug, settable=True):
+                    report['locked'].append(plug)
+                    continue
+                cmds.setAttr(plug, value)
+                report['set'].append(plug)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    if report['missing'] or report['unposed']:
+        cmds.warning('Pose partially applied: {} pose controls not found, {} '
+                     'controls not in the pose.'.format(
+                         len(report['missing']), len(report['unposed'])))
+    return report
+
+
+# Animation bakes ----------------------------------------------------------- #
+# Control values over a frame range, appended to the file in chunks of rows:
+#     header:  magic 'MRAB', version (uint16), chunk size (uint32), control
+#              count (uint32), control names (name length (uint16) + utf-8)
+#     chunk:   row count (uint32), then one column after the other: the
+#              frames, then each CHANNELS value of each control (float64)
+# A chunk is only written once full, so memory stays the same for any length
+# of shot, and a control or frame range is read without unpacking the rest.
+BAKE_MAGIC = b'MRAB'
+BAKE_VERSION = 1
+BAKE_HEADER = struct.Struct('<4sHII')
+ROW_COUNT = struct.Struct('<I')
+
+
+class BakeWriter(object):
+    """
+    Writes control values frame by frame to a bake file.  An existing file
+    with the same controls is appended to.
+
+    Args:
+        path (str): Path of the bake file.
+        controls (list[str]): Control names, namespaces are stripped.
+        chunk_size (int): Rows kept in memory before they are written.
+
+    """
+
+    def __init__(self, path, controls, chunk_size=256):
+        self.path = path
+        self.controls = [strip_namespace(control) for control in controls]
+        self.chunk_size = chunk_size
+        self._rows = []
+
+        if os.path.isfile(path) and os.path.getsize(path):
+            reader = BakeReader(path)
+            existing = reader.controls
+            reader.close()
+            if existing != self.controls:
+                raise IOError('{} was baked from other controls.'.format(path))
+            self._file = open(path, 'ab')
+        else:
+            directory = os.path.dirname(path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            self._file = open(path, 'wb')
+            self._file.write(BAKE_HEADER.pack(BAKE_MAGIC, BAKE_VERSION,
+                                              chunk_size, len(self.controls)))
+            for control in self.controls:
+                self._file.write(_pack_name(control))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add_frame(self, frame, values):
+        """
+        Adds a row to the bake.
+
+        Args:
+            frame (float): The frame sampled.
+            values (list[float]): CHANNELS values of every control, in the
+                order of the controls.
+
+        """
+        self._rows.append([frame] + list(values))
+        if len(self._rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the rows kept in memory as a chunk.
+        """
+        if not self._rows:
+            return
+        columns = zip(*self._rows)
+        self._file.write(ROW_COUNT.pack(len(self._rows)))
+        for column in columns:
+            self._file.write(struct.pack('<{}d'.format(len(column)), *column))
+        self._file.flush()
+        self._rows = []
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+
+class BakeReader(object):
+    """
+    Memory-maps a bake file written by BakeWriter.  Only the chunk row counts
+    are read when it is opened, values are unpacked when sliced.
+
+    Args:
+        path (str): Path of the bake file.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._buffer = mmap.mmap(self._file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+
+        magic, version, self.chunk_size, control_count = \
+            BAKE_HEADER.unpack_from(self._buffer, 0)
+        if magic != BAKE_MAGIC:
+            self.close()
+            raise IOError('{} is not a bake file.'.format(path))
+        if version > BAKE_VERSION:
+            self.close()
+            raise IOError('{} was saved with a newer bake version ({}).'.format(
+                path, version))
+
+        position = BAKE_HEADER.size
+        self.controls = []
+        for _ in range(control_count):
+            control, position = _unpack_name(self._buffer, position)
+            self.controls.append(control)
+
+        # (position of the first column, row count) of each chunk
+        self._chunks = []
+        column_count = 1 + control_count * len(CHANNELS)
+        while position < len(self._buffer):
+            row_count = ROW_COUNT.unpack_from(self._buffer, position)[0]
+            position += ROW_COUNT.size
+            self._chunks.append((position, row_count))
+            position += 8 * row_count * column_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return sum(row_count for _, row_count in self._chunks)
+
+    def close(self):
+        if self._buffer is not None:
+            self._buffer.close()
+        if self._file is not None:
+            self._file.close()
+        self._buffer = None
+        self._file = None
+
+    def _column(self, chunk, column, first=0, last=None):
+        position, row_count = chunk
+        last = row_count if last is None else last
+        return struct.unpack_from(
+            '<{}d'.format(last - first), self._buffer,
+            position + 8 * (column * row_count + first))
+
+    def frames(self):
+        frames = []
+        for chunk in self._chunks:
+            frames.extend(self._column(chunk, 0))
+        return frames
+
+    def read(self, controls=None, start=None, end=None):
+        """
+        Reads a slice of the bake.
+
+        Args:
+            controls (list[str]): Controls to read, namespaces are stripped.
+                Every control if not given.
+            start (float): First frame to read.  Start of the bake if not
+                given.
+            end (float): Last frame to read.  End of the bake if not given.
+
+        Returns:
+            (list[float]): The frames read.
+            (OrderedDict): Each control with the CHANNELS values of every
+                frame read.
+
+        """
+        if controls is None:
+            controls = self.controls
+        columns = []
+        for control in controls:
+            control = strip_namespace(control)
+            if control not in self.controls:
+                raise KeyError('{} is not in the bake {}.'.format(
+                    control, self.path))
+            first_column = 1 + self.controls.index(control) * len(CHANNELS)
+            columns.append((control, first_column))
+
+        frames = []
+        values = OrderedDict((control, []) for control, _ in columns)
+        for chunk in self._chunks:
+            chunk_frames = self._column(chunk, 0)
+            rows = [row for row, frame in enumerate(chunk_frames)
+                    if (start is None or frame >= start) and
+                    (end is None or frame <= end)]
+            if not rows:
+                continue
+            first, last = rows[0], rows[-1] + 1
+            frames.extend(chunk_frames[first:last])
+            for control, first_column in columns:
+                channels = [self._column(chunk, first_column + channel,
+                                         first, last)
+                            for channel in range(len(CHANNELS))]
+                values[control].extend(zip(*channels))
+        return frames, values
+
+
+def bake_controls(path, controls, start, end, step=1, chunk_size=256):
+    """
+    Samples controls over a frame range and streams the values to a bake
+    file, one chunk at a time.
+
+    Args:
+        path (str): Path of the bake file.
+        controls (list[str]): The controls.
+        start (float): First frame.
+        end (float): Last frame, included.
+        step (float): Frames between samples.
+        chunk_size (int): Rows kept in memory before they are written.
+
+    Returns:
+        (int): Number of frames sampled.
+
+    """
+    current_time = cmds.currentTime(query=True)
+    plugs = [control + attribute for control in controls
+             for attribute in ('.translate', '.rotate', '.scale')]
+
+    count = 0
+    cmds.refresh(suspend=True)
+    try:
+        with BakeWriter(path, controls, chunk_size=chunk_size) as writer:
+            frame = start
+            while frame <= end:
+                cmds.currentTime(frame, update=True)
+                values = []
+                for plug in plugs:
+                    values.extend(cmds.getAttr(plug)[0])
+                writer.add_frame(frame, values)
+                count += 1
+                frame = start + count * step
+    finally:
+        cmds.currentTime(current_time, update=True)
+        cmds.refresh(suspend=False)
+    return count
@@ -1,13 +1,15 @@
+import re
 import maya.cmds as cmds
 import pymel.core as pm
-from string import ascii_uppercase
+from maya.api import OpenMaya as om
+from itertools import count, islice
 from functools import partial
+from collections import OrderedDict
 from PySide2 import QtWidgets, QtCore, QtGui
 from maya_tools import mayaFrameWidget
 import Splitter
-
-LETTERS_INDEX = {index: letter for index, letter in
-                 enumerate(ascii_uppercase, start=1)}
+# alpha_index and alpha_label are kept importable from here for older tools
+from master_rigger.nameIndex import NameIndex, alpha_index, alpha_label
 
 
 def get_short_name(longname):
@@ -17,17 +19,370 @@ def get_short_name(longname):
     return longname.rsplit('|', 1)[-1]
 
 
-def get_long_name(name):
+def get_long_name(name, name_index=None):
     """
-    Returns the longname of an object.
+    Returns the longname of an object.  Resolved through name_index without
+    querying the scene when one is given.
     """
+    if name_index is not None:
+        return name_index.long_name(name)
     return cmds.ls(name, long=True)[0]
 
 
+def _split_pattern(new_name):
+    """
+    Splits a rename pattern around its run of '#' padding characters.
+
+    Args:
+        new_name (str): Name pattern containing at least one '#'.
+
+    Returns:
+        (tuple): The text before the padding, the padding length, and the text
+            after the padding.
+
+    """
+    padding = re.search('#+', new_name)
+    if not padding:
+        raise KeyError('Could not find any "#" in name.')
+
+    return (new_name[:padding.start()],
+            len(padding.group()),
+            new_name[padding.end():])
+
+
+class RenamePlan(object):
+    """
+    Ordered list of renames computed before anything in the scene is touched.
+    Each entry is a (long_name, new_short_name) pair.  Once applied, the
+    resulting node names are stored in the same order under `results` so the
+    plan can be logged or replayed with apply_rename_plan().
+    """
+
+    def __init__(self, entries=None, collisions=None):
+        self.entries = list(entries or [])
+        self.collisions = list(collisions or [])
+        self.results = []
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return 'RenamePlan({} renames, {} collisions)'.format(
+            len(self.entries), len(self.collisions))
+
+    def targets(self):
+        return [new_name for _, new_name in self.entries]
+
+    def to_list(self):
+        """
+        Returns the plan as a plain list of [long_name, new_name] pairs for
+        logging or saving to disk.
+        """
+        return [list(entry) for entry in self.entries]
+
+
+def _resolve_nodes(name_list):
+    """
+    Returns the long names of the provided list, or of the selection if no
+    list is given.
+    """
+    if name_list:
+        return cmds.ls(name_list, long=True) or []
+    return cmds.ls(selection=True, long=True) or []
+
+
+def find_collisions(entries, name_index=None):
+    """
+    Checks the target names of a rename plan against each other and against
+    the names already in the scene.  Nodes that are part of the plan do not
+    count against the scene since they will be renamed away.
+
+    Args:
+        entries (list[tuple]): (long_name, new_short_name) pairs.
+        name_index (NameIndex): Index of the scene names.  Built once from the
+            scene if not given.
+
+    Returns:
+        (list[str]): Target names that would not be unique after renaming.
+
+    """
+    if name_index is None:
+        name_index = NameIndex()
+
+    renamed = set(long_name for long_name, _ in entries)
+    seen = set()
+    collisions = []
+    for _, new_name in entries:
+        taken = any(path not in renamed for path in name_index.paths(new_name))
+        if (taken or new_name in seen) and new_name not in collisions:
+            collisions.append(new_name)
+        seen.add(new_name)
+
+    return collisions
+
+
+def _warn_collisions(plan, name_index):
+    """
+    Warns about the target names of a plan that are already in use, with the
+    paths of the nodes holding or given each of them.
+    """
+    if not plan.collisions:
+        return
+
+    renamed = set(long_name for long_name, _ in plan.entries)
+    given = {}
+    for long_name, new_name in plan.entries:
+        given.setdefault(new_name, []).append(long_name)
+
+    conflicts = []
+    for new_name in plan.collisions:
+        paths = [path for path in name_index.paths(new_name)
+                 if path not in renamed] + given.get(new_name, [])
+        conflicts.append('{} ({})'.format(new_name, ', '.join(paths)))
+    cmds.warning('Names already in use: {}'.format('; '.join(conflicts)))
+
+
+def plan_list_rename(new_name, numeric_index=True, start_number=1,
+                     upper_case=True, end_name=False, name_list=None,
+                     name_index=None):
+    """
+    Computes every new name for list_renamer() without touching the scene.
+    Arguments match list_renamer().
+
+    Returns:
+        (RenamePlan): The ordered renames and any name collisions found.
+
+    """
+    name_list = _resolve_nodes(name_list)
+    head, padding, tail = _split_pattern(new_name)
+
+    labels = _list_labels(padding, numeric_index, start_number, upper_case)
+    entries = [(long_name, head + label + tail)
+               for long_name, label in zip(name_list, labels)]
+
+    # Last object in the list gets 'END' in place of its index
+    if end_name and entries:
+        entries[-1] = (entries[-1][0], head + 'END' + tail)
+
+    return RenamePlan(entries, find_collisions(entries, name_index))
+
+
+def _list_labels(padding, numeric_index=True, start_number=1, upper_case=True):
+    """
+    Returns a lazy generator of the index labels list_renamer() gives out.
+    """
+    if numeric_index:
+        return (str(number).zfill(padding)
+                for number in count(max(0, start_number)))
+    return alpha_index(start_number, upper_case)
+
+
+class RenamePreview(object):
+    """
+    Resolves the names list_renamer() would give to a list of nodes, for
+    display while a pattern is being typed.  Only the first and last
+    preview_count names are returned, collisions are checked for the whole
+    list against a NameIndex.
+
+    Index labels are cached per numbering setting.  Every target name shares
+    the text around the '#', so collisions are cached per (head, tail) of the
+    pattern and each target name is looked up in the index once.  Editing the
+    text back to an earlier pattern (ex. backspace) reuses its result.  Call
+    invalidate() when the scene names change.
+    """
+
+    # Number of (head, tail) results kept
+    cache_size = 32
+
+    def __init__(self, preview_count=3, name_index=None):
+        self.preview_count = preview_count
+        self.name_index = name_index
+        self.nodes = []
+        self._label_settings = None
+        self._labels = []
+        self._duplicate_labels = set()
+        self._collisions = OrderedDict()
+        self._taken = {}
+
+    def set_nodes(self, nodes, name_index=None):
+        """
+        Sets the long names of the nodes to preview.  Cached labels are kept
+        unless the nodes changed.
+        """
+        nodes = list(nodes)
+        if name_index is not None and name_index is not self.name_index:
+            self.name_index = name_index
+            self.invalidate()
+        if nodes != self.nodes:
+            self.nodes = nodes
+            self._label_settings = None
+            self.invalidate()
+
+    def invalidate(self):
+        """
+        Drops the cached collisions, for when nodes were renamed.
+        """
+        self._collisions.clear()
+        self._taken = {}
+
+    def _preview_positions(self):
+        node_count = len(self.nodes)
+        if node_count <= self.preview_count * 2:
+            return list(range(node_count))
+        return (list(range(self.preview_count))
+                + list(range(node_count - self.preview_count, node_count)))
+
+    def _is_taken(self, new_name):
+        """
+        Returns if a node outside of the previewed nodes holds a name.
+        """
+        if new_name not in self._taken:
+            if self.name_index is None:
+                self.name_index = NameIndex()
+            renamed = set(self.nodes)
+            self._taken[new_name] = any(
+                path not in renamed for path in self.name_index.paths(new_name))
+        return self._taken[new_name]
+
+    def _find_collisions(self, head, tail):
+        key = (head, tail)
+        if key in self._collisions:
+            collisions = self._collisions.pop(key)
+        else:
+            collisions = []
+            found = set()
+            for label in self._labels:
+                new_name = head + label + tail
+                if new_name in found:
+                    continue
+                if label in self._duplicate_labels or self._is_taken(new_name):
+                    collisions.append(new_name)
+                    found.add(new_name)
+            while len(self._collisions) >= self.cache_size:
+                self._collisions.popitem(last=False)
+        self._collisions[key] = collisions
+        return collisions
+
+    def resolve(self, new_name, numeric_index=True, start_number=1,
+                upper_case=True, end_name=False):
+        """
+        Arguments match list_renamer().
+
+        Returns:
+            (list[tuple]): (position, new_name, collides) for the first and last
+                previewed nodes.
+            (list[str]): Every target name in the list that would collide.
+
+        """
+        head, padding, tail = _split_pattern(new_name)
+
+        settings = (padding, numeric_index, start_number, upper_case, end_name)
+        if settings != self._label_settings:
+            self._labels = list(islice(
+                _list_labels(padding, numeric_index, start_number, upper_case),
+                len(self.nodes)))
+            if end_name and self._labels:
+                self._labels[-1] = 'END'
+            seen = set()
+            self._duplicate_labels = set()
+            for label in self._labels:
+                if label in seen:
+                    self._duplicate_labels.add(label)
+                seen.add(label)
+            self._label_settings = settings
+            self._collisions.clear()
+
+        collisions = self._find_collisions(head, tail)
+
+        colliding = set(collisions)
+        rows = []
+        for position in self._preview_positions():
+            target = head + self._labels[position] + tail
+            rows.append((position, target, target in colliding))
+        return rows, collisions
+
+
+def _rename(long_name, new_name, name_index=None):
+    """
+    Renames a node by its long name, updating name_index if one is given.
+
+    Returns:
+        (tuple): The resulting short name and long name of the node.
+
+    """
+    result = cmds.rename(long_name, new_name)
+    if '|' not in long_name:
+        new_long_name = result
+    else:
+        new_long_name = '{}|{}'.format(long_name.rpartition('|')[0], result)
+
+    if name_index is not None:
+        name_index.rename(long_name, new_long_name)
+    return result, new_long_name
+
+
+def apply_rename_plan(plan, name_index=None):
+    """
+    Applies a rename plan in a single ordered pass wrapped in one undo chunk.
+    Renames run deepest-first so renaming a parent never invalidates the long
+    name of a child still waiting to be renamed.  Nodes holding a name that
+    another node in the plan needs are moved to a temporary name first.
+
+    Args:
+        plan (RenamePlan) or (list[tuple]): The plan to apply.  Plain lists of
+            (long_name, new_name) pairs are accepted to replay saved plans.
+        name_index (NameIndex): Index to keep updated with the new names.
+
+    Returns:
+        (RenamePlan): The applied plan, with the resulting names stored in
+            `results` in plan order.
+
+    """
+    if not isinstance(plan, RenamePlan):
+        plan = RenamePlan([tuple(entry) for entry in plan])
+
+    paths = [long_name for long_name, _ in plan.entries]
+    order = sorted(range(len(paths)), key=lambda i: -paths[i].count('|'))
+
+    targets = set(plan.targets())
+    blocking = [
+        index for index in order
+        if get_short_name(paths[index]) in targets
+        and get_short_name(paths[index]) != plan.entries[index][1]
+    ]
+
+    results = [None] * len(paths)
+    cmds.undoInfo(openChunk=True)
+    try:
+        for index in blocking:
+            old_path = paths[index]
+            _, new_path = _rename(old_path, 'renameTemp_#', name_index)
+            # Only the temporary pass can leave stale child paths behind
+            for i, path in enumerate(paths):
+                if path == old_path or path.startswith(old_path + '|'):
+                    paths[i] = new_path + path[len(old_path):]
+
+        for index in order:
+            new_name = plan.entries[index][1]
+            if get_short_name(paths[index]) == new_name:
+                results[index] = new_name
+                continue
+            results[index] = _rename(paths[index], new_name, name_index)[0]
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    plan.results = results
+    return plan
+
+
 # TODO: Kwargs: numeric_index, start_number?, upper_case, end_name,
 # TODO: name_list should be required and renamed
 def list_renamer(new_name, numeric_index=True, start_number=1,
-                 upper_case=True, end_name=False, name_list=[]):
+                 upper_case=True, end_name=False, name_list=[],
+                 name_index=None):
     """
     Renamer tool for renaming lists of objects.  Default works based off
     selection, but can take a list parameter when function is passed with larger
@@ -47,94 +402,168 @@ def list_renamer(new_name, numeric_index=True, start_number=1,
         name_list (list[str]): Assign the function to perform based on a list
             input not limited to selection.  Only active when selection argument
             is False.
+        name_index (NameIndex): Scene name index used for collision checks and
+            kept updated with the new names.  Built once if not given.
 
     Returns:
         (list): List of all the newly named nodes.
 
     """
-    if name_list:
-        # ensure pymel nodes
-        name_list = pm.ls(name_list)
-    else:
-        name_list = pm.ls(selection=True)
+    if name_index is None:
+        name_index = NameIndex()
 
-    index_start = max(0, start_number)
+    plan = plan_list_rename(new_name,
+                            numeric_index=numeric_index,
+                            start_number=start_number,
+                            upper_case=upper_case,
+                            end_name=end_name,
+                            name_list=name_list,
+                            name_index=name_index)
+    _warn_collisions(plan, name_index)
 
-    if '#' not in new_name:
-        # Give this a proper error
-        raise KeyError('Could not find any "#" in name.')
+    return apply_rename_plan(plan, name_index).results
 
-    number_padding = new_name.count('#')
 
-    new_name_list = []
-    # Numeric renaming
-    if numeric_index:
-        name_replace = new_name.replace(
-            ('#' * number_padding), '%0{pad}d'.format(pad=number_padding))
-        index = index_start
+def _rename_short_names(edit, name_list=None, name_index=None):
+    """
+    Renames every node of the list (or selection) to the result of calling
+    edit on its short name.  Nodes whose name does not change are skipped.
+
+    Returns:
+        (list): List of all the newly named nodes.
+
+    """
+    entries = []
+    seen = set()
+    for long_name in _resolve_nodes(name_list):
+        if long_name in seen:
+            continue
+        seen.add(long_name)
+        short_name = get_short_name(long_name)
+        new_name = edit(short_name)
+        if new_name != short_name:
+            entries.append((long_name, new_name))
+
+    return apply_rename_plan(RenamePlan(entries), name_index).results
+
+
+def _affix_mode(add, replace, remove):
+    """
+    Returns the mode name of the single add/replace/remove flag that is set.
+    """
+    if (add and replace) or (add and remove) or (replace and remove):
+        raise KeyError('Can only set one type flag at a time!  Use only one of'
+                       ' the following: add, replace, remove.')
+
+    if not add and not replace and not remove:
+        raise KeyError('No argument specified for the function to perform!  '
+                       'Set a value of True to one of the following: add, '
+                       'replace, remove.')
 
-        for i in name_list:
-            i.rename(name_replace % index)
+    if add:
+        return 'add'
+    if replace:
+        return 'replace'
+    return 'remove'
 
-            new_name_list.append(i.name())
-            index += 1
 
-    # Alphanumeric renaming
+def edit_affix(tokens, affix, mode, suffix=False):
+    """
+    Adds, replaces or removes the first (prefix) or last (suffix) token of a
+    name split on '_'.  A name made of a single token has no prefix or suffix,
+    so replacing adds one and removing leaves the name alone.  A dangling '_'
+    counts as an empty prefix/suffix.
+
+    Args:
+        tokens (list[str]): The name split on '_'.
+        affix (str): The prefix/suffix to set.  When removing, only a matching
+            token is removed, or any if no affix is given.
+        mode (str): 'add', 'replace' or 'remove'.
+        suffix (bool): Work on the last token instead of the first.
+
+    Returns:
+        (list[str]): The new name tokens.
+
+    """
+    # Work from the front of the name, suffixes on the reversed tokens
+    tokens = list(reversed(tokens)) if suffix else list(tokens)
+    if len(tokens) > 1 and (tokens[0] == '' or any(tokens[1:])):
+        current = tokens[0]
     else:
-        name_replace = new_name.replace(('#' * number_padding), '%s')
-        # If index is not 0, the index will be changed to start letters at
-        # appropriate alphanumeric count
-        if index_start > 0:
-            index = index_start
+        current = None
+
+    if mode == 'add':
+        # Never stack the same affix twice (ex. '_CND_CND')
+        if current == '':
+            tokens[0] = affix
+        elif current != affix:
+            tokens.insert(0, affix)
+    elif mode == 'replace':
+        if current is None:
+            tokens.insert(0, affix)
         else:
-            index = 1
-
-        if name_list > 26:
-            pass
-
-            # index[27] == 'aa'
-        letter_index = None
-        overlap_count = 0
-        for i in name_list:
-            # Remainder division (not substitution)
-            continuous_index = index % 27
-
-            if continuous_index < index:
-                overlap_count = overlap_count + 1
-                letter_index = LETTERS_INDEX[overlap_count]
-                index = 1
-            if letter_index:
-                if upper_case:
-                    alpha_index = letter_index + LETTERS_INDEX[index]
-                else:
-                    alpha_index = letter_index.lower() \
-                                   + str(LETTERS_INDEX[index]).lower()
-
-            else:
-                if upper_case:
-                    alpha_index = LETTERS_INDEX[index]
-                else:
-                    alpha_index = str(LETTERS_INDEX[index]).lower()
-
-            i.rename(name_replace % alpha_index)
-            new_name_list.append(i.name())
-            index += 1
-
-    # After indexes are all named, check if last object should be an 'end'
-    if end_name:
-        name_parts = new_name.split('#')
-        end_name = '{pre}END{post}'.format(pre=name_parts[0], post=name_parts[-1])
-        endNode = pm.ls(new_name_list[-1])[0]
-        endNode.rename(end_name)
-        new_name_list[-1] = endNode.name()
-
-    return new_name_list
+            tokens[0] = affix
+    elif mode == 'remove':
+        if current is not None and (current in ('', affix) or not affix):
+            tokens.pop(0)
+    else:
+        raise KeyError('Unknown mode "{}", use one of: add, replace, '
+                       'remove.'.format(mode))
+
+    if suffix:
+        tokens.reverse()
+    return tokens
+
+
+def plan_affix_rename(affix, mode, suffix=False, name_list=None,
+                      name_index=None):
+    """
+    Computes the prefix/suffix renames of a list of nodes without touching the
+    scene.  Each name is parsed into tokens once, and nodes whose name would
+    not change are left out of the plan.
+
+    Args:
+        affix (str): The prefix/suffix to add, replace or remove.
+        mode (str): 'add', 'replace' or 'remove'.
+        suffix (bool): Edit the suffix instead of the prefix.
+        name_list (list[str]): Nodes to rename.  Selection is used if not
+            given.
+        name_index (NameIndex): Index of the scene names for collision checks.
+
+    Returns:
+        (RenamePlan): The renames and any name collisions found.
+
+    """
+    entries = []
+    seen = set()
+    for long_name in _resolve_nodes(name_list):
+        if long_name in seen:
+            continue
+        seen.add(long_name)
+        short_name = get_short_name(long_name)
+        new_name = '_'.join(
+            edit_affix(short_name.split('_'), affix, mode, suffix))
+        if new_name and new_name != short_name:
+            entries.append((long_name, new_name))
+
+    return RenamePlan(entries, find_collisions(entries, name_index))
+
+
+def _apply_affix(affix, mode, suffix, name_list, name_index):
+    if name_index is None:
+        name_index = NameIndex()
+
+    plan = plan_affix_rename(affix, mode, suffix=suffix, name_list=name_list,
+                             name_index=name_index)
+    _warn_collisions(plan, name_index)
+
+    return apply_rename_plan(plan, name_index).results
 
 
 # TODO: add/replace/remove changed to method, made required
 # TODO: name_list made required
 def set_prefix(input_prefix='', add=False, replace=False, remove=False,
-               name_list=[]):
+               name_list=[], name_index=None):
     """
     Prefix setting tool.  Allows for a prefix to be added, replaced, or removed
     based on user input.  Users must declare one of the Procedure Type Arguments
@@ -143,152 +572,150 @@ def set_prefix(input_prefix='', add=False, replace=False, remove=False,
     function is passed with larger tools and functions.
 
     Args:
-        input_prefix (str): Assign the string value to add as a prefix.
+        input_prefix (str): Assign the string value to add as a prefix.  When
+            removing, only this prefix is removed, or any prefix if empty.
         Procedure Type Arguments:
             add (bool): Assign the function to add a new prefix
             replace (bool): Assign the function to replace an existing prefix
             remove (bool): Assign the function to remove an existing prefix.
         name_list (list[str]): Allows for a provided list to be performed on.
             Only works if selection flag is False.
+        name_index (NameIndex): Scene name index used for collision checks and
+            kept updated with the new names.
 
-    """
-    if (add and replace) or (add and remove) or (replace and remove):
-        raise KeyError('Can only set one type flag at a time!  Use only one of'
-                   ' the following: add, replace, remove.')
-
-    if not add and not replace and not remove:
-        raise KeyError('No argument specified for the function to perform!  Set a '
-                   'value of True to one of the following: add, replace, '
-                   'remove.')
+    Returns:
+        (list): List of all the newly named nodes.
 
-    if name_list:
-        # ensure pymel nodes
-        name_list = pm.ls(name_list)
-    else:
-        name_list = pm.ls(selection=True)
+    """
+    mode = _affix_mode(add, replace, remove)
 
-    name_return_list = []
     if input_prefix.endswith('_'):
         input_prefix = input_prefix[:-1]
 
-    if add:
-        if input_prefix == '':
-            raise KeyError('No prefix given!')
-        for i in name_list:
-            short_i = get_short_name(i)
-            if i.startswith('_'):
-                i.rename('%s_%s' % (input_prefix, i[1:]))
-            else:
-                i.rename('%s_%s' % (input_prefix, short_i))
-            name_return_list.append(i.name())
-        return name_return_list
+    if mode != 'remove' and input_prefix == '':
+        raise KeyError('No prefix given!')
 
-    if replace:
-        if input_prefix == '':
-            raise KeyError('No prefix given!')
-        for obj in name_list:
-            if obj.startswith('_'):
-                obj.rename(input_prefix + obj)
-            else:
-                name_parts = obj.split('_')
-                obj.rename('_'.join([input_prefix] + name_parts[1:]))
-            name_return_list.append(obj.name())
-        return name_return_list
-
-    if remove:
-        for obj in name_list:
-            if obj.startswith('_'):
-                obj.rename(obj[1:])
-                name_return_list.append(obj.name())
-            else:
-                name_parts = obj.split('_')
-                obj.rename('_'.join(name_parts[1:]))
-                name_return_list.append(obj.name())
-        return name_return_list
+    return _apply_affix(input_prefix, mode, False, name_list, name_index)
 
 
 # TODO: add/replace/remove changed to method, made required
 # TODO: name_list made required
 def set_suffix(input_suffix, add=True, replace=False, remove=False,
-               name_list=[]):
+               name_list=[], name_index=None):
     """
-    Prefix setting tool.  Allows for a suffix to be added, replaced, or removed
+    Suffix setting tool.  Allows for a suffix to be added, replaced, or removed
     based on user input.  Users must declare one of the Procedure Type Arguments
     to be True, and leave the other two as False for the function to run.
     Default works based off selection, but can take a list parameter when
     function is passed with larger tools and functions.
 
     Args:
-        input_suffix (str): Assign the string value to add as a suffix.
+        input_suffix (str): Assign the string value to add as a suffix.  When
+            removing, only this suffix is removed, or any suffix if empty.
         Procedure Type Arguments:
             add (bool): Assign the function to add a new suffix
             replace (bool): Assign the function to replace an existing suffix
             remove (bool): Assign the function to remove an existing suffix.
         name_list (list[str]): Allows for a provided list to be performed on.
             Only works if selection flag is False.
+        name_index (NameIndex): Scene name index used for collision checks and
+            kept updated with the new names.
 
-    """
-    if (add and replace) or (add and remove) or (replace and remove):
-        pm.error('Can only set one type flag at a time!  Use only one of'
-                   ' the following: add, replace, remove.')
-
-    if not add and not replace and not remove:
-        pm.error('No argument specified for the function to perform!  Set a '
-                   'value of True to one of the following: add, replace, '
-                   'remove.')
+    Returns:
+        (list): List of all the newly named nodes.
 
-    if name_list:
-        # ensure pymel nodes
-        name_list = pm.ls(name_list)
-    else:
-        name_list = pm.ls(selection=True)
+    """
+    mode = _affix_mode(add, replace, remove)
 
-    name_return_list = []
     if input_suffix.startswith('_'):
         input_suffix = input_suffix[1:]
 
-    if add:
-        if input_suffix == '':
-            raise KeyError('No suffix given!')
-        for obj in name_list:
-            if obj.endswith('_'):
-                obj.rename('%s%s' % (obj, input_suffix))
-            else:
-                obj.rename('%s_%s' % (obj, input_suffix))
-            name_return_list.append(obj.name())
-        return name_return_list
+    if mode != 'remove' and input_suffix == '':
+        raise KeyError('No suffix given!')
 
-    if replace:
-        if input_suffix == '':
-            raise KeyError('No suffix given!')
-        for obj in name_list:
-            if obj.endswith('_'):
-                obj.rename(obj, obj + input_suffix)
-            else:
-                name_parts = obj.split('_')
-                obj.rename('_'.join(name_parts[:-1] + [input_suffix]))
-                name_return_list.append(obj.name())
-        return name_return_list
-
-    if remove:
-        for obj in name_list:
-            if obj.endswith('_'):
-                obj.rename(obj[:-1])
-                name_return_list.append(obj.name())
-            else:
-                name_parts = obj.split('_')
-                obj.rename('_'.join(name_parts[:-1]))
-                name_return_list.append(obj.name())
-        return name_return_list
-
-
-# Make this work, long and short names cause hell
-def search_replace_name(search_input, replace_output, hierarchy=False,
-                        input_objects=[]):
+    return _apply_affix(input_suffix, mode, True, name_list, name_index)
+
+
+class RenameRule(object):
+    """
+    A single search/replace rule.  Literal rules are plain string replacements,
+    regex rules are compiled once and reused for every name.
+    """
+
+    def __init__(self, search, replace='', regex=False):
+        self.search = search
+        self.replace = replace
+        self.regex = regex
+        self.pattern = re.compile(search) if regex else None
+
+    def __repr__(self):
+        return 'RenameRule({!r}, {!r}, regex={})'.format(
+            self.search, self.replace, self.regex)
+
+    def apply(self, name):
+        if self.pattern is not None:
+            return self.pattern.sub(self.replace, name)
+        return name.replace(self.search, self.replace)
+
+
+def compile_rules(rules):
+    """
+    Builds the ordered rule list used by search_replace_name().
+
+    Args:
+        rules (list): RenameRule objects, or (search, replace) and
+            (search, replace, regex) tuples.
+
+    Returns:
+        (function): Applies every rule in order to a name and returns the
+            result.
+
+    """
+    compiled = []
+    for rule in rules:
+        if not isinstance(rule, RenameRule):
+            rule = RenameRule(*rule)
+        if rule.search:
+            compiled.append(rule)
+
+    def apply_rules(name):
+        for rule in compiled:
+            name = rule.apply(name)
+        return name
+
+    return apply_rules
+
+
+def _hierarchy_nodes(roots):
+    """
+    Returns the given nodes and all of their descendants as long names, read in
+    a single query.  Roots that sit under another root are dropped first so
+    overlapping hierarchies are only walked once.
+    """
+    roots = sorted(set(roots))
+    top_roots = []
+    for root in roots:
+        if not any(root.startswith(top + '|') for top in top_roots):
+            top_roots.append(root)
+
+    if not top_roots:
+        return []
+    descendants = cmds.listRelatives(
+        top_roots, allDescendents=True, fullPath=True) or []
+    return top_roots + descendants
+
+
+def search_replace_name(search_input='', replace_output='', hierarchy=False,
+                        input_objects=[], name_index=None, regex=False,
+                        rules=None):
     """
     Python equivalent of the mel searchReplaceNames procedure.  Created to work
     with GUIs and python-written scripts.
 
+    Any number of rules can be applied in a single pass, each name going
+    through every rule in order before the scene is touched.  Renames are done
+    deepest first so parent paths stay valid through the whole batch.
+
     Args:
         search_input (str): String to search for that will be replaced.
         replace_output (str): String used to replace the input string.
@@ -296,61 +723,44 @@ def search_replace_name(search_input, replace_output, hierarchy=False,
             objects in hierarchy instead of just selection.
         input_objects (list[str]): Allows funciton to work based on a provided
             list.  If nothing given, selection is assumed.
+        name_index (NameIndex): Scene name index to keep updated with the new
+            names.
+        regex (bool): Treat search_input as a regular expression, replace_output
+            may then use group references.
+        rules (list): Additional rules applied after search_input, see
+            compile_rules().  (ex. [('FK', 'IK'), (r'^L_', 'R_', True)])
 
-    """
-    name_return_list = []
-
-    if input_objects:
-        # ensure pymel nodes
-        input_objects = pm.ls(input_objects)
-    else:
-        input_objects = pm.ls(selection=True)
-
-    if not hierarchy:
-        for obj in input_objects:
-            if search_input in obj.name():
-                obj.rename(obj.name().replace(search_input, replace_output))
-                name_return_list.append(obj.name())
+    Returns:
+        (list): List of all the newly named nodes.
 
-    else:
-        hierarchyNodes = []
-        for obj in input_objects:
-            hierarchyNodes.extend(obj.getChildren(allDescendents=True))
-        hierarchyNodes.extend(input_objects)
+    """
+    edit = compile_rules([(search_input, replace_output, regex)]
+                         + list(rules or []))
 
-        for obj in hierarchyNodes:
-            if search_input in obj.name():
-                obj.rename(obj.name().replace(search_input, replace_output))
-                name_return_list.append(obj.name())
+    input_objects = _resolve_nodes(input_objects)
+    if hierarchy:
+        input_objects = _hierarchy_nodes(input_objects)
 
-    return name_return_list
+    return _rename_short_names(edit, input_objects, name_index)
 
 
 # Make input_objects required?
-def clear_end_digits(input_objects=[]):
-    name_return_list = []
+def clear_end_digits(input_objects=[], name_index=None):
+    # Without an index only the candidate name is checked, a full scene index
+    # would cost more than the few objExists calls of a typical call
+    exists = name_index.exists if name_index is not None else cmds.objExists
 
-    if input_objects:
-        # ensure pymel nodes
-        input_objects = pm.ls(input_objects)
-    else:
-        input_objects = pm.ls(selection=True)
+    def edit(name):
+        if not name[-1:].isdigit():
+            return name
 
-    for obj in input_objects:
-        try:
-            int(obj.name()[-1])
-        except ValueError:
-            continue
-
-        if pm.objExists(obj.name()[:-1]):
-            pm.warning('While removing end digits, another object with name '
+        if exists(name[:-1]):
+            cmds.warning('While removing end digits, another object with name '
                          '"{}" was found.  Function may have failed to remove '
-                         'end digits properly.'.format(obj.name()[:-1]))
-
-        obj.rename(obj.name()[:-1])
-        name_return_list.append(obj.name())
+                         'end digits properly.'.format(name[:-1]))
+        return name[:-1]
 
-    return name_return_list
+    return _rename_short_names(edit, input_objects, name_index)
 
 
 class NamingWidget(mayaFrameWidget.MayaFrameWidget):
@@ -484,6 +894,24 @@ class NamingWidget(mayaFrameWidget.MayaFrameWidget):
         rename_button_layout.addWidget(self.rename_label)
         rename_button_layout.addWidget(rename_button)
 
+        # Preview of the first and last names the selection will be given
+        self.preview_label = QtWidgets.QLabel('')
+        self.preview_label.setContentsMargins(4, 0, 4, 0)
+        rename_widget.layout().addWidget(self.preview_label)
+
+        # The preview is only refreshed once typing pauses
+        self.rename_preview = RenamePreview()
+        self.name_index = None
+        self.preview_timer = QtCore.QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(150)
+
+        # Names changed in the scene mark name_index stale, it is rebuilt the
+        # next time it is used
+        self._names_stale = False
+        self._scene_callbacks = []
+        self._add_scene_callbacks()
+
         # Replace Widget
         replace_widget = QtWidgets.QWidget()  # Widget holding lower name stuff
         replace_widget.setLayout(QtWidgets.QVBoxLayout())
@@ -649,11 +1077,16 @@ class NamingWidget(mayaFrameWidget.MayaFrameWidget):
         self.rename_alpha_radio.clicked.connect(self._toggle_rename_vis)
         self.rename_number_radio.clicked.connect(self._toggle_rename_vis)
 
-        self.lower_radio.clicked.connect(self._update_example)
-        self.upper_radio.clicked.connect(self._update_example)
-        self.rename_start_number.valueChanged.connect(self._update_example)
+        self.rename_alpha_radio.clicked.connect(self._schedule_example)
+        self.rename_number_radio.clicked.connect(self._schedule_example)
+        self.lower_radio.clicked.connect(self._schedule_example)
+        self.upper_radio.clicked.connect(self._schedule_example)
+        self.rename_start_number.valueChanged.connect(self._schedule_example)
+        self.list_end_condition_checkbox.stateChanged.connect(
+            self._schedule_example)
 
-        self.rename_line_edit.textChanged.connect(self._update_example)
+        self.rename_line_edit.textChanged.connect(self._schedule_example)
+        self.preview_timer.timeout.connect(self._update_example)
 
         rename_button.clicked.connect(self.list_rename)
         replace_button.clicked.connect(self.replace_text)
@@ -672,7 +1105,7 @@ class NamingWidget(mayaFrameWidget.MayaFrameWidget):
         self.suffix_replace_button.clicked.connect(
             partial(self.edit_suffix, False, True, False))
 
-        self.end_digits_button.clicked.connect(clear_end_digits)
+        self.end_digits_button.clicked.connect(self.clear_digits)
 
         self._update_example()
 
@@ -696,57 +1129,105 @@ class NamingWidget(mayaFrameWidget.MayaFrameWidget):
 
         return text, starting_number, naming_method, upper
 
-    def _update_example(self):
-        example_text = ''
+    def _schedule_example(self, *args):
+        # Restarting the timer drops any refresh still waiting on it
+        self.preview_timer.start()
+
+    def _add_scene_callbacks(self):
+        self._scene_callbacks = [
+            om.MNodeMessage.addNameChangedCallback(om.MObject(),
+                                                  self._scene_names_changed),
+            om.MDGMessage.addNodeAddedCallback(self._scene_names_changed),
+            om.MDGMessage.addNodeRemovedCallback(self._scene_names_changed),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kAfterNew,
+                                         self._scene_names_changed),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kAfterOpen,
+                                         self._scene_names_changed)
+        ]
+
+    def _remove_scene_callbacks(self):
+        if self._scene_callbacks:
+            om.MMessage.removeCallbacks(self._scene_callbacks)
+            self._scene_callbacks = []
+
+    def _scene_names_changed(self, *args):
+        # Called for every node, so only flagged here
+        self._names_stale = True
+
+    def closeEvent(self, event):
+        self._remove_scene_callbacks()
+        mayaFrameWidget.MayaFrameWidget.closeEvent(self, event)
+
+    def _refresh_preview_nodes(self):
+        selection = cmds.ls(selection=True, long=True) or []
+        self.rename_preview.set_nodes(selection, self._get_name_index())
+
+    def _get_name_index(self):
+        if self.name_index is None or self._names_stale:
+            self.name_index = NameIndex()
+            self._names_stale = False
+        return self.name_index
+
+    def _names_changed(self):
+        # The renames kept name_index up to date, only the preview's cached
+        # collisions are stale
+        self.rename_preview.invalidate()
+        self._names_stale = False
+        self._schedule_example()
 
+    def _update_example(self):
         text, starting_number, naming_method, upper = \
             self._get_rename_settings()
 
         if not text:  # text is a variable from above
             self.rename_label.setText('<font color=#646464>e.g.</font>')
+            self.preview_label.setText('')
             return
 
-        example_text += text
-
-        if not naming_method:
-            if upper:
-                if '#' in example_text:
-                    padding = example_text.count('#')
-                    if padding > 1:
-                        full_pad = ''
-                        for pad in range(padding):
-                            full_pad += '#'
-                        example_text = example_text.replace(full_pad, 'A')
-                    else:
-                        example_text = example_text.replace('#', 'A')
-            else:
-                if '#' in example_text:
-                    padding = example_text.count('#')
-                    if padding > 1:
-                        full_pad = ''
-                        for pad in range(padding):
-                            full_pad += '#'
-                        example_text = example_text.replace(full_pad, 'a')
-                    else:
-                        example_text = example_text.replace('#', 'a')
-        else:
-            if '#' in example_text:
-                padding = example_text.count('#')
-                if padding > 1:
-                    full_pad = ''
-                    for pad in range(padding):
-                        full_pad += '#'
-                    example_text = example_text.replace(
-                        full_pad, str(starting_number).zfill(padding)
-                    )
-                else:
-                    example_text = example_text.replace(
-                        '#', str(starting_number).zfill(padding)
-                    )
+        try:
+            head, padding, tail = _split_pattern(text)
+        except KeyError:
+            # No '#' typed yet, nothing to number
+            self.rename_label.setText('<font color=#646464>e.g. %s</font>'
+                                      % text)
+            self.preview_label.setText('')
+            return
 
+        example_text = head + next(_list_labels(
+            padding, naming_method, starting_number, upper)) + tail
         self.rename_label.setText('<font color=#646464>e.g. %s</font>'
                                   % example_text)
 
+        self._refresh_preview_nodes()
+        rows, collisions = self.rename_preview.resolve(
+            text,
+            numeric_index=naming_method,
+            start_number=starting_number,
+            upper_case=upper,
+            end_name=self.list_end_condition_checkbox.isChecked()
+        )
+        if not rows:
+            self.preview_label.setText('')
+            return
+
+        lines = []
+        last_position = -1
+        for position, new_name, collides in rows:
+            if position != last_position + 1:
+                lines.append('...')
+            if collides:
+                new_name = '<font color=#d05050>%s</font>' % new_name
+            lines.append(new_name)
+            last_position = position
+
+        summary = '%d selected' % len(self.rename_preview.nodes)
+        if collisions:
+            summary += ', <font color=#d05050>%d already in use</font>' \
+                       % len(collisions)
+        lines.append('<font color=#646464>%s</font>' % summary)
+
+        self.preview_label.setText('<br>'.join(lines))
+
     def list_rename(self):
         text, starting_number, naming_method, upper = \
             self._get_rename_settings()
@@ -768,8 +1249,10 @@ class NamingWidget(mayaFrameWidget.MayaFrameWidget):
             numeric_index=index_type,
             start_number=starting_number,
             upper_case=case,
-            end_name=ending
+            end_name=ending,
+            name_index=self._get_name_index()
         )
+        self._names_changed()
 
     def replace_text(self):
         find_text = str(self.find_line_edit.text()).strip()
@@ -780,18 +1263,28 @@ class NamingWidget(mayaFrameWidget.MayaFrameWidget):
         search_replace_name(
             search_input=find_text,
             replace_output=replace_text,
-            hierarchy=select_scope
+            hierarchy=select_scope,
+            name_index=self._get_name_index()
         )
+        self._names_changed()
 
     def edit_prefix(self, add=False, replace=False, remove=False):
 
         prefix = str(self.prefix_line_edit.text()).strip()
 
-        set_prefix(input_prefix=prefix, add=add, remove=remove, replace=replace)
+        set_prefix(input_prefix=prefix, add=add, remove=remove, replace=replace,
+                   name_index=self._get_name_index())
+        self._names_changed()
 
     def edit_suffix(self, add=False, replace=False, remove=False):
 
         suffix = str(self.suffix_line_edit.text()).strip()
         print suffix
 
-        set_suffix(input_suffix=suffix, add=add, remove=remove, replace=replace)
+        set_suffix(input_suffix=suffix, add=add, remove=remove, replace=replace,
+                   name_index=self._get_name_index())
+        self._names_changed()
+
+    def clear_digits(self):
+        clear_end_digits(name_index=self._get_name_index())
+        self._names_changed()
@@ -15,7 +15,7 @@ def build_ribbon_plane(span_count, length_ratio=None, ribbon_name='C_ribbon'):
 
 
 def build_ribbon(object_input=None, span_align='face', override_ctrls=True,
-                 prefix='C', ribbon_name='ribbon'):
+                 prefix='C', ribbon_name='ribbon', instance_shapes=False):
     
     if not object_input:
         try:
@@ -42,6 +42,8 @@ def build_ribbon(object_input=None, span_align='face', override_ctrls=True,
                                                (prefix, ribbon_name))
 
     bone_list = []
+    # First override control, its shapes instanced by the others if requested
+    master_shape = None
     for span in range(u_factor):
         b = str(span+1).zfill(2)
         follicle_shape = cmds.createNode('follicle',
@@ -79,7 +81,10 @@ def build_ribbon(object_input=None, span_align='face', override_ctrls=True,
             follicle_ctrl = cmds.group(empty=True,
                                        name=follicle_srt.replace('FOL', 'CTRL'))
             ctrl_zero = tool.create_offset(input_object=follicle_ctrl)
-            crv.add_curve_shape('circle', transform_node=follicle_ctrl)
+            crv.add_curve_shape('circle', transform_node=follicle_ctrl,
+                                instance_of=master_shape)
+            if instance_shapes and not master_shape:
+                master_shape = follicle_ctrl
 
             cmds.parentConstraint(follicle_srt, ctrl_zero, mo=False)
             cmds.parentConstraint(follicle_ctrl, follicle_bone, mo=False)
@@ -1,117 +1,462 @@
+import json
+from collections import OrderedDict
 import maya.cmds as cmds
-import pymel.core as pm
+from maya.api import OpenMaya as om
 # from functools import partial
 from PySide2 import QtWidgets, QtCore, QtGui
 from maya_tools import mayaFrameWidget
-from maya_tools import fileDataIO as fio
 from master_rigger import createNodeLibrary as node
 from master_rigger import curve_assignment as crv
 from master_rigger import basicTools as tool
 from master_rigger import cmdsTranslator as nUtils
+from master_rigger import nodeNetwork as network_builder
+from master_rigger import poseLibrary as poses
+from master_rigger.nameIndex import (SIDE_TOKENS, TokenIndex, mirror_name,
+                                     parse_name)
 # import renamerLibrary as lib
 reload(node)
 reload(crv)
 reload(tool)
 reload(nUtils)
+reload(network_builder)
+reload(poses)
 reload(mayaFrameWidget)
-reload(fio)
 
 
-def export_rig_pose(filepath):
+def get_pose_controls(controls=None):
+    """
+    Returns the controls a pose or bake is taken from, the selection if none
+    are given.
+    """
+    if not controls:
+        controls = cmds.ls(selection=True)
+        if not controls:
+            raise TypeError('Bad Selection!')
+    return controls
 
-    selection = pm.ls(selection=True)
 
-    poseData = {}
-
-    pos = True
-    rot = True
-    scl = True
-    # mtx = True
-    # worldMtx = True
-
-    for ctrl in selection:
-        ctrlVals = {}
-
-        position = None
-        if pos:
-            position = ctrl.translate.get()
-            position = [position.x, position.y, position.z]
-            ctrlVals['translate'] = position
-
-        rotation = None
-        if rot:
-            rotation = ctrl.rotate.get()
-            rotation = [rotation.x, rotation.y, rotation.z]
-            ctrlVals['rotate'] = rotation
-
-        scale = None
-        if scl:
-            scale = ctrl.scale.get()
-            scale = [scale.x, scale.y, scale.z]
-            ctrlVals['scale'] = scale
-
-        stripNamespace = ctrl.name().rsplit(':', 1)[-1]
-        poseData[stripNamespace] = ctrlVals
-
-    fio.saveToJson(poseData, filepath)
-    return poseData
-
-
-def import_rig_pose(filepath):
-    selection = pm.ls(selection=True)
-
-    data = fio.loadFromJson(filepath)
-
-    pos = True
-    rot = True
-    scl = True
-
-    for ctrl in selection:
-        stripNamespace = ctrl.name().rsplit(':', 1)[-1]
-        ctrlVals = data[stripNamespace]
-
-        if pos:
-            ctrl.setTranslation(ctrlVals['translate'])
-
-        if rot:
-            ctrl.setRotation(ctrlVals['rotate'])
-
-        if scl:
-            ctrl.setScale(ctrlVals['scale'])
+def export_rig_pose(filepath, pose_name='default', controls=None):
+    """
+    Saves the pose of controls into a pose library file, next to any other
+    pose already saved in it.
 
+    Args:
+        filepath (str): Path of the pose library file.
+        pose_name (str): Name to save the pose as.
+        controls (list[str]): Controls to save.  Selection if not given.
+
+    Returns:
+        (OrderedDict): The saved pose.
+
+    """
+    pose = poses.capture_pose(get_pose_controls(controls))
+    poses.PoseLibrary(filepath).add(pose_name, pose)
+    return pose
+
+
+def export_rig_animation(filepath, start=None, end=None, controls=None,
+                         step=1):
+    """
+    Bakes the values of controls over a frame range to a bake file, streamed
+    to disk in chunks.  Read it back with poseLibrary.BakeReader.
+
+    Args:
+        filepath (str): Path of the bake file.  Bakes of the same controls
+            are appended to it.
+        start (float): First frame.  Start of the playback range if not given.
+        end (float): Last frame.  End of the playback range if not given.
+        controls (list[str]): Controls to bake.  Selection if not given.
+        step (float): Frames between samples.
+
+    Returns:
+        (int): Number of frames baked.
+
+    """
+    if start is None:
+        start = cmds.playbackOptions(query=True, minTime=True)
+    if end is None:
+        end = cmds.playbackOptions(query=True, maxTime=True)
+
+    return poses.bake_controls(filepath, get_pose_controls(controls), start,
+                               end, step=step)
+
+
+def import_rig_pose(filepath, pose_name=None, controls=None, namespace=None):
+    """
+    Applies a pose of a pose library file.  Controls missing from the scene
+    are skipped and reported instead of stopping the import.
+
+    Args:
+        filepath (str): Path of the pose library file.
+        pose_name (str): Pose to apply.  First pose of the file if not given.
+        controls (list[str]): Controls to pose.  Selection if not given, and
+            every control of the pose if nothing is selected.
+        namespace (str): Namespace of the rig to pose.
+
+    Returns:
+        (dict): Report of poseLibrary.apply_pose().
+
+    """
+    library = poses.PoseLibrary(filepath)
+    if pose_name is None:
+        if not library.names():
+            raise KeyError('{} has no poses.'.format(filepath))
+        pose_name = library.names()[0]
+
+    if controls is None:
+        controls = cmds.ls(selection=True)
+
+    return poses.apply_pose(library.get(pose_name), controls=controls,
+                            namespace=namespace)
+
+
+# Suffixes of the animation controls mirrored by mirror_pose() and flip_pose()
+CONTROL_SUFFIXES = ('CTL', 'CTRL')
+# String attribute on the rig root keeping its mirror pairs and signs
+MIRROR_DATA_ATTR = 'mirrorData'
+# Mirror data of the rigs used this session, by rig root UUID and axis
+MIRROR_DATA_CACHE = {}
+
+AXIS_INDEX = {'x': 0, 'y': 1, 'z': 2}
+
+
+def _node_uuid(node_name):
+    # Unlike names, UUIDs are not reused by another rig after File>New/Open
+    return cmds.ls(node_name, uuid=True)[0]
+
+
+def get_rig_root(node_name):
+    """
+    Returns the long name of the top node of the hierarchy of a node.
+    """
+    return '|' + cmds.ls(node_name, long=True)[0].split('|')[1]
+
+
+def _rest_local_matrix(node_name, is_control):
+    """
+    Returns the local matrix of a node with controls at rest, their channels
+    at zero translate and rotate and unit scale.  Only the orientation of a
+    control at rest is kept, from its rotate axis (and joint orient).
+    """
+    if is_control:
+        to_radians = lambda values: [
+            om.MAngle(value, om.MAngle.uiUnit()).asRadians()
+            for value in values]
+        matrix = om.MEulerRotation(*to_radians(
+            cmds.getAttr(node_name + '.rotateAxis')[0])).asMatrix()
+        if cmds.objectType(node_name, isAType='joint'):
+            matrix = matrix * om.MEulerRotation(*to_radians(
+                cmds.getAttr(node_name + '.jointOrient')[0])).asMatrix()
+    else:
+        matrix = om.MMatrix(cmds.getAttr(node_name + '.matrix'))
+    if cmds.attributeQuery('offsetParentMatrix', node=node_name, exists=True):
+        matrix = matrix * om.MMatrix(
+            cmds.getAttr(node_name + '.offsetParentMatrix'))
+    return matrix
+
+
+def _rest_parent_axes(rig, controls):
+    """
+    Returns the normalized axes of the parent space of each control at rest,
+    relative to the rig root.  Every control above a control is taken at
+    rest (see _rest_local_matrix()), so the pose the rig is in when the
+    analysis runs does not change the result, while the offset and space
+    groups in between keep their matrices.
+
+    Args:
+        rig (str): Long name of the top node of the rig.
+        controls (list[str]): Long names of the controls.
+
+    Returns:
+        (dict): Long name of each control with its 3 parent axes.
+
+    """
+    control_set = set(controls)
+    rest_matrices = {rig: om.MMatrix()}
+
+    def rest_matrix(path):
+        if path not in rest_matrices:
+            rest_matrices[path] = _rest_local_matrix(
+                path, path in control_set) * rest_matrix(
+                    path.rpartition('|')[0])
+        return rest_matrices[path]
+
+    parent_axes = {}
+    for control in controls:
+        matrix = rest_matrix(control.rpartition('|')[0])
+        axes = []
+        for row in range(3):
+            axis = [matrix.getElement(row, column) for column in range(3)]
+            length = sum(value * value for value in axis) ** 0.5 or 1.0
+            axes.append([value / length for value in axis])
+        parent_axes[control] = axes
+    return parent_axes
+
+
+def _mirror_signs(axes, counterpart_axes, axis='x'):
+    """
+    Returns the signs turning the channel values of a control into the
+    mirrored values of its counterpart, from the parent axes of both.  The
+    inverted scale offsets made by orient_symmetry show up here as parent
+    axes that already point the mirrored way.
+    """
+    mirror_index = AXIS_INDEX[axis]
+    translate_signs = []
+    for source_axis, target_axis in zip(axes, counterpart_axes):
+        mirrored = [-value if index == mirror_index else value
+                    for index, value in enumerate(source_axis)]
+        dot = sum(a * b for a, b in zip(mirrored, target_axis))
+        translate_signs.append(1 if dot >= 0 else -1)
+    # A reflection reverses the direction of rotations, and so does each
+    # parent space that is itself mirrored (negative determinant)
+    handedness = -_determinant_sign(axes) * _determinant_sign(counterpart_axes)
+    rotate_signs = [sign * handedness for sign in translate_signs]
+    return translate_signs + rotate_signs + [1, 1, 1]
+
+
+def _determinant_sign(axes):
+    (a, b, c), (d, e, f), (g, h, i) = axes
+    determinant = a * (e * i - f * h) - b * (d * i - f * g) + c * (d * h - e * g)
+    return 1 if determinant >= 0 else -1
+
+
+def get_rig_controls(rig):
+    """
+    Returns the namespace stripped name of each control under a rig with its
+    long name, read in one sweep.  Copies of the same rig each give their own
+    paths.
+    """
+    rig_index = TokenIndex(cmds.listRelatives(rig, allDescendents=True,
+                                              fullPath=True) or [])
+    return dict((poses.strip_namespace(control), control)
+                for control in rig_index.find(suffix=CONTROL_SUFFIXES))
+
+
+def build_mirror_data(rig, axis='x'):
+    """
+    Pairs the controls of a rig with their counterpart through their side
+    token and works out their mirror signs from the rig at rest, then saves
+    both on the rig root so the analysis is only made once per rig.  Center
+    controls are paired with themselves.
+
+    Args:
+        rig (str): Top node of the rig.
+        axis (str): Axis normal to the mirror plane.
+
+    Returns:
+        (dict): 'axis', 'pairs', the counterpart of each namespace stripped
+            control name, and 'signs', the signs of each control's CHANNELS.
+
+    """
+    rig = cmds.ls(rig, long=True)[0]
+    controls = get_rig_controls(rig)
+
+    parent_axes = _rest_parent_axes(rig, list(controls.values()))
+
+    pairs = {}
+    signs = {}
+    unpaired = []
+    for name, control in sorted(controls.items()):
+        if name in pairs:
+            continue
+        counterpart = mirror_name(name) or name
+        if counterpart not in controls:
+            unpaired.append(name)
+            continue
+        control_signs = _mirror_signs(parent_axes[control],
+                                      parent_axes[controls[counterpart]],
+                                      axis)
+        pairs[name] = counterpart
+        pairs[counterpart] = name
+        signs[name] = control_signs
+        signs[counterpart] = control_signs
+
+    if unpaired:
+        cmds.warning('No counterpart found for {} controls: {}'.format(
+            len(unpaired), ', '.join(unpaired)))
+
+    data = {'axis': axis, 'pairs': pairs, 'signs': signs}
+    try:
+        if not cmds.attributeQuery(MIRROR_DATA_ATTR, node=rig, exists=True):
+            cmds.addAttr(rig, longName=MIRROR_DATA_ATTR, dataType='string')
+        cmds.setAttr('{}.{}'.format(rig, MIRROR_DATA_ATTR), json.dumps(data),
+                     type='string')
+    except RuntimeError:
+        # Referenced or locked rigs keep their mirror data for the session
+        pass
+    MIRROR_DATA_CACHE[(_node_uuid(rig), axis)] = data
     return data
 
 
-def vector_aim_constraint(source, target, up_position, aim_vector='x', up_vector='y'):
+def get_mirror_data(rig, axis='x', rebuild=False):
+    """
+    Returns the mirror data of a rig (see build_mirror_data()), from this
+    session's cache, then from the rig root, and only analysed if neither
+    has it.
+    """
+    rig = cmds.ls(rig, long=True)[0]
+    key = (_node_uuid(rig), axis)
+    if not rebuild:
+        if key in MIRROR_DATA_CACHE:
+            return MIRROR_DATA_CACHE[key]
+        if cmds.attributeQuery(MIRROR_DATA_ATTR, node=rig, exists=True):
+            saved = cmds.getAttr('{}.{}'.format(rig, MIRROR_DATA_ATTR))
+            data = json.loads(saved) if saved else None
+            if data and data['axis'] == axis:
+                MIRROR_DATA_CACHE[key] = data
+                return data
+    return build_mirror_data(rig, axis)
+
+
+def _apply_mirror(rig, data, sources):
+    """
+    Applies the mirrored values of the source controls to their
+    counterparts in one batched apply_pose().  Controls are read and posed
+    by their long names under the rig, so other copies of the rig are left
+    alone.
+
+    Args:
+        rig (str): Top node of the rig.
+        data (dict): Mirror data of the rig.
+        sources (list[str]): Namespace stripped names of the controls to read.
+
+    """
+    controls = get_rig_controls(rig)
+    sources = [name for name in sources
+               if name in controls and data['pairs'][name] in controls]
+    if not sources:
+        return {'set': [], 'locked': [], 'missing': [], 'unposed': []}
+
+    current = poses.capture_pose([controls[name] for name in sources])
+    mirrored = OrderedDict(
+        (data['pairs'][name], [value * sign for value, sign in
+                               zip(current[name], data['signs'][name])])
+        for name in sources)
+    return poses.apply_pose(mirrored,
+                            controls=[controls[name] for name in mirrored])
+
+
+def _pose_sources(controls, data):
+    if not controls:
+        return sorted(data['pairs'])
+    names = [poses.strip_namespace(control) for control in controls]
+    return [name for name in names if name in data['pairs']]
+
+
+def mirror_pose(controls=None, source_side='L', rig=None, axis='x'):
+    """
+    Copies the pose of one side of a rig onto the other, mirrored.  Selected
+    controls of either side mirror their source side counterpart.
+
+    Args:
+        controls (list[str]): Controls to mirror.  Selection if not given,
+            every control of the rig if nothing is selected.
+        source_side (str): Side copied from, any spelling in SIDE_TOKENS.
+        rig (str): Top node of the rig.  Found from the controls if not given.
+        axis (str): Axis normal to the mirror plane.
+
+    Returns:
+        (dict): Report of poseLibrary.apply_pose().
+
+    """
+    controls = controls or cmds.ls(selection=True)
+    if not rig:
+        if not controls:
+            raise TypeError('Bad Selection!')
+        rig = get_rig_root(controls[0])
+    rig = cmds.ls(rig, long=True)[0]
+    data = get_mirror_data(rig, axis)
+
+    source_side = SIDE_TOKENS.get(source_side, source_side)
+    sources = set()
+    for name in _pose_sources(controls, data):
+        side = parse_name(name).side
+        if side == source_side:
+            sources.add(name)
+        elif side in ('L', 'R'):
+            sources.add(data['pairs'][name])
+    return _apply_mirror(rig, data, sorted(sources))
+
+
+def flip_pose(controls=None, rig=None, axis='x'):
+    """
+    Swaps the pose of the left and right controls of a rig, mirrored, and
+    mirrors center controls onto themselves.
+
+    Args:
+        controls (list[str]): Controls to flip, with their counterparts.
+            Selection if not given, every control of the rig if nothing is
+            selected.
+        rig (str): Top node of the rig.  Found from the controls if not given.
+        axis (str): Axis normal to the mirror plane.
+
+    Returns:
+        (dict): Report of poseLibrary.apply_pose().
+
+    """
+    controls = controls or cmds.ls(selection=True)
+    if not rig:
+        if not controls:
+            raise TypeError('Bad Selection!')
+        rig = get_rig_root(controls[0])
+    rig = cmds.ls(rig, long=True)[0]
+    data = get_mirror_data(rig, axis)
+
+    sources = set()
+    for name in _pose_sources(controls, data):
+        sources.add(name)
+        sources.add(data['pairs'][name])
+    return _apply_mirror(rig, data, sorted(sources))
+
+
+def _up_vector_key(up_position):
     if isinstance(up_position, list) or isinstance(up_position, tuple):
         if len(up_position) != 3:
             raise IndexError('Incorrect number of position coordinates given! Must be 3 (xyz)')
-        up_vector_null = tool.create_null(name='{}_UPVEC'.format(target))
+        return tuple(up_position)
     elif isinstance(up_position, str) or isinstance(up_position, unicode):
-        up_vector_null = up_position
-    else:
-        raise Exception('Incorrect input given for parameter: up_position={}'.format(up_position))
-
-    # Source nodes:
-    sourcePMM = node.create_node('PMM', name=source + '_aimSource')
-    sourceCMPM = node.create_node('CMPM', name=source + '_aimSource')
-
-    # Target nodes:
-    targetPMM = node.create_node('PMM', name=target + '_aimTarget')
-    targetCMPM = node.create_node('CMPM', name=target + '_aimTarget')
-    targetINVM = node.create_node('INVM', name=target + '_aimTarget')
+        return up_position
+    raise Exception('Incorrect input given for parameter: up_position={}'.format(up_position))
 
-    # Vector nodes:
-    vectorMM = node.create_node('MM', name=target + '_aimVector')
-    vectorDCPM = node.create_node('DCPM', name=target + '_aimVector')
 
-    vectorNormVP = node.create_node('VP', name=target + '_normalizedAimVector')
-    upVectorVP = node.create_node('VP', name=target + '_upVector')
-    sideVectorVP = node.create_node('VP', name=target + '_sideVector')
-
-    # Matrix nodes:
-    compiled4x4M = node.create_node('4x4M', name=target + '_compiledVectors')
-    dcpm4x4M = node.create_node('DCPM', name=target + '_compiledVectors')
+def vector_aim_constraint(source, target, up_position, aim_vector='x', up_vector='y'):
+    """
+    Aims a target at a source through a matrix network.  See
+    vector_aim_constraints().
+    """
+    return vector_aim_constraints(source, [target], up_position,
+                                  aim_vector=aim_vector, up_vector=up_vector)
+
+
+def vector_aim_constraints(source, targets, up_position, aim_vector='x',
+                           up_vector='y'):
+    """
+    Aims many targets at one source through matrix networks built together.
+    The source side nodes are made once and fanned out to every target, and
+    targets sharing an up object (or up position) share its up vector null.
+    All the nodes are made in one batch by nodeNetwork.build_network().
+
+    Args:
+        source (str): The object aimed at.
+        targets (list[str]): Objects aiming at the source.
+        up_position (str) or (list[float, float, float]) or (list): Object
+            whose translate gives the up vector, or a position to make an up
+            vector null at.  A list with one of those per target gives each
+            target its own.
+        aim_vector (str): Axis of the targets aiming at the source.
+        up_vector (str): Axis of the targets aiming at the up vector.
+
+    Returns:
+        (dict): The alias of each node of the network with its name.  Target
+            nodes end with the index of their target.
+
+    """
+    if isinstance(up_position, (list, tuple)) and \
+            len(up_position) == len(targets) and \
+            not all(isinstance(value, (int, float)) for value in up_position):
+        up_positions = list(up_position)
+    else:
+        up_positions = [up_position] * len(targets)
 
     # How it works:
     # vectorNormVP gives the normalized aim vector
@@ -122,22 +467,20 @@ def vector_aim_constraint(source, target, up_position, aim_vector='x', up_vector
     # sideVectorVP gives the vector for the leftover plane of rotation
     #  - plug sideVec into whichever vector is still available in the 4x4 (3x3) matrix node
     # Resulting matrix gives only rotations, aiming the target at the source
-
-    # Source connections:
-    cmds.connectAttr(source + '.t', sourcePMM + '.inPoint')
-    cmds.connectAttr(source + '.parentMatrix[0]', sourcePMM + '.inMatrix')
-    cmds.connectAttr(sourcePMM + '.output', sourceCMPM + '.inputTranslate')
-    cmds.connectAttr(sourceCMPM + '.outputMatrix', vectorMM + '.matrixIn[0]')
-
-    # Target connections:
-    cmds.connectAttr(target + '.t', targetPMM + '.inPoint')
-    cmds.connectAttr(target + '.parentMatrix[0]', targetPMM + '.inMatrix')
-    cmds.connectAttr(targetPMM + '.output', targetCMPM + '.inputTranslate')
-    cmds.connectAttr(targetCMPM + '.outputMatrix', targetINVM + '.inputMatrix')
-    cmds.connectAttr(targetINVM + '.outputMatrix', vectorMM + '.matrixIn[1]')
-
-    cmds.connectAttr(vectorMM + '.matrixSum', vectorDCPM + '.inputMatrix')
-    cmds.connectAttr(vectorDCPM + '.outputTranslate', vectorNormVP + '.input1')
+    network = {
+        'nodes': [
+            # Source nodes, shared by every target:
+            ('sourcePMM', 'PMM', source + '_aimSource'),
+            ('sourceCMPM', 'CMPM', source + '_aimSource')
+        ],
+        'values': [],
+        'connections': [
+            # Source connections:
+            (source + '.t', 'sourcePMM.inPoint'),
+            (source + '.parentMatrix[0]', 'sourcePMM.inMatrix'),
+            ('sourcePMM.output', 'sourceCMPM.inputTranslate')
+        ]
+    }
 
     # Assigning which vectors to assign to the 4x4 matrix plugs
     vector2directionPlugs = {
@@ -156,35 +499,93 @@ def vector_aim_constraint(source, target, up_position, aim_vector='x', up_vector
     aimDirectionPlugs = aimPlugs(aim_vector)    # Default X
     upDirectionPlugs = aimPlugs(up_vector)      # Default Y
     sideDirectionPlugs = aimPlugs(axes[0])      # Default Z
-
-    # Normalized vector
-    cmds.setAttr(vectorNormVP + '.operation', 0)  # no operation
-    cmds.setAttr(vectorNormVP + '.normalizeOutput', 1)
-
-    # Up vector
-    cmds.setAttr(vectorNormVP + '.operation', 2)  # cross product
-    cmds.setAttr(vectorNormVP + '.normalizeOutput', 0)
-    cmds.connectAttr(vectorNormVP + '.output', upVectorVP + '.input1')
-    cmds.connectAttr(up_vector_null + '.t', upVectorVP + '.input2')
-
-    # Side vector
-    cmds.setAttr(vectorNormVP + '.operation', 2)  # cross product
-    cmds.setAttr(vectorNormVP + '.normalizeOutput', 0)
-    cmds.connectAttr(upVectorVP + '.output', sideVectorVP + '.input1')
-    cmds.connectAttr(vectorNormVP + '.output', sideVectorVP + '.input2')
-
     vectorOuts = ('outputX', 'outputY', 'outputZ')
-    for output, plug in zip(vectorOuts, aimDirectionPlugs):
-        cmds.connectAttr('{}.{}'.format(vectorNormVP, output), '{}.in{}'.format(compiled4x4M, plug))
-
-    for output, plug in zip(vectorOuts, upDirectionPlugs):
-        cmds.connectAttr('{}.{}'.format(upVectorVP, output), '{}.in{}'.format(compiled4x4M, plug))
-
-    for output, plug in zip(vectorOuts, sideDirectionPlugs):
-        cmds.connectAttr('{}.{}'.format(sideVectorVP, output), '{}.in{}'.format(compiled4x4M, plug))
 
-    cmds.connectAttr(compiled4x4M + '.output', dcpm4x4M + '.inputMatrix')
-    cmds.connectAttr(dcpm4x4M + '.outputRotate', target + '.r')
+    # Every up position is checked before any up vector null is made
+    up_keys = [_up_vector_key(target_up) for target_up in up_positions]
+    up_vector_nulls = {}
+    created_nulls = []
+    for index, (target, up_key) in enumerate(zip(targets, up_keys)):
+        if up_key not in up_vector_nulls:
+            if isinstance(up_key, tuple):
+                up_vector_nulls[up_key] = tool.create_null(
+                    name='{}_UPVEC'.format(target))
+                created_nulls.append(up_vector_nulls[up_key])
+                cmds.setAttr(up_vector_nulls[up_key] + '.t', *up_key)
+            else:
+                up_vector_nulls[up_key] = up_key
+        up_vector_null = up_vector_nulls[up_key]
+
+        alias = lambda name: '{}{}'.format(name, index)
+        network['nodes'].extend([
+            # Target nodes:
+            (alias('targetPMM'), 'PMM', target + '_aimTarget'),
+            (alias('targetCMPM'), 'CMPM', target + '_aimTarget'),
+            (alias('targetINVM'), 'INVM', target + '_aimTarget'),
+            # Vector nodes:
+            (alias('vectorMM'), 'MM', target + '_aimVector'),
+            (alias('vectorDCPM'), 'DCPM', target + '_aimVector'),
+            (alias('vectorNormVP'), 'VP', target + '_normalizedAimVector'),
+            (alias('upVectorVP'), 'VP', target + '_upVector'),
+            (alias('sideVectorVP'), 'VP', target + '_sideVector'),
+            # Matrix nodes:
+            (alias('compiled4x4M'), '4x4M', target + '_compiledVectors'),
+            (alias('dcpm4x4M'), 'DCPM', target + '_compiledVectors')
+        ])
+        network['values'].extend([
+            # Normalized vector
+            (alias('vectorNormVP') + '.operation', 0),  # no operation
+            (alias('vectorNormVP') + '.normalizeOutput', 1),
+            # Up vector
+            (alias('upVectorVP') + '.operation', 2),  # cross product
+            (alias('upVectorVP') + '.normalizeOutput', 0),
+            # Side vector
+            (alias('sideVectorVP') + '.operation', 2),  # cross product
+            (alias('sideVectorVP') + '.normalizeOutput', 0)
+        ])
+        network['connections'].extend([
+            ('sourceCMPM.outputMatrix', alias('vectorMM') + '.matrixIn[0]'),
+            # Target connections:
+            (target + '.t', alias('targetPMM') + '.inPoint'),
+            (target + '.parentMatrix[0]', alias('targetPMM') + '.inMatrix'),
+            (alias('targetPMM') + '.output',
+             alias('targetCMPM') + '.inputTranslate'),
+            (alias('targetCMPM') + '.outputMatrix',
+             alias('targetINVM') + '.inputMatrix'),
+            (alias('targetINVM') + '.outputMatrix',
+             alias('vectorMM') + '.matrixIn[1]'),
+
+            (alias('vectorMM') + '.matrixSum',
+             alias('vectorDCPM') + '.inputMatrix'),
+            (alias('vectorDCPM') + '.outputTranslate',
+             alias('vectorNormVP') + '.input1'),
+            (alias('vectorNormVP') + '.output', alias('upVectorVP') + '.input1'),
+            (up_vector_null + '.t', alias('upVectorVP') + '.input2'),
+            (alias('upVectorVP') + '.output', alias('sideVectorVP') + '.input1'),
+            (alias('vectorNormVP') + '.output',
+             alias('sideVectorVP') + '.input2'),
+
+            (alias('compiled4x4M') + '.output',
+             alias('dcpm4x4M') + '.inputMatrix'),
+            (alias('dcpm4x4M') + '.outputRotate', target + '.r')
+        ])
+
+        for vector, directionPlugs in (('vectorNormVP', aimDirectionPlugs),
+                                       ('upVectorVP', upDirectionPlugs),
+                                       ('sideVectorVP', sideDirectionPlugs)):
+            for output, plug in zip(vectorOuts, directionPlugs):
+                network['connections'].append(
+                    ('{}.{}'.format(alias(vector), output),
+                     '{}.in{}'.format(alias('compiled4x4M'), plug)))
+
+    try:
+        return network_builder.build_network(network)
+    except (NameError, TypeError, ValueError, KeyError):
+        # The network is checked before any node is made, only the up vector
+        # nulls it needed to exist are left to remove
+        if created_nulls:
+            cmds.delete(created_nulls)
+        raise
 
 
 # Matrix stuff needs major field testing.  Try out at work
@@ -221,8 +622,19 @@ def simple_matrix_constraint(target=None, source=None, position=True,
         cmds.connectAttr(decompose_node + '.outputScale', target + '.s')
 
 
+def get_offset_matrix(node_name, space):
+    """
+    Returns the matrix that keeps a node where it is when multiplied by the
+    world matrix of a space (offset * space world = node world).
+    """
+    node_matrix = om.MMatrix(cmds.getAttr(node_name + '.worldMatrix[0]'))
+    space_matrix = om.MMatrix(cmds.getAttr(space + '.worldMatrix[0]'))
+    return list(node_matrix * space_matrix.inverse())
+
+
 # Complete beta, no applicable testing, might be rewritten entirely
-def matrix_constraint(source, inverse, target, position=True, orientation=True, scale=False):
+def matrix_constraint(source, inverse, target, position=True, orientation=True,
+                      scale=False, maintain_offset=False):
     mult_matrix_node = node.create_node(
         node_key='MM',
         name=source)
@@ -231,8 +643,20 @@ def matrix_constraint(source, inverse, target, position=True, orientation=True,
         node_key='DCPM',
         name=source)
 
-    cmds.connectAttr(source + '.worldMatrix[0]', mult_matrix_node + '.matrixIn[0]', f=True)
-    cmds.connectAttr(inverse + '.worldInverseMatrix[0]', mult_matrix_node + '.matrixIn[1]', f=True)
+    index = 0
+    if maintain_offset:
+        # Baked now so the target keeps its current local transform
+        constraint_matrix = om.MMatrix(
+            cmds.getAttr(source + '.worldMatrix[0]')) * om.MMatrix(
+            cmds.getAttr(inverse + '.worldInverseMatrix[0]'))
+        offset_matrix = om.MMatrix(cmds.getAttr(target + '.matrix')) * \
+            constraint_matrix.inverse()
+        cmds.setAttr(mult_matrix_node + '.matrixIn[0]', list(offset_matrix),
+                     type='matrix')
+        index = 1
+
+    cmds.connectAttr(source + '.worldMatrix[0]', mult_matrix_node + '.matrixIn[{}]'.format(index), f=True)
+    cmds.connectAttr(inverse + '.worldInverseMatrix[0]', mult_matrix_node + '.matrixIn[{}]'.format(index + 1), f=True)
     cmds.connectAttr(mult_matrix_node + '.matrixSum', decompose_node + '.inputMatrix', f=True)
 
     if position:
@@ -243,6 +667,115 @@ def matrix_constraint(source, inverse, target, position=True, orientation=True,
         cmds.connectAttr(decompose_node + '.outputScale', target + '.s')
 
 
+def matrix_space_switch(control, spaces, driven=None, attribute='space',
+                        default=0, position=True, orientation=True,
+                        scale=False):
+    """
+    Builds a space switch driven by an enum attribute on a control, as one
+    matrix network instead of a parent constraint per space.
+
+    The offset of the driven node to each space is baked at build time into a
+    multi matrix attribute on the driven node.  The enum drives two choice
+    nodes, one picking the offset and one the world matrix of the space, that
+    feed one multMatrix with the parent inverse matrix of the driven node, so
+    the driven node gets its local transform and its parents are not applied
+    twice.
+        Nodes: 2 choice + multMatrix + decomposeMatrix, for any number of
+        spaces
+
+    Args:
+        control (str): Control given the enum attribute.
+        spaces (list[tuple]) or (dict): Name and node of each space, in the
+            order of the enum.  (ex. [('world', 'Global_CTRL'),
+            ('chest', 'C_chest_CTRL')])
+        driven (str): Transform moved by the switch.  Usually a 'SPACE'
+            offset above the control, which is used if not given.
+        attribute (str): Name of the enum attribute.  The driven node keeps
+            the offsets in an attribute of the same name followed by
+            'Offsets'.
+        default (int): Index of the space the enum starts on.
+        position (bool): Drive the translate of the driven node.
+        orientation (bool): Drive the rotate of the driven node.
+        scale (bool): Drive the scale of the driven node.
+
+    Returns:
+        (dict): The alias of each node of the network with its name.
+
+    """
+    if isinstance(spaces, dict):
+        spaces = list(spaces.items())
+    if not spaces:
+        raise IndexError('No spaces given for {}.'.format(control))
+    if not 0 <= default < len(spaces):
+        raise IndexError('Default space {} is out of range ({} spaces).'.format(
+            default, len(spaces)))
+    if driven is None:
+        driven = cmds.listRelatives(control, parent=True)
+        if not driven:
+            raise NameError('{} has no parent to drive.'.format(control))
+        driven = driven[0]
+    offsets = attribute + 'Offsets'
+    for node_name, attribute_name in ((control, attribute), (driven, offsets)):
+        if cmds.attributeQuery(attribute_name, node=node_name, exists=True):
+            raise NameError('{} already has an attribute named "{}".'.format(
+                node_name, attribute_name))
+
+    for _, space in spaces:
+        if not cmds.objExists(space):
+            raise NameError('No object matches name: {}'.format(space))
+
+    enum_plug = '{}.{}'.format(control, attribute)
+    network = {
+        'nodes': [
+            ('offsetCHC', 'CHC', driven + '_spaceOffset'),
+            ('worldCHC', 'CHC', driven + '_spaceWorld'),
+            ('spaceMM', 'MM', driven + '_space'),
+            ('spaceDCPM', 'DCPM', driven + '_space')
+        ],
+        'values': [],
+        'connections': [
+            (enum_plug, 'offsetCHC.selector'),
+            (enum_plug, 'worldCHC.selector'),
+            ('offsetCHC.output', 'spaceMM.matrixIn[0]'),
+            ('worldCHC.output', 'spaceMM.matrixIn[1]'),
+            (driven + '.parentInverseMatrix[0]', 'spaceMM.matrixIn[2]'),
+            ('spaceMM.matrixSum', 'spaceDCPM.inputMatrix'),
+            (driven + '.rotateOrder', 'spaceDCPM.inputRotateOrder')
+        ]
+    }
+
+    for index, (_, space) in enumerate(spaces):
+        network['connections'].extend([
+            ('{}.{}[{}]'.format(driven, offsets, index),
+             'offsetCHC.input[{}]'.format(index)),
+            (space + '.worldMatrix[0]', 'worldCHC.input[{}]'.format(index))
+        ])
+
+    for connect, output, channel in ((position, 'outputTranslate', 't'),
+                                     (orientation, 'outputRotate', 'r'),
+                                     (scale, 'outputScale', 's')):
+        if connect:
+            network['connections'].append(
+                ('spaceDCPM.' + output, '{}.{}'.format(driven, channel)))
+
+    cmds.addAttr(control, longName=attribute, attributeType='enum',
+                 enumName=':'.join([space_name for space_name, _ in spaces]),
+                 defaultValue=default, keyable=True)
+    cmds.setAttr(enum_plug, default)
+    cmds.addAttr(driven, longName=offsets, dataType='matrix', multi=True)
+    for index, (_, space) in enumerate(spaces):
+        cmds.setAttr('{}.{}[{}]'.format(driven, offsets, index),
+                     get_offset_matrix(driven, space), type='matrix')
+    try:
+        return network_builder.build_network(network)
+    except (NameError, TypeError, ValueError, KeyError):
+        # The network is checked before any node is made, only the enum and
+        # the offsets are left to remove
+        cmds.deleteAttr(control, attribute=attribute)
+        cmds.deleteAttr(driven, attribute=offsets)
+        raise
+
+
 def get_index_from_component(component):
     if not len(component.split('.')) >= 2:
         raise IndexError('{} is not a component object name!'.format(component))
@@ -587,19 +1120,24 @@ class VectorWidget(mayaFrameWidget.MayaFrameWidget):
 
     def create_vector_aim_constraint(self):
         source = str(self.source_line_edit.text()).strip()
-        target = str(self.target_line_edit.text()).strip()
-        up_vec_text = self.up_vector_line_edit.text().strip()
-        try:
-            int(up_vec_text[0])
-            up_vector = list(up_vec_text)
-        except:
-            up_vector = str(self.up_vector_line_edit.text())
+        # Several targets can be given, separated by commas or spaces
+        targets = str(self.target_line_edit.text()).replace(',', ' ').split()
+        up_vec_text = str(self.up_vector_line_edit.text()).strip()
         aim_axis = self.aim_vector_axis_combo.currentText()
         up_vector_axis = self.up_vector_axis_combo.currentText()
+        if not up_vec_text:
+            # Nothing given, the world axis matching the up vector axis
+            up_vector = [float(axis == up_vector_axis) for axis in 'xyz']
+        else:
+            try:
+                up_vector = [float(value) for value in
+                             up_vec_text.replace(',', ' ').split()]
+            except ValueError:
+                up_vector = up_vec_text
 
-        vector_aim_constraint(
+        vector_aim_constraints(
             source=source,
-            target=target,
+            targets=targets,
             up_position=up_vector,
             aim_vector=aim_axis,
             up_vector=up_vector_axis)
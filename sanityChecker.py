@@ -4,6 +4,8 @@ import maya.cmds as cmds
 import pymel.core as pm
 
 from master_rigger import attributeManipulation as atManip
+from master_rigger.nameIndex import TokenIndex
+from master_rigger.nodeTypeIndex import NODE_TYPE_INDEX
 
 
 influenceNodes = (
@@ -23,6 +25,37 @@ influenceNodes = (
 	'LOC'  # Should be depricated, but still exists in some rigs
 )
 
+controlNodes = (
+	'CTL',
+	'CTRL'
+)
+
+
+def rigTokenIndex(rig):
+	"""
+	Returns a TokenIndex of every node under the rig, read in one sweep.
+	"""
+	return TokenIndex(cmds.listRelatives(rig, allDescendents=True, fullPath=True) or [])
+
+
+def findBySuffix(rigIndex, suffixes):
+	"""
+	Returns the long names of the indexed nodes ending with one of the suffixes, with or
+	without a '_' before it (ex. 'L_arm_shoulder_OFS', 'L_arm_shoulderOFS', 'pelvisJNT').
+	"""
+	return rigIndex.find_ending(suffixes)
+
+
+def misnamedNodes(nodes=None):
+	"""
+	Prints and returns the utility nodes whose suffix does not match their node type
+	(ex. a multDoubleLinear named _ADL), checked in one pass over the scene.
+	"""
+	misnamed = NODE_TYPE_INDEX.find_misnamed(nodes)
+	for entry in misnamed:
+		print '{} ({}) should end with _{}'.format(entry.node, entry.node_type, entry.expected)
+	return misnamed
+
 
 def publishMode(deleteUnusedNodes=False):
 	selectedRig = pm.ls(selection=True)[0]
@@ -38,12 +71,10 @@ def publishMode(deleteUnusedNodes=False):
 	# TODO: rip group names from offset group list in widget
 
 	# allNodes = pm.ls()
-	hierarchyNodes = pm.listRelatives(selectedRig, allDescendents=True)
-	transforms = [
-		node for node in hierarchyNodes
-		if node.name().endswith(influenceNodes) and node.type() == 'transform'
-	]
-	controls = [node for node in hierarchyNodes if node.name().endswith('CTL')]
+	rigIndex = rigTokenIndex(selectedRig.longName())
+	transforms = findBySuffix(rigIndex, influenceNodes)
+	transforms = cmds.ls(transforms, type='transform', long=True) if transforms else []
+	controls = findBySuffix(rigIndex, controlNodes)
 	nodesToLock.extend(transforms)
 
 	keyframes = cmds.ls(type=('animCurveTL', 'animCurveTU', 'animCurveTA', 'animCurveTT'))
@@ -97,11 +128,9 @@ def editMode():
 	for node in nodesToShow:
 		node.visibility.set(1)
 
-	hierarchyNodes = pm.listRelatives(selectedRig, allDescendents=True)
-	transforms = [
-		node for node in hierarchyNodes
-		if node.name().endswith(influenceNodes) and node.type() == 'transform'
-	]
+	rigIndex = rigTokenIndex(selectedRig.longName())
+	transforms = findBySuffix(rigIndex, influenceNodes)
+	transforms = cmds.ls(transforms, type='transform', long=True) if transforms else []
 	nodesToUnlock.extend(transforms)
 
 	atManip.lock_hide(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, objects=nodesToUnlock, hide=False)
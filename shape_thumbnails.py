@@ -0,0 +1,172 @@
+"""
+Palette thumbnails of control shapes.  Thumbnails are drawn straight from the
+curve points of a shape as an orthographic projection of its CV polylines,
+so nothing is built in the scene to make them.
+
+Rendered thumbnails are kept in a small in-memory LRU cache and saved as
+PNG files named by the hash of the shape they were drawn from.  Opening the
+palette again only reads those files back, and a shape is only re-rendered
+when its data (and so its hash) changes.
+"""
+import os
+import hashlib
+from collections import OrderedDict
+from PySide2 import QtCore, QtGui
+from master_rigger import curve_transforms as pnt
+
+THUMBNAIL_SIZE = 32
+# Rotation of the view the shapes are projected from, looking slightly down
+# on them so flat and 3D shapes both read
+VIEW_ROTATION = (0, 45, 0)
+VIEW_TILT = (-30, 0, 0)
+
+# Environment variable pointing to the folder thumbnails are saved in
+CACHE_ENV = 'MASTER_RIGGER_THUMBNAIL_CACHE'
+
+
+def default_cache_dir():
+    """
+    Returns the folder thumbnails are saved in.
+    """
+    return os.environ.get(CACHE_ENV) or os.path.join(
+        os.path.expanduser('~'), '.master_rigger', 'thumbnails')
+
+
+def shape_hash(data):
+    """
+    Returns the hex digest used as the cache key of a shape.
+
+    Args:
+        data (bytes): Bytes describing the shape, any change of the shape must
+            change them.
+
+    """
+    return hashlib.sha1(data).hexdigest()
+
+
+def project_points(points):
+    """
+    Returns the (N, 2) screen points of the orthographic view of a curve.
+    """
+    points = pnt.transform_points(points, rotation=VIEW_ROTATION)
+    return pnt.transform_points(points, rotation=VIEW_TILT)[:, :2]
+
+
+def render_thumbnail(curves, size=THUMBNAIL_SIZE, color=(255, 255, 0)):
+    """
+    Draws the CV polylines of a shape into a pixmap.
+
+    Args:
+        curves (list[dict]): Curve data of the shape, as read by
+            curve_assignment.read_curve_data().
+        size (int): Width and height of the thumbnail.
+        color (list[int, int, int]): Line color, 0 to 255.
+
+    Returns:
+        (QtGui.QPixmap): The thumbnail.
+
+    """
+    pixmap = QtGui.QPixmap(size, size)
+    pixmap.fill(QtCore.Qt.transparent)
+
+    projected = [(curve['form'], project_points(curve['points']))
+                 for curve in curves if len(curve['points'])]
+    if not projected:
+        return pixmap
+
+    minimum = [min(points[:, axis].min() for _, points in projected)
+               for axis in (0, 1)]
+    maximum = [max(points[:, axis].max() for _, points in projected)
+               for axis in (0, 1)]
+    extent = max(maximum[0] - minimum[0], maximum[1] - minimum[1]) or 1.0
+    margin = 2.0
+    fit = (size - 2 * margin) / extent
+    center = [(maximum[axis] + minimum[axis]) / 2.0 for axis in (0, 1)]
+
+    painter = QtGui.QPainter(pixmap)
+    painter.setRenderHint(QtGui.QPainter.Antialiasing)
+    painter.setPen(QtGui.QPen(QtGui.QColor(*color), 1))
+    for form, points in projected:
+        polyline = QtGui.QPolygonF(
+            [QtCore.QPointF(size / 2.0 + (x - center[0]) * fit,
+                            size / 2.0 - (y - center[1]) * fit)
+             for x, y in points.tolist()])
+        # Closed and periodic curves join back to their first point
+        if form:
+            polyline.append(polyline[0])
+        painter.drawPolyline(polyline)
+    painter.end()
+    return pixmap
+
+
+class ThumbnailCache(object):
+    """
+    LRU cache of shape thumbnails, backed by PNG files on disk.
+
+    Args:
+        cache_dir (str): Folder the thumbnails are saved in.
+            default_cache_dir() if not given.
+        max_size (int): Number of pixmaps kept in memory.
+        size (int): Width and height of the thumbnails.
+
+    """
+
+    def __init__(self, cache_dir=None, max_size=64, size=THUMBNAIL_SIZE):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_size = max_size
+        self.size = size
+        self._pixmaps = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._pixmaps or os.path.isfile(self.path(key))
+
+    def __len__(self):
+        return len(self._pixmaps)
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, '{}_{}.png'.format(key, self.size))
+
+    def get(self, key, curves):
+        """
+        Returns the thumbnail of a shape, from memory, then from disk, and
+        only rendered if neither has it.
+
+        Args:
+            key (str): Hash of the shape, see shape_hash().
+            curves (function): Returns the curve data of the shape.  Only
+                called when the thumbnail has to be rendered.
+
+        Returns:
+            (QtGui.QPixmap): The thumbnail.
+
+        """
+        if key in self._pixmaps:
+            pixmap = self._pixmaps.pop(key)
+            self._pixmaps[key] = pixmap
+            return pixmap
+
+        path = self.path(key)
+        pixmap = QtGui.QPixmap(path) if os.path.isfile(path) else None
+        if pixmap is None or pixmap.isNull():
+            pixmap = render_thumbnail(curves(), size=self.size)
+            self._save(path, pixmap)
+
+        self._pixmaps[key] = pixmap
+        while len(self._pixmaps) > self.max_size:
+            self._pixmaps.popitem(last=False)
+        return pixmap
+
+    def _save(self, path, pixmap):
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+        except OSError:
+            # Thumbnails still work from memory without a writable folder
+            return
+        pixmap.save(path, 'PNG')
+
+    def clear(self):
+        """
+        Empties the in-memory cache.  Saved thumbnails are kept.
+        """
+        self._pixmaps.clear()
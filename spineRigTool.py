@@ -243,13 +243,13 @@ def create_spine_controls(prefix='C', control_colors=('yellow', 'orange')):
     cog_scnd_shape = crv.add_curve_shape(shape_choice='box',
                                          transform_node=cog_scnd_ctrl,
                                          color=control_colors[0],
-                                         off_color=True)
-    cmds.xform(cog_scnd_ctrl + '.cv[0:]', scale=[2.2, 0.6, 2.2])
+                                         off_color=True,
+                                         scale=[2.2, 0.6, 2.2])
     cog_ctrl = cmds.group(cog_scnd_ctrl, name=prefix + '_COG_CTRL')
     crv.add_curve_shape(shape_choice='box',
                         transform_node=cog_ctrl,
-                        color=control_colors[0])
-    cmds.xform(cog_ctrl + '.cv[0:]', scale=[2, 0.5, 2])
+                        color=control_colors[0],
+                        scale=[2, 0.5, 2])
     cog_offset = tool.create_offset(input_object=cog_ctrl)
     tool.match_transformations(rotation=False,
                                source=prefix + '_pelvis_JNT',
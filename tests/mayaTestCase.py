@@ -0,0 +1,46 @@
+"""
+Base test case of the mayapy tests.  Run with mayapy from the folder holding
+master_rigger:
+    mayapy -m unittest discover master_rigger/tests
+"""
+import unittest
+
+try:
+    import maya.standalone
+    import maya.cmds as cmds
+except ImportError:
+    maya = cmds = None
+
+_initialized = False
+
+
+def initialize_maya():
+    """
+    Starts Maya standalone the first time it is called.
+
+    Returns:
+        (bool): If Maya is available.
+
+    """
+    global _initialized
+    if maya is None:
+        return False
+    if not _initialized:
+        maya.standalone.initialize()
+        _initialized = True
+    return True
+
+
+class MayaTestCase(unittest.TestCase):
+    """
+    Skips its tests when Maya is not available, and gives each test a new
+    scene.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        if not initialize_maya():
+            raise unittest.SkipTest('Maya is not available')
+
+    def setUp(self):
+        cmds.file(new=True, force=True)
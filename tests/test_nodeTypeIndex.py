@@ -0,0 +1,34 @@
+import unittest
+
+from mayaTestCase import MayaTestCase, cmds
+
+
+class FindMisnamedTest(MayaTestCase):
+
+    def setUp(self):
+        super(FindMisnamedTest, self).setUp()
+        from master_rigger import nodeTypeIndex
+        self.index = nodeTypeIndex.NodeTypeIndex()
+
+        self.misnamed = cmds.createNode('multiplyDivide', name='L_arm_scale_ADL')
+        self.named = cmds.createNode('multiplyDivide', name='L_arm_scale_MDIV')
+        self.default = cmds.createNode('multiplyDivide')
+        # Linear to angle connection, Maya adds a unitConversion in between
+        locator = cmds.spaceLocator()[0]
+        cmds.connectAttr(locator + '.tx', locator + '.rx')
+
+    def test_misnamed_node(self):
+        found = [entry.node for entry in self.index.find_misnamed()]
+        self.assertIn(self.misnamed, found)
+        self.assertNotIn(self.named, found)
+
+    def test_maya_named_nodes_skipped(self):
+        self.assertTrue(cmds.ls(type='unitConversion'))
+        found = [entry.node for entry in self.index.find_misnamed()]
+        self.assertNotIn(self.default, found)
+        for conversion in cmds.ls(type='unitConversion'):
+            self.assertNotIn(conversion, found)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from mayaTestCase import MayaTestCase, cmds
+
+
+class FindBySuffixTest(MayaTestCase):
+
+    def setUp(self):
+        super(FindBySuffixTest, self).setUp()
+        from master_rigger import sanityChecker
+        self.sanityChecker = sanityChecker
+
+        self.rig = cmds.group(empty=True, name='Rig')
+        for name in ('L_arm_shoulder_OFS', 'L_arm_shoulderOFS', 'pelvisGRP',
+                     'GRP', 'L_arm_CTRL', 'spineCTL', 'L_arm_01'):
+            cmds.group(empty=True, name=name, parent=self.rig)
+
+    def find(self, suffixes):
+        rigIndex = self.sanityChecker.rigTokenIndex(self.rig)
+        return [node.rsplit('|', 1)[-1]
+                for node in self.sanityChecker.findBySuffix(rigIndex, suffixes)]
+
+    def test_suffix_token(self):
+        self.assertIn('L_arm_shoulder_OFS', self.find(self.sanityChecker.influenceNodes))
+
+    def test_names_without_suffix_token(self):
+        self.assertEqual(sorted(self.find(self.sanityChecker.influenceNodes)),
+                         ['GRP', 'L_arm_shoulderOFS', 'L_arm_shoulder_OFS',
+                          'pelvisGRP'])
+        self.assertEqual(sorted(self.find(self.sanityChecker.controlNodes)),
+                         ['L_arm_CTRL', 'spineCTL'])
+
+
+if __name__ == '__main__':
+    unittest.main()